@@ -0,0 +1,258 @@
+# Benchmarks/Fixtures.py (MEDIA PAYLOAD FIXTURES)
+#
+# get_media_data_v2.php payloads for offline benchmarks, in the exact shape the
+# RapidAPI scraper returns: the first comment page embedded in the media
+# payload, the rest as get_post_comments.php pages chained by end_cursor.
+#
+# Synthetic fixtures are generated deterministically from (shortcode, size), so
+# every run sees the same data. Real posts can be recorded once and replayed;
+# --anonymize swaps usernames, names, ids, @mentions and media URLs for stable
+# placeholders so a recording can be checked in as Benchmarks/fixtures/anon-*.json:
+#
+#   python -m Benchmarks.Fixtures --write Benchmarks/fixtures
+#   python -m Benchmarks.Fixtures --record DQbefDfDGiU --max-pages 100
+#   python -m Benchmarks.Fixtures --record DQbefDfDGiU --anonymize anon-carousel-0002
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+FIXTURE_SIZES = {"empty": 0, "small": 50, "large": 5000}
+PAGE_SIZE = 50
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+Pages = Dict[str, Dict[str, Any]]
+
+_WORDS = (
+    "love this so much amazing great product when is the next drop need it now where did you get that "
+    "price please restock shipping took forever broken on arrival refund the colors are stunning "
+    "best purchase ever boring honestly waste of money cute fun wow perfect thanks for sharing link"
+).split()
+_EMOJI = ["😍", "🔥", "❤", "😂", "👏", "🙄", "😢", "💯", "✨", "👎"]
+_HASHTAGS = [
+    "fashion", "style", "ootd", "summer", "newdrop", "streetwear", "sustainable", "handmade",
+    "smallbusiness", "shoplocal", "vintage", "design", "minimal", "accessories", "giftideas"
+]
+
+
+def _rng(*parts: Any) -> random.Random:
+    seed = hashlib.sha256("|".join(map(str, parts)).encode("utf-8")).hexdigest()
+    return random.Random(int(seed[:16], 16))
+
+
+def _comment_text(rng: random.Random) -> str:
+    words = rng.choices(_WORDS, k=rng.randint(2, 18))
+    if rng.random() < 0.4:
+        words.append(rng.choice(_EMOJI) * rng.randint(1, 3))
+    return " ".join(words)
+
+
+def _cdn_url(*parts: Any) -> str:
+    digest = hashlib.sha1("/".join(map(str, parts)).encode("utf-8")).hexdigest()
+    return f"https://scontent.cdninstagram.com/v/t51.2885-15/{digest}_n.jpg?stp=dst-jpg_e35&_nc_ht=scontent&oh={digest[:24]}&oe=6700A1B2"
+
+
+def _connection(nodes: List[Dict[str, Any]], total: int, cursor: Optional[str]) -> Dict[str, Any]:
+    return {
+        "count": total,
+        "page_info": {"has_next_page": cursor is not None, "end_cursor": cursor},
+        "edges": [{"node": node} for node in nodes]
+    }
+
+
+def make_payload(shortcode: str, n_comments: int) -> Tuple[Dict[str, Any], Pages]:
+    """Synthetic media payload with `n_comments` comments. Returns (payload, {end_cursor: comments_page})."""
+    rng = _rng(shortcode, n_comments)
+    nodes = [
+        {
+            "id": f"{shortcode}-{i}",
+            "text": _comment_text(rng),
+            "created_at": 1_700_000_000 + i * 37,
+            "edge_liked_by": {"count": int(rng.paretovariate(1.3)) - 1},
+            "owner": {"username": f"user_{rng.randint(1, 50_000)}"},
+            # Fields real payloads carry that the pipeline never reads
+            "did_report_as_spam": False,
+            "viewer_has_liked": False,
+            "is_restricted_pending": False,
+            "edge_threaded_comments": {"count": 0, "page_info": {"has_next_page": False, "end_cursor": None}, "edges": []}
+        }
+        for i in range(n_comments)
+    ]
+    for node in nodes:
+        node["owner"].update({
+            "id": str(int(hashlib.sha1(node["owner"]["username"].encode("utf-8")).hexdigest()[:10], 16)),
+            "is_verified": False,
+            "profile_pic_url": _cdn_url(node["owner"]["username"], "avatar")
+        })
+    chunks = [nodes[i:i + PAGE_SIZE] for i in range(0, len(nodes), PAGE_SIZE)] or [[]]
+    cursors = [f"{shortcode}:page:{i}" for i in range(1, len(chunks))] + [None]
+
+    tags = rng.sample(_HASHTAGS, rng.randint(2, 8))
+    is_video = rng.random() < 0.5
+    followers = rng.randint(2_000, 500_000)
+    payload = {
+        "id": str(int(hashlib.sha1(shortcode.encode("utf-8")).hexdigest()[:15], 16)),
+        "shortcode": shortcode,
+        "taken_at_timestamp": 1_700_000_000 + rng.randint(0, 90 * 86_400),
+        "product_type": "clips" if is_video else rng.choice(["feed", "carousel_container"]),
+        "is_video": is_video,
+        "edge_media_preview_like": {"count": int(followers * rng.uniform(0.005, 0.08))},
+        "edge_media_to_caption": {"edges": [{"node": {"text": (
+            f"{shortcode}: " + " ".join(rng.choices(_WORDS, k=rng.randint(8, 60)))
+            + " " + " ".join(f"#{tag}" for tag in tags)
+        )}}]},
+        "owner": {
+            "username": "bench_account",
+            "full_name": "Bench Account",
+            "is_verified": True,
+            "profile_pic_url": _cdn_url(shortcode, "owner"),
+            "edge_followed_by": {"count": followers}
+        },
+        "dimensions": {"height": 1350, "width": 1080},
+        "display_url": _cdn_url(shortcode, "display"),
+        "display_resources": [
+            {"src": _cdn_url(shortcode, width), "config_width": width, "config_height": int(width * 1.25)}
+            for width in (640, 750, 1080)
+        ],
+        "thumbnail_src": _cdn_url(shortcode, "thumb"),
+        "accessibility_caption": "Photo by Bench Account. May be an image of clothing and text.",
+        "edge_web_media_to_related_media": {"edges": []},
+        "edge_media_to_tagged_user": {"edges": []},
+        "edge_media_to_parent_comment": _connection(chunks[0], n_comments, cursors[0])
+    }
+    if is_video:
+        payload["video_view_count"] = rng.randint(1_000, 400_000)
+    pages = {
+        cursors[i - 1]: {"edge_media_to_parent_comment": _connection(chunks[i], n_comments, cursors[i])}
+        for i in range(1, len(chunks))
+    }
+    return payload, pages
+
+
+def size_of(shortcode: str, default: str = "small") -> int:
+    """Comment count for a benchmark shortcode such as "bench-large-0003" (size name inside the code)."""
+    for name, n_comments in FIXTURE_SIZES.items():
+        if f"-{name}-" in f"-{shortcode}-":
+            return n_comments
+    return FIXTURE_SIZES[default]
+
+
+def load_recorded(shortcode: str, directory: str = FIXTURE_DIR) -> Optional[Tuple[Dict[str, Any], Pages]]:
+    path = os.path.join(directory, f"{shortcode}.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        fixture = json.load(f)
+    return fixture["payload"], fixture["pages"]
+
+
+def load_fixture(shortcode: str, directory: str = FIXTURE_DIR) -> Tuple[Dict[str, Any], Pages]:
+    """A recorded fixture when one exists for the shortcode, else a synthetic one sized by `size_of`."""
+    return load_recorded(shortcode, directory) or make_payload(shortcode, size_of(shortcode))
+
+
+def save_fixture(payload: Dict[str, Any], pages: Pages, directory: str = FIXTURE_DIR) -> str:
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{payload['shortcode']}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"payload": payload, "pages": pages}, f, ensure_ascii=False)
+    return path
+
+
+_ID_KEYS = ("id", "pk", "fbid")
+_BLANKED_KEYS = ("full_name", "biography", "external_url", "accessibility_caption")
+# Instagram usernames never end with a period, so a mention ending a sentence keeps its full stop
+_MENTION = re.compile(r"@([A-Za-z0-9_](?:[A-Za-z0-9._]*[A-Za-z0-9_])?)")
+
+
+def _pseudonym(username: str) -> str:
+    return "user_" + hashlib.sha1(username.lower().encode("utf-8")).hexdigest()[:8]
+
+
+def anonymize(value: Any, shortcode: str) -> Any:
+    """A copy of a raw response body with personal data replaced and the shape kept.
+
+    Usernames and @mentions map to stable pseudonyms, numeric ids are re-hashed,
+    names and bios are blanked and URLs point at placeholder CDN paths. Comment
+    text, counts and timestamps are kept; the post's shortcode becomes `shortcode`.
+    """
+    if isinstance(value, list):
+        return [anonymize(item, shortcode) for item in value]
+    if not isinstance(value, dict):
+        return value
+    out: Dict[str, Any] = {}
+    for key, item in value.items():
+        if not isinstance(item, str):
+            out[key] = anonymize(item, shortcode)
+        elif key == "shortcode":
+            out[key] = shortcode
+        elif key == "username":
+            out[key] = _pseudonym(item)
+        elif key in _ID_KEYS and item.isdigit():
+            out[key] = str(int(hashlib.sha1(item.encode("utf-8")).hexdigest()[:15], 16))
+        elif key in _BLANKED_KEYS:
+            out[key] = ""
+        elif item.startswith("http"):
+            out[key] = _cdn_url(shortcode, item)
+        else:
+            out[key] = _MENTION.sub(lambda m: "@" + _pseudonym(m.group(1)), item)
+    return out
+
+
+def _get_raw(path: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """One RapidAPI response body, decoded in full (no projection)."""
+    from Tools.Http_Client import rapidapi
+
+    response = rapidapi.get(path, params=params)
+    response.raise_for_status()
+    return json.loads(response.content)
+
+
+def record(shortcode: str, max_pages: int = 100, directory: str = FIXTURE_DIR,
+           anonymize_as: Optional[str] = None) -> str:
+    """Fetch a live post and its comment pages through RapidAPI and save the raw bodies as a fixture.
+
+    Bodies are stored unprojected, exactly as RapidAPI returned them, so the
+    payload suite's full-vs-projected comparison and the stub server see the
+    real response shape; projection only ever happens inside the pipeline.
+    With `anonymize_as` the bodies go through `anonymize` and are saved under
+    that shortcode, which is how the checked-in anon-* fixtures are made.
+    """
+    from Tools.Comments import COMMENTS_ENDPOINT, _comment_connection
+
+    payload = _get_raw("get_media_data_v2.php", {"media_code": shortcode})
+    if "error" in payload or "shortcode" not in payload:
+        raise RuntimeError(payload.get("error", "INVALID_RESPONSE: Missing shortcode field."))
+
+    pages: Pages = {}
+    page_info = payload.get("edge_media_to_parent_comment", {}).get("page_info") or {}
+    while page_info.get("has_next_page") and page_info.get("end_cursor") and len(pages) < max_pages:
+        cursor = page_info["end_cursor"]
+        pages[cursor] = _get_raw(COMMENTS_ENDPOINT, {"media_code": shortcode, "end_cursor": cursor})
+        page_info = _comment_connection(pages[cursor]).get("page_info") or {}
+    if anonymize_as:
+        payload, pages = anonymize(payload, anonymize_as), anonymize(pages, anonymize_as)
+    return save_fixture(payload, pages, directory)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate or record benchmark fixtures.")
+    parser.add_argument("--write", metavar="DIR", help="Write the synthetic empty/small/large fixtures to DIR")
+    parser.add_argument("--record", metavar="SHORTCODE", help="Record a live post (needs RapidAPI access)")
+    parser.add_argument("--max-pages", type=int, default=100)
+    parser.add_argument("--anonymize", metavar="SHORTCODE", help="Anonymize the recording and save it under SHORTCODE")
+    args = parser.parse_args()
+
+    if args.write:
+        for name in FIXTURE_SIZES:
+            print(save_fixture(*make_payload(f"bench-{name}-0000", FIXTURE_SIZES[name]), directory=args.write))
+    if args.record:
+        print(record(args.record, args.max_pages, anonymize_as=args.anonymize))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+# Benchmarks/Run.py (OFFLINE BENCHMARK RUNNER)
+#
+# Measures the pipeline without network access or API keys: RapidAPI and
+# OpenAI are replaced by the local servers in Benchmarks/Stub_Servers.py and
+# posts come from Benchmarks/Fixtures.py (empty / small / large comment
+# threads, plus the anonymized recordings checked in under Benchmarks/fixtures,
+# which keep the suites honest about the real response shape). Caches live in a
+# throwaway directory, so every run starts cold.
+#
+# Suites:
+#   payload  - full json decode vs the streamed field projection, time and peak memory per payload
+#   extract  - _extract_key_metrics over each fixture size (comment pages served in-process)
+#   e2e      - scrape + parallel LLM stages for one post per fixture size and recording, with a per-stage breakdown
+#   batch    - posts/min through Tools.Batch at several worker counts
+#
+# Results are written as stable JSON (sorted keys, one flat metric name per
+# number) so two runs can be diffed or compared:
+#
+#   python -m Benchmarks.Run --output Benchmarks/results/baseline.json
+#   python -m Benchmarks.Run --compare Benchmarks/results/baseline.json --tolerance 0.2
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Dict, List
+
+from Benchmarks.Fixtures import FIXTURE_DIR, FIXTURE_SIZES, load_recorded, make_payload
+from Benchmarks.Stub_Servers import start_stubs
+
+SCHEMA_VERSION = 1
+SUITES = ("payload", "extract", "e2e", "batch")
+DEFAULT_CONCURRENCY = (1, 4, 16)
+DEFAULT_BATCH_POSTS = 32
+
+Results = Dict[str, Dict[str, Any]]
+
+
+def _configure_environment(args) -> Dict[str, str]:
+    """Point the Tools package at the stub servers and a fresh cache dir. Must run before importing Tools."""
+    env = start_stubs(args.rapidapi_latency, args.llm_latency, args.llm_token_latency)
+    env.update({
+        "OPENAI_API_KEY": "benchmark",
+        "RAPIDAPI_KEY": "benchmark",
+        "CACHE_DIR": tempfile.mkdtemp(prefix="bench-cache-"),
+        "TELEMETRY_EXPORT": "off",
+        "RAPIDAPI_RATE_PER_SECOND": "1000",
+        "RAPIDAPI_BURST": "1000"
+    })
+    os.environ.update(env)
+    return env
+
+
+def _metric(results: Results, name: str, value: float, unit: str, better: str) -> None:
+    results[name] = {"value": round(value, 4), "unit": unit, "better": better}
+
+
+def _quiet(verbose: bool):
+    return contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+
+
+# ===== SUITES =====
+
+def _recorded_shortcodes() -> List[str]:
+    """Shortcodes of the recorded fixtures in FIXTURE_DIR (bench-* files are written-out synthetic ones)."""
+    if not os.path.isdir(FIXTURE_DIR):
+        return []
+    return [
+        filename[:-5] for filename in sorted(os.listdir(FIXTURE_DIR))
+        if filename.endswith(".json") and not filename.startswith("bench-")
+    ]
+
+
+def _payload_bodies() -> Dict[str, bytes]:
+    """Media payload bodies: each synthetic size with the whole thread embedded, plus any recorded fixtures."""
+    bodies = {}
+    for name, n_comments in FIXTURE_SIZES.items():
+        payload, pages = make_payload(f"bench-{name}-p0000", n_comments)
+        connection = payload["edge_media_to_parent_comment"]
+        for page in pages.values():
+            connection["edges"].extend(page["edge_media_to_parent_comment"]["edges"])
+        connection["page_info"] = {"has_next_page": False, "end_cursor": None}
+        bodies[name] = json.dumps(payload).encode("utf-8")
+    for shortcode in _recorded_shortcodes():
+        payload, _ = load_recorded(shortcode)
+        bodies[f"recorded_{shortcode}"] = json.dumps(payload).encode("utf-8")
+    return bodies
+
+
+def bench_payload(results: Results, repeat: int) -> None:
+    from Tools.Payload_Projection import MEDIA_FIELDS, project_bytes, ijson
+
+    # What the fetch path did before (decode everything, cache everything) vs now (project, cache the projection)
+    paths = {
+        "full_json": lambda body: json.dumps(json.loads(body)),
+        "projected": lambda body: json.dumps(project_bytes(body, MEDIA_FIELDS))
+    }
+    for name, body in _payload_bodies().items():
+        _metric(results, f"payload.{name}.body_kb", len(body) / 1024, "KiB", "lower")
+        for path, parse in paths.items():
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                cached = parse(body)
+                timings.append(time.perf_counter() - started)
+            tracemalloc.start()
+            parse(body)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            _metric(results, f"payload.{name}.{path}.ms", statistics.median(timings) * 1000, "ms", "lower")
+            _metric(results, f"payload.{name}.{path}.peak_kb", peak / 1024, "KiB", "lower")
+            _metric(results, f"payload.{name}.{path}.cached_kb", len(cached) / 1024, "KiB", "lower")
+            reloads = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                json.loads(cached)
+                reloads.append(time.perf_counter() - started)
+            _metric(results, f"payload.{name}.{path}.cache_read_ms", statistics.median(reloads) * 1000, "ms", "lower")
+    results["payload.parser"] = {"value": "ijson" if ijson is not None else "json", "unit": "", "better": "none"}
+
+
+def bench_extract(results: Results, repeat: int) -> None:
+    from Tools.Instagram_Tools import _extract_key_metrics
+    from Tools.Comments import iter_comments
+
+    for name, n_comments in FIXTURE_SIZES.items():
+        timings = []
+        for run in range(repeat):
+            # Fresh shortcode per run: comment ids differ, so the embedding cache stays cold
+            payload, pages = make_payload(f"bench-{name}-x{run:04d}", n_comments)
+            comments = iter_comments(payload, max_comments=None, fetch_page=lambda _, cursor: pages[cursor])
+            started = time.perf_counter()
+            _extract_key_metrics(payload, comments)
+            timings.append(time.perf_counter() - started)
+
+        median = statistics.median(timings)
+        _metric(results, f"extract.{name}.ms_per_post", median * 1000, "ms", "lower")
+        if n_comments:
+            _metric(results, f"extract.{name}.comments_per_s", n_comments / median, "comments/s", "higher")
+
+
+def bench_e2e(results: Results, repeat: int, max_comments: int) -> None:
+    from Tools.Pipeline import scrape_post, analyze_post_async
+    from Tools.Telemetry import span, tracer
+
+    async def one(shortcode: str, force_refresh: bool):
+        with span("bench.e2e", shortcode=shortcode) as root:
+            result = await asyncio.to_thread(scrape_post, shortcode, force_refresh, max_comments)
+            result = await analyze_post_async(result, mode="parallel")
+        if not result.ok:
+            raise RuntimeError(f"{shortcode}: {result.error}")
+        return root.trace_id
+
+    # Recordings have a fixed shortcode, so their runs bypass the media cache to stay cold
+    posts = {name: lambda run, name=name: (f"bench-{name}-e{run:04d}", False) for name in FIXTURE_SIZES}
+    posts.update({f"recorded_{code}": lambda run, code=code: (code, True) for code in _recorded_shortcodes()})
+
+    for name, post in posts.items():
+        totals: List[float] = []
+        stages: Dict[str, List[float]] = {}
+        for run in range(repeat):
+            trace_id = asyncio.run(one(*post(run)))
+            for record in tracer.trace(trace_id):
+                if record["name"] == "bench.e2e":
+                    totals.append(record["durationMs"])
+                else:
+                    stages.setdefault(record["name"], []).append(record["durationMs"])
+
+        _metric(results, f"e2e.{name}.total_ms", statistics.median(totals), "ms", "lower")
+        for stage, durations in sorted(stages.items()):
+            # Summed within a run (e.g. several rapidapi.get pages), averaged over runs
+            per_run = sum(durations) / repeat
+            _metric(results, f"e2e.{name}.stage.{stage}.ms", per_run, "ms", "lower")
+
+
+def bench_batch(results: Results, posts: int, concurrency: List[int], max_comments: int) -> None:
+    from Tools.Batch import iter_batch, BatchStats
+
+    async def run(workers: int) -> BatchStats:
+        stats = BatchStats()
+        shortcodes = [f"bench-small-w{workers:03d}-{i:04d}" for i in range(posts)]
+        async for result in iter_batch(
+            shortcodes,
+            workers=workers,
+            rapidapi_concurrency=workers,
+            openai_concurrency=workers,
+            max_comments=max_comments,
+            stats=stats
+        ):
+            if not result.ok:
+                raise RuntimeError(f"{result.shortcode}: {result.error}")
+        return stats
+
+    for workers in concurrency:
+        stats = asyncio.run(run(workers))
+        _metric(results, f"batch.workers_{workers}.posts_per_min", stats.posts_per_minute, "posts/min", "higher")
+
+
+# ===== REPORTING =====
+
+def compare(results: Results, baseline: Results, tolerance: float) -> List[str]:
+    """Metrics that got worse than the baseline by more than `tolerance` (a fraction)."""
+    regressions = []
+    for name, metric in sorted(results.items()):
+        previous = baseline.get(name)
+        if previous is None or metric["better"] == "none" or not previous["value"]:
+            continue
+        change = (metric["value"] - previous["value"]) / previous["value"]
+        worse = change > tolerance if metric["better"] == "lower" else change < -tolerance
+        if worse:
+            regressions.append(
+                f"{name}: {previous['value']} -> {metric['value']} {metric['unit']} ({change:+.1%})"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the analysis pipeline.")
+    parser.add_argument("--suite", nargs="+", choices=SUITES, default=list(SUITES))
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (median is reported)")
+    parser.add_argument("--batch-posts", type=int, default=DEFAULT_BATCH_POSTS)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=list(DEFAULT_CONCURRENCY))
+    parser.add_argument("--max-comments", type=int, default=200, help="Comments streamed per post in e2e/batch")
+    parser.add_argument("--rapidapi-latency", type=float, default=0.05, help="Seconds added per RapidAPI request")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Seconds added per LLM request")
+    parser.add_argument("--llm-token-latency", type=float, default=0.002, help="Seconds added per output token")
+    parser.add_argument("--output", help="Write results JSON here (default: stdout only)")
+    parser.add_argument("--compare", metavar="BASELINE", help="Fail if a metric regressed against this results file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed regression as a fraction (0.2 = 20%%)")
+    parser.add_argument("--verbose", action="store_true", help="Keep the pipeline's debug output")
+    args = parser.parse_args()
+
+    _configure_environment(args)
+    results: Results = {}
+    started = time.perf_counter()
+    with _quiet(args.verbose):
+        if "payload" in args.suite:
+            bench_payload(results, args.repeat)
+        if "extract" in args.suite:
+            bench_extract(results, args.repeat)
+        if "e2e" in args.suite:
+            bench_e2e(results, args.repeat, args.max_comments)
+        if "batch" in args.suite:
+            bench_batch(results, args.batch_posts, args.concurrency, args.max_comments)
+
+    report = {
+        "schema_version": SCHEMA_VERSION,
+        "config": {
+            "suites": args.suite,
+            "repeat": args.repeat,
+            "batch_posts": args.batch_posts,
+            "concurrency": args.concurrency,
+            "max_comments": args.max_comments,
+            "rapidapi_latency": args.rapidapi_latency,
+            "llm_latency": args.llm_latency,
+            "llm_token_latency": args.llm_token_latency,
+            "fixture_sizes": FIXTURE_SIZES
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count()
+        },
+        "elapsed_seconds": round(time.perf_counter() - started, 2),
+        "metrics": results
+    }
+    text = json.dumps(report, indent=2, sort_keys=True)
+    print(text)
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline["metrics"], args.tolerance)
+        for line in regressions:
+            print(f"[REGRESSION] {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"[BENCH] No regressions beyond {args.tolerance:.0%} against {args.compare}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
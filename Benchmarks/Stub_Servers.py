@@ -0,0 +1,213 @@
+# Benchmarks/Stub_Servers.py (LOCAL RAPIDAPI STUB + FAKE OPENAI BACKEND)
+#
+# Two small threaded HTTP servers so the whole pipeline runs offline:
+#
+# - RapidAPI stub: serves get_media_data_v2.php / get_post_comments.php from
+#   Benchmarks.Fixtures. Point RAPIDAPI_BASE_URL at it.
+# - Fake OpenAI: an OpenAI-compatible /v1/chat/completions (plain and SSE
+#   streaming, schema-valid structured output) and /v1/embeddings. Point
+#   OPENAI_BASE_URL at it.
+#
+# Both add a configurable latency per request; the fake LLM also adds a
+# per-output-token delay so streaming and max_tokens behave realistically.
+#
+#   python -m Benchmarks.Stub_Servers --llm-latency 0.4 --rapidapi-latency 0.08
+
+import argparse
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from Benchmarks.Fixtures import load_fixture
+
+EMBEDDING_DIM = 256
+
+_SENTIMENT = {
+    "overall_sentiment": "positive",
+    "key_themes": ["product quality", "restock requests", "shipping"],
+    "user_frustrations": ["slow shipping"],
+    "user_desires": ["restock", "more colors"],
+    "common_emotions": ["excitement", "impatience"],
+    "engagement_indicators": ["new product launch", "giveaway mention"]
+}
+_HASHTAGS = {
+    "suggested_hashtags": ["newdrop", "shopsmall", "styleinspo", "outfitideas", "limitededition",
+                           "musthave", "trendalert", "fashionfinds", "ootdinspo", "weekendvibes"],
+    "hashtag_strategy": "Mix of broad discovery tags and niche community tags."
+}
+_REPLIES = {
+    "SentimentAnalysis": _SENTIMENT,
+    "HashtagReply": _HASHTAGS,
+    "FusedAnalysis": {"sentiment": _SENTIMENT, "hashtags": _HASHTAGS}
+}
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _Handler(BaseHTTPRequestHandler):
+    latency = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, body: Any, status: int = 200) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+# ===== RAPIDAPI STUB =====
+
+class RapidAPIHandler(_Handler):
+    fixtures: Dict[str, Tuple[Dict[str, Any], Dict[str, Any]]] = {}
+    lock = threading.Lock()
+
+    def _fixture(self, shortcode: str):
+        with self.lock:
+            if shortcode not in self.fixtures:
+                self.fixtures[shortcode] = load_fixture(shortcode)
+            return self.fixtures[shortcode]
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        shortcode = query.get("media_code", "")
+        if url.path.endswith("get_media_data_v2.php"):
+            payload, _ = self._fixture(shortcode)
+            self._send_json(payload)
+        elif url.path.endswith("get_post_comments.php"):
+            _, pages = self._fixture(shortcode)
+            page = pages.get(query.get("end_cursor", ""))
+            self._send_json(page if page is not None else {"error": "unknown cursor"}, 200 if page else 404)
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+
+# ===== FAKE OPENAI =====
+
+def _tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class FakeOpenAIHandler(_Handler):
+    per_token_latency = 0.0
+
+    def _body(self) -> Dict[str, Any]:
+        return json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+
+    def do_POST(self):
+        body = self._body()
+        if self.path.endswith("/chat/completions"):
+            self._chat(body)
+        elif self.path.endswith("/embeddings"):
+            self._embeddings(body)
+        else:
+            self._send_json({"error": {"message": "not found"}}, 404)
+
+    def _chat(self, body: Dict[str, Any]) -> None:
+        schema = (body.get("response_format") or {}).get("json_schema", {}).get("name")
+        content = json.dumps(_REPLIES.get(schema, _SENTIMENT))
+        prompt_tokens = sum(_tokens(str(m.get("content", ""))) for m in body.get("messages", []))
+        completion_tokens = _tokens(content)
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                 "total_tokens": prompt_tokens + completion_tokens}
+        base = {"id": "chatcmpl-bench", "created": int(time.time()), "model": body.get("model", "gpt-4o-mini")}
+        time.sleep(self.latency)
+
+        if not body.get("stream"):
+            time.sleep(self.per_token_latency * completion_tokens)
+            self._send_json({
+                **base,
+                "object": "chat.completion",
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": content}}],
+                "usage": usage
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        chunk_size = 16
+        for start in range(0, len(content), chunk_size):
+            piece = content[start:start + chunk_size]
+            time.sleep(self.per_token_latency * _tokens(piece))
+            self._event({**base, "object": "chat.completion.chunk",
+                         "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]})
+        self._event({**base, "object": "chat.completion.chunk",
+                     "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        if (body.get("stream_options") or {}).get("include_usage"):
+            self._event({**base, "object": "chat.completion.chunk", "choices": [], "usage": usage})
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def _event(self, data: Dict[str, Any]) -> None:
+        self.wfile.write(f"data: {json.dumps(data)}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+    def _embeddings(self, body: Dict[str, Any]) -> None:
+        texts = body.get("input", [])
+        texts = [texts] if isinstance(texts, str) else texts
+        time.sleep(self.latency)
+        data = []
+        for i, text in enumerate(texts):
+            digest = hashlib.sha256(text.encode("utf-8")).digest()
+            vector = [((digest[j % len(digest)] + j) % 17 - 8) / 8 for j in range(EMBEDDING_DIM)]
+            data.append({"object": "embedding", "index": i, "embedding": vector})
+        tokens = sum(_tokens(t) for t in texts)
+        self._send_json({"object": "list", "data": data, "model": body.get("model"),
+                         "usage": {"prompt_tokens": tokens, "total_tokens": tokens}})
+
+
+# ===== RUNNING =====
+
+def serve(handler: type, port: int = 0, **settings) -> Tuple[ThreadingHTTPServer, str]:
+    """Start a server in a daemon thread. Returns (server, base_url); port 0 picks a free port."""
+    handler = type(handler.__name__, (handler,), settings)
+    server = _Server(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, name=handler.__name__, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def start_stubs(
+    rapidapi_latency: float = 0.05,
+    llm_latency: float = 0.3,
+    llm_token_latency: float = 0.002,
+    rapidapi_port: int = 0,
+    openai_port: int = 0
+) -> Dict[str, str]:
+    """Start both servers. Returns the environment variables that point the pipeline at them."""
+    _, rapidapi_url = serve(RapidAPIHandler, rapidapi_port, latency=rapidapi_latency)
+    _, openai_url = serve(FakeOpenAIHandler, openai_port, latency=llm_latency, per_token_latency=llm_token_latency)
+    return {"RAPIDAPI_BASE_URL": rapidapi_url, "OPENAI_BASE_URL": f"{openai_url}/v1"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the RapidAPI stub and the fake OpenAI backend.")
+    parser.add_argument("--rapidapi-port", type=int, default=8901)
+    parser.add_argument("--openai-port", type=int, default=8902)
+    parser.add_argument("--rapidapi-latency", type=float, default=0.05)
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--llm-token-latency", type=float, default=0.002)
+    args = parser.parse_args()
+
+    env = start_stubs(args.rapidapi_latency, args.llm_latency, args.llm_token_latency,
+                      args.rapidapi_port, args.openai_port)
+    for name, value in env.items():
+        print(f"export {name}={value}")
+    threading.Event().wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+# Tools/Batch.py (BATCH ANALYSIS ENGINE)
+#
+# Analyzes many posts at once. A bounded pool of async workers pulls shortcodes
+# off a queue; RapidAPI and OpenAI each get their own concurrency limit so a
+# slow LLM stage never starves the scraper (or vice versa). Results are yielded
+# as soon as each post finishes.
+#
+# Usage:
+#   python -m Tools.Batch shortcodes.txt --rapidapi-concurrency 4 --openai-concurrency 8
+#   python -m Tools.Batch DQbefDfDGiU https://instagram.com/p/ABC123/ --no-llm
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Iterable, List, Optional, Union
+
+from Tools.Instagram_Tools import _normalize_shortcode
+from Tools.Comments import DEFAULT_MAX_COMMENTS
+from Tools.Pipeline import PostReport, scrape_post, analyze_post_async, LLM_MODES
+from Tools.Telemetry import span
+
+DEFAULT_WORKERS = 16
+DEFAULT_RAPIDAPI_CONCURRENCY = 4
+DEFAULT_OPENAI_CONCURRENCY = 8
+
+
+@dataclass
+class BatchStats:
+    """Throughput summary for a finished batch."""
+    total: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def posts_per_minute(self) -> float:
+        return round(self.total / self.elapsed_seconds * 60, 2) if self.elapsed_seconds > 0 else 0.0
+
+
+def load_post_inputs(source: Union[str, Iterable[str]]) -> List[str]:
+    """Accept a file path (one shortcode/URL per line, '#' comments allowed) or an iterable of inputs.
+
+    Inputs are normalized to shortcodes and de-duplicated, keeping the original order.
+    """
+    if isinstance(source, str):
+        with open(source, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    else:
+        lines = list(source)
+
+    shortcodes = []
+    seen = set()
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        shortcode = _normalize_shortcode(line)
+        if shortcode and shortcode not in seen:
+            seen.add(shortcode)
+            shortcodes.append(shortcode)
+    return shortcodes
+
+
+async def _process_one(
+    shortcode: str,
+    rapidapi_limit: asyncio.Semaphore,
+    openai_limit: asyncio.Semaphore,
+    analyze: bool,
+    mode: str,
+    force_refresh: bool,
+    max_comments: int
+) -> PostReport:
+    # The same scrape as the UI and API (shared single-flight fetch, snapshot recorded), off the event loop.
+    # Extra comment pages are RapidAPI calls too, so they stay under the same limit.
+    async with rapidapi_limit:
+        result = await asyncio.to_thread(scrape_post, shortcode, force_refresh, max_comments)
+    if not result.ok or not analyze:
+        return result
+
+    async with openai_limit:
+        return await analyze_post_async(result, mode=mode)
+
+
+async def iter_batch(
+    shortcodes: List[str],
+    workers: int = DEFAULT_WORKERS,
+    rapidapi_concurrency: int = DEFAULT_RAPIDAPI_CONCURRENCY,
+    openai_concurrency: int = DEFAULT_OPENAI_CONCURRENCY,
+    analyze: bool = True,
+    mode: str = "parallel",
+    force_refresh: bool = False,
+    max_comments: int = DEFAULT_MAX_COMMENTS,
+    stats: Optional[BatchStats] = None
+) -> AsyncIterator[PostReport]:
+    """Yield a PostReport per shortcode, in completion order.
+
+    `openai_concurrency` bounds how many posts are in the LLM stage at once.
+    Pass a BatchStats to have it filled in when the batch ends.
+    """
+    if mode not in LLM_MODES:
+        raise ValueError(f"Unknown LLM mode '{mode}', expected one of {LLM_MODES}")
+
+    stats = stats if stats is not None else BatchStats()
+    started = time.perf_counter()
+
+    rapidapi_limit = asyncio.Semaphore(rapidapi_concurrency)
+    openai_limit = asyncio.Semaphore(openai_concurrency)
+    pending: asyncio.Queue = asyncio.Queue()
+    results: asyncio.Queue = asyncio.Queue()
+    for shortcode in shortcodes:
+        pending.put_nowait(shortcode)
+
+    async def worker():
+        while True:
+            try:
+                shortcode = pending.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                with span("batch.post", shortcode=shortcode, mode=mode):
+                    result = await _process_one(
+                        shortcode, rapidapi_limit, openai_limit, analyze, mode, force_refresh, max_comments
+                    )
+            except Exception as e:
+                result = PostReport(shortcode=shortcode, error=f"UNEXPECTED_ERROR: {str(e)}")
+            await results.put(result)
+
+    tasks = [asyncio.create_task(worker()) for _ in range(max(1, min(workers, len(shortcodes))))]
+    try:
+        for _ in range(len(shortcodes)):
+            result = await results.get()
+            stats.total += 1
+            if result.ok:
+                stats.succeeded += 1
+            else:
+                stats.failed += 1
+            stats.elapsed_seconds = time.perf_counter() - started
+            yield result
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        stats.elapsed_seconds = time.perf_counter() - started
+
+
+async def run_batch(source: Union[str, Iterable[str]], **kwargs) -> BatchStats:
+    """Run a whole batch, printing one JSON line per post and a throughput summary at the end."""
+    stats = BatchStats()
+    async for result in iter_batch(load_post_inputs(source), stats=stats, **kwargs):
+        print(json.dumps(result.to_dict()), flush=True)
+
+    print(
+        f"[BATCH] {stats.total} posts ({stats.succeeded} ok, {stats.failed} failed) "
+        f"in {stats.elapsed_seconds:.1f}s - {stats.posts_per_minute} posts/min"
+    )
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze many Instagram posts concurrently.")
+    parser.add_argument("inputs", nargs="+", help="Shortcodes/URLs, or a single file with one per line")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--rapidapi-concurrency", type=int, default=DEFAULT_RAPIDAPI_CONCURRENCY)
+    parser.add_argument("--openai-concurrency", type=int, default=DEFAULT_OPENAI_CONCURRENCY)
+    parser.add_argument("--mode", choices=LLM_MODES, default="parallel")
+    parser.add_argument("--no-llm", action="store_true", help="Only scrape metrics, skip sentiment/hashtags")
+    parser.add_argument("--force-refresh", action="store_true", help="Ignore the local media cache")
+    parser.add_argument("--max-comments", type=int, default=DEFAULT_MAX_COMMENTS, help="Comments to stream per post")
+    args = parser.parse_args()
+
+    source = args.inputs[0] if len(args.inputs) == 1 and os.path.isfile(args.inputs[0]) else args.inputs
+    asyncio.run(run_batch(
+        source,
+        workers=args.workers,
+        rapidapi_concurrency=args.rapidapi_concurrency,
+        openai_concurrency=args.openai_concurrency,
+        analyze=not args.no_llm,
+        mode=args.mode,
+        force_refresh=args.force_refresh,
+        max_comments=args.max_comments
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+# Tools/Cache_Store.py (LOCAL ON-DISK CACHES)
+#
+# SQLite-backed, zlib-compressed JSON caches with TTL checks on read and
+# LRU eviction once the table grows past its size budget.
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional
+
+CACHE_DIR = os.getenv("CACHE_DIR", ".cache")
+
+# RapidAPI payloads: counters go stale fast, comment pages barely change.
+# MEDIA_CACHE_MAX_BYTES is the budget for both, split by MEDIA_PAGES_SHARE.
+MEDIA_CACHE_PATH = os.path.join(CACHE_DIR, "media_cache.sqlite3")
+MEDIA_METRICS_TTL = int(os.getenv("MEDIA_METRICS_TTL", 15 * 60))
+MEDIA_CONTENT_TTL = int(os.getenv("MEDIA_CONTENT_TTL", 7 * 24 * 3600))
+MEDIA_CACHE_MAX_BYTES = int(os.getenv("MEDIA_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+MEDIA_PAGES_SHARE = float(os.getenv("MEDIA_PAGES_SHARE", 0.5))
+
+# LLM replies: keyed by a hash of model + messages + sampling params
+LLM_CACHE_PATH = os.path.join(CACHE_DIR, "llm_cache.sqlite3")
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", 30 * 24 * 3600))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+# Comment embeddings: keyed by embedding model + comment id, so re-analysis only embeds new comments
+EMBEDDING_CACHE_PATH = os.path.join(CACHE_DIR, "embedding_cache.sqlite3")
+EMBEDDING_CACHE_MAX_BYTES = int(os.getenv("EMBEDDING_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+
+class SqliteCache:
+    """Key -> JSON value store with per-read max_age and LRU size-based eviction.
+
+    Safe to share between threads; WAL mode lets the app, batch runs and other
+    processes use the same file.
+    """
+
+    # Keys per `IN (...)` lookup, well under SQLite's bound-parameter limit
+    BATCH_SIZE = 500
+
+    def __init__(self, path: str, table: str = "cache", max_bytes: int = 64 * 1024 * 1024):
+        self.path = path
+        self.table = table
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"""CREATE TABLE IF NOT EXISTS {table} (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_last_access ON {table} (last_access)")
+
+    def get(self, key: str, max_age: Optional[float] = None) -> Optional[Any]:
+        """Return the cached value, or None if missing or older than `max_age` seconds."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if max_age is not None and now - row[1] > max_age:
+                return None
+            self._conn.execute(f"UPDATE {self.table} SET last_access = ? WHERE key = ?", (now, key))
+        return json.loads(zlib.decompress(row[0]))
+
+    def get_many(self, keys: List[str], max_age: Optional[float] = None) -> Dict[str, Any]:
+        """`get` for many keys in one query per chunk. Missing or expired keys are left out."""
+        now = time.time()
+        found: Dict[str, Any] = {}
+        with self._lock:
+            for start in range(0, len(keys), self.BATCH_SIZE):
+                chunk = keys[start:start + self.BATCH_SIZE]
+                placeholders = ", ".join("?" for _ in chunk)
+                rows = self._conn.execute(
+                    f"SELECT key, value, created_at FROM {self.table} WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                fresh = [row for row in rows if max_age is None or now - row[2] <= max_age]
+                if fresh:
+                    self._conn.execute(
+                        f"UPDATE {self.table} SET last_access = ? WHERE key IN ({', '.join('?' for _ in fresh)})",
+                        (now, *(row[0] for row in fresh))
+                    )
+                found.update((row[0], row[1]) for row in fresh)
+        return {key: json.loads(zlib.decompress(blob)) for key, blob in found.items()}
+
+    def age(self, key: str) -> Optional[float]:
+        """Seconds since `key` was written, or None if missing."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT created_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+        return time.time() - row[0] if row else None
+
+    def set(self, key: str, value: Any) -> None:
+        blob = zlib.compress(json.dumps(value).encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, size, created_at, last_access) "
+                f"VALUES (?, ?, ?, ?, ?)",
+                (key, blob, len(blob), now, now)
+            )
+            self._evict()
+
+    def set_many(self, items: Dict[str, Any]) -> None:
+        """`set` for many entries in one transaction, evicting once at the end."""
+        if not items:
+            return
+        now = time.time()
+        rows = []
+        for key, value in items.items():
+            blob = zlib.compress(json.dumps(value).encode("utf-8"))
+            rows.append((key, blob, len(blob), now, now))
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value, size, created_at, last_access) "
+                    f"VALUES (?, ?, ?, ?, ?)",
+                    rows
+                )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            self._evict()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def purge_older_than(self, max_age: float) -> int:
+        """Drop every entry older than `max_age` seconds. Returns the number removed."""
+        with self._lock:
+            cursor = self._conn.execute(
+                f"DELETE FROM {self.table} WHERE created_at < ?", (time.time() - max_age,)
+            )
+        return cursor.rowcount
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()[0]
+
+    def _evict(self) -> None:
+        # Caller holds the lock. Drop least recently used rows until under budget.
+        total = self._conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute(f"SELECT key, size FROM {self.table} ORDER BY last_access ASC").fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            total -= size
+
+
+class MediaCache:
+    """Raw get_media_data_v2.php payloads keyed by shortcode.
+
+    A payload (counters plus the embedded first comment page) is served for
+    `metrics_ttl` seconds. Comment pages past the first live in their own
+    table, keyed by shortcode and end_cursor, and are served for the much
+    longer `content_ttl`: a refreshed payload whose thread has not moved
+    reuses them, while new comments change the cursors and miss. The two
+    tables share `max_bytes`. Expired rows are purged when the cache is opened.
+    """
+
+    def __init__(
+        self,
+        path: str = MEDIA_CACHE_PATH,
+        metrics_ttl: float = MEDIA_METRICS_TTL,
+        content_ttl: float = MEDIA_CONTENT_TTL,
+        max_bytes: int = MEDIA_CACHE_MAX_BYTES,
+        pages_share: float = MEDIA_PAGES_SHARE
+    ):
+        self.metrics_ttl = metrics_ttl
+        self.content_ttl = content_ttl
+        pages_bytes = int(max_bytes * pages_share)
+        self.store = SqliteCache(path, table="media", max_bytes=max_bytes - pages_bytes)
+        self.pages = SqliteCache(path, table="comment_pages", max_bytes=pages_bytes)
+        self.purge_expired()
+
+    @staticmethod
+    def _page_key(shortcode: str, end_cursor: str) -> str:
+        return f"{shortcode}:{end_cursor}"
+
+    def get_payload(self, shortcode: str) -> Optional[Dict[str, Any]]:
+        """Full payload if its metrics are still fresh."""
+        return self.store.get(shortcode, max_age=self.metrics_ttl)
+
+    def put(self, shortcode: str, payload: Dict[str, Any]) -> None:
+        self.store.set(shortcode, payload)
+
+    def get_comment_page(self, shortcode: str, end_cursor: str) -> Optional[Dict[str, Any]]:
+        """A comment page (get_post_comments.php projection) if fetched within the content TTL."""
+        return self.pages.get(self._page_key(shortcode, end_cursor), max_age=self.content_ttl)
+
+    def put_comment_page(self, shortcode: str, end_cursor: str, page: Dict[str, Any]) -> None:
+        self.pages.set(self._page_key(shortcode, end_cursor), page)
+
+    def invalidate(self, shortcode: str) -> None:
+        self.store.delete(shortcode)
+
+    def purge_expired(self) -> int:
+        """Drop payloads and comment pages that can no longer be served."""
+        return self.store.purge_older_than(self.metrics_ttl) + self.pages.purge_older_than(self.content_ttl)
+
+
+class LLMCache:
+    """Memoized chat completion replies with hit/miss counters."""
+
+    def __init__(
+        self,
+        path: str = LLM_CACHE_PATH,
+        ttl: float = LLM_CACHE_TTL,
+        max_bytes: int = LLM_CACHE_MAX_BYTES
+    ):
+        self.ttl = ttl
+        self.store = SqliteCache(path, table="llm", max_bytes=max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self._counter_lock = threading.Lock()
+
+    @staticmethod
+    def make_key(request_params: Dict[str, Any]) -> str:
+        """Stable hash of everything that affects the reply (model, messages, params)."""
+        canonical = json.dumps(request_params, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        content = self.store.get(key, max_age=self.ttl)
+        with self._counter_lock:
+            if content is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return content
+
+    def put(self, key: str, content: str) -> None:
+        self.store.set(key, content)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "stored_bytes": self.store.total_bytes()
+        }
+
+
+media_cache = MediaCache()
+llm_cache = LLMCache()
+embedding_cache = SqliteCache(EMBEDDING_CACHE_PATH, table="embeddings", max_bytes=EMBEDDING_CACHE_MAX_BYTES)
@@ -0,0 +1,104 @@
+# Tools/Clients.py (SHARED CLIENTS AND BACKGROUND LOOP)
+#
+# Process-wide resources that should be built once, not per request or per
+# Streamlit rerun: the .env load, the OpenAI clients and a persistent event
+# loop running in a daemon thread. Import this module before anything that
+# reads its configuration from the environment.
+
+import asyncio
+import concurrent.futures
+import os
+import queue
+import threading
+import time
+import weakref
+from functools import lru_cache
+from typing import Any, AsyncIterator, Coroutine, Iterator, Optional, TypeVar
+
+from dotenv import load_dotenv
+from openai import OpenAI, AsyncOpenAI
+
+load_dotenv()
+
+T = TypeVar("T")
+
+
+@lru_cache(maxsize=None)
+def openai_client() -> OpenAI:
+    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+
+# AsyncOpenAI connections are bound to the loop that opened them, so keep one client per loop
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI]" = weakref.WeakKeyDictionary()
+
+def async_openai_client() -> AsyncOpenAI:
+    loop = asyncio.get_running_loop()
+    if loop not in _async_clients:
+        _async_clients[loop] = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _async_clients[loop]
+
+
+_DONE = object()
+
+
+class BackgroundLoop:
+    """An event loop running forever in a daemon thread.
+
+    Synchronous callers (the Streamlit script) submit coroutines here instead of
+    calling `asyncio.run`, so async clients and their connection pools survive
+    between calls.
+    """
+
+    def __init__(self, name: str = "background-loop"):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name=name, daemon=True)
+        self._thread.start()
+
+    def run(self, coro: Coroutine[Any, Any, T], timeout: Optional[float] = None) -> T:
+        """Run a coroutine on the loop and block for its result. Raises TimeoutError after `timeout` seconds."""
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise TimeoutError(f"Timed out after {timeout} seconds")
+
+    def iterate(self, agen: AsyncIterator[T], timeout: Optional[float] = None) -> Iterator[T]:
+        """Drive an async generator on the loop and yield its items in the calling thread.
+
+        `timeout` bounds the whole iteration. Stopping early cancels the generator.
+        """
+        items: queue.Queue = queue.Queue()
+
+        async def pump():
+            try:
+                async for item in agen:
+                    items.put((True, item))
+            except Exception as e:
+                items.put((False, e))
+            finally:
+                items.put(_DONE)
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self.loop)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            while True:
+                remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+                try:
+                    entry = items.get(timeout=remaining)
+                except queue.Empty:
+                    raise TimeoutError(f"Timed out after {timeout} seconds")
+                if entry is _DONE:
+                    return
+                ok, value = entry
+                if not ok:
+                    raise value
+                yield value
+        finally:
+            future.cancel()
+
+
+@lru_cache(maxsize=None)
+def background_loop() -> BackgroundLoop:
+    """The process-wide loop; every Streamlit rerun submits here, so async OpenAI connections are reused."""
+    return BackgroundLoop(name="pipeline-loop")
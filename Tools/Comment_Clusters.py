@@ -0,0 +1,190 @@
+# Tools/Comment_Clusters.py (EMBEDDING-BASED COMMENT SELECTION)
+#
+# Embeds every streamed comment, clusters them with k-means and hands the LLM
+# one medoid per cluster plus the cluster size. A handful of medoids covers the
+# whole thread far better than the same number of top-liked comments.
+#
+# Embeddings come from a local hashing vectorizer by default (free, offline,
+# deterministic) or from the OpenAI embeddings API (EMBEDDING_BACKEND=openai).
+# OpenAI embeddings are cached per comment id, so re-analysing a post only
+# embeds the comments that arrived since the last run; hashing is cheaper than
+# any cache lookup, so it is never cached.
+
+import base64
+import hashlib
+import math
+import os
+import re
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+from Tools.Cache_Store import SqliteCache, embedding_cache
+from Tools.Telemetry import span
+
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "hashing")
+OPENAI_EMBEDDING_MODEL = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+MAX_CLUSTERS = 8
+KMEANS_ITERATIONS = 25
+KMEANS_SEED = 7
+
+_WORD_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+
+class HashingEmbedder:
+    """Signed feature hashing over word unigrams and bigrams, L2-normalized."""
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _bucket(self, token: str):
+        digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        return value % self.dim, 1.0 if (value >> 63) & 1 else -1.0
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = _WORD_RE.findall(text.lower())
+            for token in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+                index, sign = self._bucket(token)
+                vectors[row, index] += sign
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1.0, norms)
+
+    def embed_comments(self, comments: List[Dict[str, Any]]) -> np.ndarray:
+        return self.embed([c["text"] for c in comments])
+
+
+class OpenAIEmbedder:
+    """Batched OpenAI embeddings."""
+
+    def __init__(self, client, model: str = OPENAI_EMBEDDING_MODEL, batch_size: int = 256):
+        self.client = client
+        self.model = model
+        self.batch_size = batch_size
+        self.name = model
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        rows = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = texts[start:start + self.batch_size]
+            with span("llm.embeddings", texts=len(batch)) as stage:
+                response = self.client.embeddings.create(model=self.model, input=batch)
+                stage.add_usage(self.model, response.usage.prompt_tokens, 0)
+            rows.extend(item.embedding for item in response.data)
+        return np.asarray(rows, dtype=np.float32)
+
+
+class CachedEmbedder:
+    """Wraps a remote embedder with a per-comment cache keyed by embedder name + comment id.
+
+    Each batch is one cache lookup and one write of all misses.
+    """
+
+    def __init__(self, embedder, cache: SqliteCache = embedding_cache):
+        self.embedder = embedder
+        self.cache = cache
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, comment: Dict[str, Any]) -> str:
+        comment_id = comment.get("id") or hashlib.sha1(comment["text"].encode("utf-8")).hexdigest()
+        return f"{self.embedder.name}:{comment_id}"
+
+    def embed_comments(self, comments: List[Dict[str, Any]]) -> np.ndarray:
+        keys = [self._key(c) for c in comments]
+        cached = self.cache.get_many(keys)
+        vectors: List[Optional[np.ndarray]] = [_decode_vector(cached[key]) if key in cached else None for key in keys]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        self.hits += len(comments) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            fresh = self.embedder.embed([comments[i]["text"] for i in missing])
+            for i, vector in zip(missing, fresh):
+                vectors[i] = vector
+            self.cache.set_many({keys[i]: _encode_vector(vectors[i]) for i in missing})
+        return np.asarray(vectors, dtype=np.float32)
+
+
+# Vectors are cached as base64 float32 bytes: far cheaper to encode and decode than a JSON float list
+def _encode_vector(vector: np.ndarray) -> str:
+    return base64.b64encode(np.asarray(vector, dtype=np.float32).tobytes()).decode("ascii")
+
+
+def _decode_vector(value: Any) -> np.ndarray:
+    if isinstance(value, list):
+        # Entries written before vectors were packed
+        return np.asarray(value, dtype=np.float32)
+    return np.frombuffer(base64.b64decode(value), dtype=np.float32)
+
+
+def _kmeans(vectors: np.ndarray, k: int, seed: int = KMEANS_SEED) -> np.ndarray:
+    """Spherical k-means with k-means++ seeding. Returns a cluster label per row."""
+    rng = np.random.default_rng(seed)
+    n = len(vectors)
+    centroids = [vectors[rng.integers(n)]]
+    for _ in range(1, k):
+        distances = np.min(1 - vectors @ np.asarray(centroids).T, axis=1).clip(min=0)
+        total = distances.sum()
+        index = rng.choice(n, p=distances / total) if total > 0 else rng.integers(n)
+        centroids.append(vectors[index])
+    centroids = np.asarray(centroids)
+
+    labels = np.full(n, -1)
+    for _ in range(KMEANS_ITERATIONS):
+        new_labels = np.argmax(vectors @ centroids.T, axis=1)
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        for cluster in range(k):
+            members = vectors[labels == cluster]
+            if len(members):
+                centroid = members.mean(axis=0)
+                centroids[cluster] = centroid / (np.linalg.norm(centroid) or 1.0)
+    return labels
+
+
+def default_embedder(client=None) -> Union[CachedEmbedder, HashingEmbedder]:
+    if EMBEDDING_BACKEND == "openai" and client is not None:
+        return CachedEmbedder(OpenAIEmbedder(client))
+    return HashingEmbedder()
+
+
+class CommentClusterStage:
+    """Streaming comment stage (`feed(batch)`): collects comments, then clusters them on demand.
+
+    Holds at most the comments the upstream stream yields (bounded by max_comments).
+    """
+
+    def __init__(self, embedder: Optional[Union[CachedEmbedder, HashingEmbedder]] = None, max_clusters: int = MAX_CLUSTERS):
+        self.embedder = embedder or default_embedder()
+        self.max_clusters = max_clusters
+        self._comments: List[Dict[str, Any]] = []
+
+    def feed(self, batch: List[Dict[str, Any]]) -> None:
+        self._comments.extend(c for c in batch if c["text"].strip())
+
+    def representatives(self) -> List[Dict[str, Any]]:
+        """One medoid per cluster, largest cluster first, each tagged with `cluster_size`."""
+        comments = self._comments
+        if not comments:
+            return []
+
+        vectors = self.embedder.embed_comments(comments)
+        k = min(self.max_clusters, len(comments), max(1, math.ceil(math.sqrt(len(comments) / 2))))
+        labels = _kmeans(vectors, k)
+
+        medoids = []
+        for cluster in np.unique(labels):
+            member_idx = np.flatnonzero(labels == cluster)
+            members = vectors[member_idx]
+            # Medoid: the member with the highest total similarity to the rest of its cluster
+            # (for unit vectors that is the dot product with the member sum - no n x n matrix)
+            medoid = member_idx[int(np.argmax(members @ members.sum(axis=0)))]
+            medoids.append({**comments[medoid], "cluster_size": int(len(member_idx))})
+
+        medoids.sort(key=lambda c: (-c["cluster_size"], -c.get("likes", 0), c["text"]))
+        return medoids
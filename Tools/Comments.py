@@ -0,0 +1,169 @@
+# Tools/Comments.py (STREAMING COMMENT INGESTION)
+#
+# Walks a post's whole comment thread page by page (page_info/end_cursor) as a
+# generator, so downstream stages see every comment without the thread ever
+# being held in one list. Memory stays bounded by the page size, the cap and
+# whatever the consuming stage keeps. Fetched pages are cached in the media
+# cache with the long content TTL, so re-analysing a post only re-fetches
+# pages when its thread has changed.
+
+import heapq
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from Tools.Cache_Store import media_cache, MediaCache
+from Tools.Http_Client import rapidapi
+from Tools.Payload_Projection import COMMENT_PAGE_FIELDS, project_response
+
+COMMENTS_ENDPOINT = os.getenv("RAPIDAPI_COMMENTS_ENDPOINT", "get_post_comments.php")
+DEFAULT_MAX_COMMENTS = int(os.getenv("MAX_COMMENTS", 200))
+COMMENT_BATCH_SIZE = 256
+TOP_COMMENTS_KEPT = 5
+
+logger = logging.getLogger(__name__)
+
+# Where a comment connection ({"count", "page_info", "edges"}) can live in a page
+_CONNECTION_KEYS = ("edge_media_to_parent_comment", "edge_media_to_comment")
+
+
+def _comment_from_node(node: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Flatten a GraphQL comment node. Returns None for malformed nodes."""
+    try:
+        return {
+            "id": node.get("id"),
+            "text": node["text"],
+            "likes": node["edge_liked_by"]["count"],
+            "username": node["owner"]["username"],
+            "created_at": node.get("created_at")
+        }
+    except (KeyError, TypeError):
+        return None
+
+
+def _comment_connection(page: Dict[str, Any]) -> Dict[str, Any]:
+    for container in (page, page.get("data") or {}):
+        for key in _CONNECTION_KEYS:
+            if isinstance(container.get(key), dict):
+                return container[key]
+    return {}
+
+
+def _fetch_comment_page(shortcode: str, end_cursor: str) -> Dict[str, Any]:
+    """Fetch the next page of comments. Returns an empty dict on any API error."""
+    params = {"media_code": shortcode, "end_cursor": end_cursor}
+    with rapidapi.get(COMMENTS_ENDPOINT, params=params, stream=True) as response:
+        if response.status_code != 200:
+            logger.debug("Comment page fetch failed for %s: HTTP %s", shortcode, response.status_code)
+            return {}
+        return project_response(response, COMMENT_PAGE_FIELDS)
+
+
+def cached_page_fetcher(force_refresh: bool = False, cache: MediaCache = media_cache) -> Callable[[str, str], Dict[str, Any]]:
+    """`fetch_page` for iter_comments backed by the media cache's comment pages.
+
+    Pages are served from cache within the content TTL and stored after every
+    fetch. `force_refresh` skips the lookup but still refreshes the cache.
+    """
+    def fetch_page(shortcode: str, end_cursor: str) -> Dict[str, Any]:
+        page = None if force_refresh else cache.get_comment_page(shortcode, end_cursor)
+        if page is None:
+            page = _fetch_comment_page(shortcode, end_cursor)
+            if page:
+                cache.put_comment_page(shortcode, end_cursor, page)
+        return page
+
+    return fetch_page
+
+
+def iter_comments(
+    api_response: Dict[str, Any],
+    max_comments: Optional[int] = DEFAULT_MAX_COMMENTS,
+    fetch_page: Optional[Callable[[str, str], Dict[str, Any]]] = _fetch_comment_page
+) -> Iterator[Dict[str, Any]]:
+    """Yield comments from the media payload, then follow end_cursor until exhausted or `max_comments`.
+
+    `max_comments=None` means no cap; `fetch_page=None` stays on the embedded first page.
+    """
+    if max_comments is not None and max_comments <= 0:
+        return
+    shortcode = api_response.get("shortcode")
+    connection = api_response.get("edge_media_to_parent_comment", {})
+    yielded = 0
+    seen_ids = set()
+    seen_cursors = set()
+
+    while True:
+        for edge in connection.get("edges", []):
+            comment = _comment_from_node(edge.get("node", {}))
+            if comment is None or (comment["id"] is not None and comment["id"] in seen_ids):
+                continue
+            if comment["id"] is not None:
+                seen_ids.add(comment["id"])
+            yield comment
+            yielded += 1
+            if max_comments is not None and yielded >= max_comments:
+                return
+
+        page_info = connection.get("page_info") or {}
+        cursor = page_info.get("end_cursor")
+        if fetch_page is None or not page_info.get("has_next_page") or not cursor or cursor in seen_cursors or not shortcode:
+            return
+        seen_cursors.add(cursor)
+
+        try:
+            connection = _comment_connection(fetch_page(shortcode, cursor))
+        except Exception as e:
+            logger.debug("Comment pagination stopped for %s: %s", shortcode, e)
+            return
+
+
+def iter_comment_batches(comments: Iterable[Dict[str, Any]], batch_size: int = COMMENT_BATCH_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    """Group a comment stream into lists of at most `batch_size`, for vectorized stages."""
+    batch = []
+    for comment in comments:
+        batch.append(comment)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _rank_key(comment: Dict[str, Any]):
+    return (comment.get("likes", 0), comment["text"])
+
+
+@dataclass
+class CommentDigest:
+    """Streaming consumer: counts every comment and keeps only the `top_k` most liked."""
+    top_k: int = TOP_COMMENTS_KEPT
+    total_seen: int = 0
+    _heap: List = field(default_factory=list, repr=False)
+
+    def feed(self, batch: List[Dict[str, Any]]) -> None:
+        for comment in batch:
+            self.total_seen += 1
+            item = (_rank_key(comment), self.total_seen, comment)
+            if len(self._heap) < self.top_k:
+                heapq.heappush(self._heap, item)
+            elif item[0] > self._heap[0][0]:
+                heapq.heapreplace(self._heap, item)
+
+    @property
+    def top_comments(self) -> List[Dict[str, Any]]:
+        """Most liked first; ties broken by text so the order is stable."""
+        ranked = sorted(self._heap, key=lambda item: (-item[0][0], item[0][1]))
+        return [comment for _, _, comment in ranked]
+
+
+def digest_comments(comments: Iterable[Dict[str, Any]], top_k: int = TOP_COMMENTS_KEPT, stages: Iterable[Any] = ()) -> CommentDigest:
+    """Drive a comment stream through the digest and any extra stages exposing `feed(batch)`."""
+    digest = CommentDigest(top_k=top_k)
+    stages = list(stages)
+    for batch in iter_comment_batches(comments):
+        digest.feed(batch)
+        for stage in stages:
+            stage.feed(batch)
+    return digest
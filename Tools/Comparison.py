@@ -0,0 +1,152 @@
+# Tools/Comparison.py (CROSS-POST COMPARISON & ACCOUNT BENCHMARKS)
+#
+# Judges posts against their own account instead of fixed thresholds. Each
+# post's engagement rate is ranked within its account's latest snapshots
+# (Tools.Metrics_History): a percentile rank, a z-score, and a performance
+# level taken from the percentile. Accounts with fewer than MIN_POSTS posts
+# fall back to the absolute thresholds.
+#
+# Everything is computed as grouped DataFrame operations over all posts at
+# once, so comparing a handful of posts or benchmarking an account with
+# thousands of them is the same single pass.
+
+import os
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from Tools.Metrics_History import metrics_history, MetricsHistory
+
+MIN_POSTS = int(os.getenv("COMPARISON_MIN_POSTS", 5))
+HIGH_PERCENTILE = 75.0
+LOW_PERCENTILE = 25.0
+
+FRAME_COLUMNS = (
+    "shortcode", "username", "media_type", "is_video", "likes", "comments",
+    "video_views", "followers", "engagement_rate", "posted_at"
+)
+
+
+def _absolute_level(engagement_rate: pd.Series) -> np.ndarray:
+    """The fixed thresholds used when an account has too little history."""
+    return np.select([engagement_rate > 5, engagement_rate > 2], ["high", "medium"], "low")
+
+
+def metrics_frame(posts: Iterable[Any]) -> pd.DataFrame:
+    """One row per post from PostReports (or (metrics, engagement_rate) pairs)."""
+    rows = []
+    for post in posts:
+        metrics, engagement_rate = (post.metrics, post.engagement_rate) if hasattr(post, "metrics") else post
+        rows.append({
+            "shortcode": metrics.get("shortcode"),
+            "username": metrics.get("username"),
+            "media_type": metrics.get("media_type"),
+            "is_video": bool(metrics.get("is_video", False)),
+            "likes": metrics.get("likes", 0),
+            "comments": metrics.get("comments", 0),
+            "video_views": metrics.get("video_views") or 0,
+            "followers": metrics.get("followers", 0),
+            "engagement_rate": engagement_rate,
+            "posted_at": metrics.get("posting_time", {}).get("full_datetime")
+        })
+    return pd.DataFrame(rows, columns=list(FRAME_COLUMNS))
+
+
+def history_frame(usernames: Iterable[str], history: MetricsHistory = metrics_history) -> pd.DataFrame:
+    """Latest snapshot of every stored post of the given accounts."""
+    frames = [history.latest_snapshots(username, FRAME_COLUMNS) for username in dict.fromkeys(usernames) if username]
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame(columns=list(FRAME_COLUMNS))
+    frame = pd.concat(frames, ignore_index=True)[list(FRAME_COLUMNS)]
+    frame["is_video"] = frame["is_video"].fillna(0).astype(bool)
+    frame["video_views"] = frame["video_views"].fillna(0)
+    return frame
+
+
+def compare(frame: pd.DataFrame) -> pd.DataFrame:
+    """Add percentile rank, z-score and relative performance level within each account.
+
+    Adds `account_posts`, `engagement_percentile` (0-100), `engagement_zscore`,
+    `views_to_likes` (videos only), `performance_level` and `performance_basis`
+    ("account" or "absolute" when the account has fewer than MIN_POSTS posts).
+    """
+    frame = frame.copy()
+    engagement = frame["engagement_rate"].astype(float)
+    by_account = engagement.groupby(frame["username"].fillna(""))
+
+    frame["account_posts"] = by_account.transform("size")
+    frame["engagement_percentile"] = (by_account.rank(pct=True) * 100).round(1)
+    std = by_account.transform("std").replace(0, np.nan)
+    frame["engagement_zscore"] = ((engagement - by_account.transform("mean")) / std).fillna(0.0).round(2)
+    frame["views_to_likes"] = (frame["video_views"] / frame["likes"].clip(lower=1)).where(frame["is_video"]).round(2)
+
+    relative = frame["account_posts"] >= MIN_POSTS
+    percentile = frame["engagement_percentile"]
+    frame["performance_level"] = np.where(
+        relative,
+        np.select([percentile >= HIGH_PERCENTILE, percentile > LOW_PERCENTILE], ["high", "medium"], "low"),
+        _absolute_level(engagement)
+    )
+    frame["performance_basis"] = np.where(relative, "account", "absolute")
+    return frame
+
+
+def media_breakdown(compared: pd.DataFrame, by_account: bool = False) -> pd.DataFrame:
+    """Engagement and views-to-likes per media type (product_type) and is_video, from `compare` output."""
+    keys = (["username"] if by_account else []) + ["media_type", "is_video"]
+    grouped = compared.assign(media_type=compared["media_type"].fillna("unknown")).groupby(keys)
+    return grouped.agg(
+        posts=("shortcode", "size"),
+        mean_engagement_rate=("engagement_rate", "mean"),
+        median_engagement_rate=("engagement_rate", "median"),
+        mean_percentile=("engagement_percentile", "mean"),
+        median_views_to_likes=("views_to_likes", "median")
+    ).round(2).reset_index().sort_values("mean_engagement_rate", ascending=False, ignore_index=True)
+
+
+def _with_history(given: pd.DataFrame, history: MetricsHistory) -> pd.DataFrame:
+    """`given` appended to its accounts' stored posts (replacing their own snapshots), then compared."""
+    stored = history_frame(given["username"], history)
+    stored = stored[~stored["shortcode"].isin(given["shortcode"])]
+    frames = [frame for frame in (stored, given) if not frame.empty]
+    return compare(pd.concat(frames, ignore_index=True) if frames else given)
+
+
+def compare_posts(posts: Iterable[Any], history: MetricsHistory = metrics_history) -> pd.DataFrame:
+    """Compare analyzed posts, each against its account's full stored history.
+
+    The given posts replace their own stored snapshots, so freshly scraped
+    numbers are ranked. Rows come back in the order the posts were given.
+    """
+    given = metrics_frame(posts)
+    return _with_history(given, history).tail(len(given)).reset_index(drop=True)
+
+
+def benchmark_post(
+    metrics: Dict[str, Any],
+    engagement_rate: float,
+    history: MetricsHistory = metrics_history
+) -> Optional[Dict[str, Any]]:
+    """Where one post stands in its account's distribution. None until MIN_POSTS posts exist."""
+    if not metrics.get("username"):
+        return None
+    account = _with_history(metrics_frame([(metrics, engagement_rate)]), history)
+    post = account.iloc[-1]
+    if post["performance_basis"] != "account":
+        return None
+
+    breakdown = media_breakdown(account)
+    videos = account["views_to_likes"].dropna()
+    return {
+        "based_on_posts": int(post["account_posts"]),
+        "engagement_percentile": float(post["engagement_percentile"]),
+        "engagement_zscore": float(post["engagement_zscore"]),
+        "performance_level": post["performance_level"],
+        "account_median_views_to_likes": round(float(videos.median()), 2) if len(videos) else None,
+        "media_types": [
+            {key: None if pd.isna(value) else value for key, value in row.items()}
+            for row in breakdown[breakdown["posts"] >= 2].to_dict("records")
+        ]
+    }
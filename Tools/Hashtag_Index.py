@@ -0,0 +1,180 @@
+# Tools/Hashtag_Index.py (LOCAL HASHTAG INDEX)
+#
+# Inverted index over `hashtags_used` from every analyzed post: per-tag post
+# frequency and engagement-rate sums in NumPy arrays, tag co-occurrence in a
+# sparse adjacency map of integer ids. "Tags related to X, ranked by
+# engagement" is answered from memory in milliseconds; the LLM is only needed
+# while too few indexed posts share a post's own tags to rank from.
+#
+# Built once from the metrics history, then kept current as a MetricsHistory
+# listener (a re-scraped post replaces its previous contribution).
+
+import os
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from Tools.Metrics_History import metrics_history, MetricsHistory
+
+MIN_INDEX_POSTS = int(os.getenv("HASHTAG_INDEX_MIN_POSTS", 20))
+MIN_SUGGESTIONS = 5
+MIN_TAG_POSTS = 2
+
+
+def _normalize_tag(tag: str) -> str:
+    return tag.lstrip("#").strip().lower()
+
+
+class HashtagIndex:
+    """Hashtag frequency, co-occurrence and mean engagement rate across analyzed posts."""
+
+    def __init__(self, history: MetricsHistory = metrics_history):
+        self.history = history
+        self._lock = threading.RLock()
+        self._built = False
+        self._ids: Dict[str, int] = {}
+        self._tags: List[str] = []
+        self._freq = np.zeros(64, dtype=np.int32)
+        self._er_sum = np.zeros(64, dtype=np.float64)
+        self._cooc: Dict[int, Dict[int, int]] = defaultdict(dict)
+        self._posts: Dict[str, Tuple[Tuple[int, ...], float]] = {}
+
+    # ----- building -----
+
+    def _tag_id(self, tag: str) -> int:
+        if tag not in self._ids:
+            if len(self._tags) == len(self._freq):
+                self._freq = np.concatenate([self._freq, np.zeros_like(self._freq)])
+                self._er_sum = np.concatenate([self._er_sum, np.zeros_like(self._er_sum)])
+            self._ids[tag] = len(self._tags)
+            self._tags.append(tag)
+        return self._ids[tag]
+
+    def _apply(self, tag_ids: Tuple[int, ...], engagement_rate: float, sign: int) -> None:
+        ids = np.asarray(tag_ids, dtype=np.int64)
+        self._freq[ids] += sign
+        self._er_sum[ids] += sign * engagement_rate
+        for a in tag_ids:
+            neighbours = self._cooc[a]
+            for b in tag_ids:
+                if a != b:
+                    neighbours[b] = neighbours.get(b, 0) + sign
+                    if neighbours[b] <= 0:
+                        del neighbours[b]
+
+    def _add_post(self, shortcode: str, tags: Iterable[str], engagement_rate: float) -> None:
+        # Caller holds the lock
+        tag_ids = tuple(sorted({self._tag_id(t) for t in (_normalize_tag(t) for t in tags) if t}))
+        previous = self._posts.pop(shortcode, None)
+        if previous is not None:
+            self._apply(previous[0], previous[1], -1)
+        if tag_ids:
+            self._apply(tag_ids, engagement_rate, +1)
+            self._posts[shortcode] = (tag_ids, engagement_rate)
+
+    def _ensure_built(self) -> None:
+        # Caller holds the lock
+        if self._built:
+            return
+        self._built = True
+        latest = self.history.latest_snapshots()
+        for shortcode, tags, engagement_rate in zip(latest["shortcode"], latest["hashtags"], latest["engagement_rate"]):
+            self._add_post(shortcode, tags, float(engagement_rate or 0.0))
+
+    def ingest(self, metrics: Dict[str, Any], engagement_rate: float) -> None:
+        """Add (or replace) one post. Registered as a metrics history listener."""
+        with self._lock:
+            self._ensure_built()
+            self._add_post(metrics.get("shortcode"), metrics.get("hashtags_used", []), engagement_rate)
+
+    # ----- querying -----
+
+    @property
+    def post_count(self) -> int:
+        with self._lock:
+            self._ensure_built()
+            return len(self._posts)
+
+    def tag_stats(self, tag: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._ensure_built()
+            tag_id = self._ids.get(_normalize_tag(tag))
+            if tag_id is None or self._freq[tag_id] <= 0:
+                return None
+            return {
+                "tag": self._tags[tag_id],
+                "posts": int(self._freq[tag_id]),
+                "mean_engagement_rate": round(float(self._er_sum[tag_id] / self._freq[tag_id]), 4)
+            }
+
+    def suggest(self, seed_tags: Iterable[str], k: int = 15, exclude: Iterable[str] = ()) -> List[Dict[str, Any]]:
+        """Tags co-occurring with the seeds, ranked by relatedness x relative engagement.
+
+        relatedness = sum over seeds of P(candidate | seed); engagement is the candidate's
+        mean engagement rate over the index-wide mean.
+        """
+        with self._lock:
+            self._ensure_built()
+            seed_ids = [self._ids[t] for t in map(_normalize_tag, seed_tags) if t in self._ids]
+            skip = set(seed_ids) | {self._ids[t] for t in map(_normalize_tag, exclude) if t in self._ids}
+
+            relatedness: Dict[int, float] = defaultdict(float)
+            co_counts: Dict[int, int] = defaultdict(int)
+            for seed in seed_ids:
+                seed_freq = max(int(self._freq[seed]), 1)
+                for candidate, count in self._cooc.get(seed, {}).items():
+                    if candidate not in skip:
+                        relatedness[candidate] += count / seed_freq
+                        co_counts[candidate] += count
+            if not relatedness:
+                return []
+
+            ids = np.fromiter(relatedness.keys(), dtype=np.int64)
+            freq = self._freq[ids].astype(np.float64)
+            keep = freq >= MIN_TAG_POSTS
+            ids, freq = ids[keep], freq[keep]
+            if not len(ids):
+                return []
+
+            used = self._freq[: len(self._tags)] > 0
+            global_mean = self._er_sum[: len(self._tags)][used].sum() / max(self._freq[: len(self._tags)][used].sum(), 1)
+            mean_er = self._er_sum[ids] / freq
+            scores = np.array([relatedness[i] for i in ids]) * (mean_er / global_mean if global_mean > 0 else 1.0)
+
+            order = np.argsort(-scores, kind="stable")[:k]
+            return [
+                {
+                    "tag": self._tags[ids[i]],
+                    "score": round(float(scores[i]), 4),
+                    "co_occurrences": int(co_counts[ids[i]]),
+                    "posts": int(freq[i]),
+                    "mean_engagement_rate": round(float(mean_er[i]), 4)
+                }
+                for i in order
+            ]
+
+    def support(self, seed_tags: Iterable[str], exclude_shortcode: Optional[str] = None) -> int:
+        """Indexed posts carrying at least one of the seed tags (the evidence `suggest` ranks from)."""
+        with self._lock:
+            self._ensure_built()
+            seed_ids = {self._ids[t] for t in map(_normalize_tag, seed_tags) if t in self._ids}
+            if not seed_ids:
+                return 0
+            return sum(
+                1 for shortcode, (tag_ids, _) in self._posts.items()
+                if shortcode != exclude_shortcode and not seed_ids.isdisjoint(tag_ids)
+            )
+
+    def has_enough_data(self, support: int, suggestions: List[Dict[str, Any]]) -> bool:
+        """Whether to trust the index for a post: MIN_INDEX_POSTS supporting posts and MIN_SUGGESTIONS tags.
+
+        Gated on the post's own tags, so unrelated accounts in the index never
+        switch the LLM off for a post the index knows nothing about.
+        """
+        return support >= MIN_INDEX_POSTS and len(suggestions) >= MIN_SUGGESTIONS
+
+
+hashtag_index = HashtagIndex()
+metrics_history.add_listener(hashtag_index.ingest)
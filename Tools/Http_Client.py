@@ -0,0 +1,168 @@
+# Tools/Http_Client.py (SHARED RAPIDAPI HTTP CLIENT)
+#
+# One pooled keep-alive session for every RapidAPI call, with:
+# - a token bucket sized to the RapidAPI plan, so batch runs stay under quota
+# - exponential backoff with full jitter on 429/5xx and connection errors
+# - Retry-After support; a 429 pauses the whole bucket, not just one caller
+#
+# Point RAPIDAPI_BASE_URL at a local stub server to exercise it offline.
+
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from Tools.Telemetry import Span, span
+
+RAPIDAPI_HOST = os.getenv("RAPIDAPI_HOST", "instagram-scraper-stable-api.p.rapidapi.com")
+RAPIDAPI_BASE_URL = os.getenv("RAPIDAPI_BASE_URL", f"https://{RAPIDAPI_HOST}")
+RAPIDAPI_KEY = os.getenv("RAPIDAPI_KEY", "53363c208fmsh04bf6e9af78d74cp106543jsna6dd2f3a72fe")
+
+# Plan limits: sustained requests/second and how many may burst at once
+RAPIDAPI_RATE_PER_SECOND = float(os.getenv("RAPIDAPI_RATE_PER_SECOND", 5))
+RAPIDAPI_BURST = int(os.getenv("RAPIDAPI_BURST", 5))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Thread-safe token bucket. `acquire` blocks until a token is available."""
+
+    def __init__(self, rate_per_second: float, capacity: int):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """Take one token, sleeping as needed. Returns the seconds spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                else:
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+    def pause(self, seconds: float) -> None:
+        """Hold every caller for `seconds` (used when the API says to back off) and drain the bucket."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = 0.0
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After is either delta-seconds or an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RapidAPIClient:
+    """Pooled, rate-limited, retrying GET client for the Instagram scraper API."""
+
+    def __init__(
+        self,
+        base_url: str = RAPIDAPI_BASE_URL,
+        api_key: str = RAPIDAPI_KEY,
+        host: str = RAPIDAPI_HOST,
+        rate_per_second: float = RAPIDAPI_RATE_PER_SECOND,
+        burst: int = RAPIDAPI_BURST,
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        timeout: float = 15,
+        pool_size: int = 16
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.bucket = TokenBucket(rate_per_second, burst)
+        self.retries = 0
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "x-rapidapi-key": api_key,
+            "x-rapidapi-host": host
+        })
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: uniform in [0, base * 2^attempt], capped
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def get(self, path: str, params: Optional[Dict[str, Any]] = None, **kwargs) -> requests.Response:
+        """GET `path` relative to the base URL, retrying transient failures.
+
+        The final response is returned as-is (including a last 429/5xx), so callers
+        keep their own status-code handling.
+        """
+        with span("rapidapi.get", path=path) as stage:
+            return self._get(f"{self.base_url}/{path.lstrip('/')}", params, stage, **kwargs)
+
+    def _get(self, url: str, params: Optional[Dict[str, Any]], stage: Span, **kwargs) -> requests.Response:
+        attempt = 0
+        while True:
+            self.bucket.acquire()
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+                self.retries += 1
+                time.sleep(self._backoff(attempt))
+                attempt += 1
+                stage.set(retries=attempt)
+                continue
+
+            if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                # Streamed bodies are left unread for the caller; report the declared size instead
+                size = response.headers.get("Content-Length") if kwargs.get("stream") else len(response.content)
+                stage.set(status_code=response.status_code, retries=attempt, bytes=int(size or 0))
+                return response
+
+            retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+            delay = min(self.backoff_max, retry_after) if retry_after is not None else self._backoff(attempt)
+            response.close()
+            self.retries += 1
+            attempt += 1
+            stage.set(retries=attempt, retry_status_code=response.status_code, retry_delay_s=round(delay, 2))
+            if response.status_code == 429:
+                # Quota hit: hold every caller, the next acquire() waits it out
+                self.bucket.pause(delay)
+            else:
+                time.sleep(delay)
+
+
+rapidapi = RapidAPIClient()
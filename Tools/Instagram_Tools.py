@@ -1,18 +1,148 @@
-from agents import function_tool 
-import requests
-from typing import Dict, Any, List
-import json
-from dotenv import load_dotenv
+from typing import Dict, Any, AsyncIterator, Iterable, List, Optional, Tuple, Union
 import os
-import random as rd
 import re
 from datetime import datetime
-from openai import OpenAI
+from Tools.Clients import openai_client, async_openai_client
+from Tools.Cache_Store import media_cache, llm_cache
+from Tools.Http_Client import rapidapi
+from Tools.Comments import iter_comments, cached_page_fetcher, digest_comments, DEFAULT_MAX_COMMENTS, TOP_COMMENTS_KEPT
+from Tools.Sentiment_Prescorer import SentimentPrescorer
+from Tools.Comment_Clusters import CommentClusterStage, default_embedder
+from Tools.Models import (
+    SentimentAnalysis, HashtagReply, FusedAnalysis, SentimentResult, HashtagSuggestions,
+    ContentReport, PostPerformance, PostingInsights, ContentAnalysis, SentimentInsights,
+    HashtagRecommendations, response_format
+)
+from Tools.Single_Flight import media_flight, llm_flight
+from Tools.Telemetry import Span, span, start_span
+from Tools.Prompt_Budget import PromptBuilder, TokenBudget, count_tokens
+from Tools.Payload_Projection import MEDIA_FIELDS, project_response
+from pydantic import ValidationError
+import asyncio
+import time
 
-load_dotenv()
-os.environ["OPENAI_API_KEY"] = os.getenv("OPENAI_API_KEY")
+client = openai_client()
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# How comments are picked for the LLM: "clusters" (one medoid per embedding cluster) or "stratified"
+COMMENT_SELECTION = os.getenv("COMMENT_SELECTION", "clusters")
+
+# Token budgets per call: the prompt is packed up to prompt_tokens, the reply is capped at reply_tokens
+SENTIMENT_BUDGET = TokenBudget(
+    prompt_tokens=int(os.getenv("SENTIMENT_PROMPT_TOKENS", 900)),
+    reply_tokens=int(os.getenv("SENTIMENT_REPLY_TOKENS", 600))
+)
+HASHTAG_BUDGET = TokenBudget(
+    prompt_tokens=int(os.getenv("HASHTAG_PROMPT_TOKENS", 450)),
+    reply_tokens=int(os.getenv("HASHTAG_REPLY_TOKENS", 500))
+)
+FUSED_BUDGET = TokenBudget(
+    prompt_tokens=int(os.getenv("FUSED_PROMPT_TOKENS", 1100)),
+    reply_tokens=int(os.getenv("FUSED_REPLY_TOKENS", 1000))
+)
+# Longest single comment in a prompt, and the share of the budget comments may claim ahead of the caption
+MAX_COMMENT_TOKENS = 80
+COMMENT_SHARE = 0.6
+
+SENTIMENT_PARAMS = {"model": "gpt-4o-mini", "temperature": 0, "max_tokens": SENTIMENT_BUDGET.reply_tokens}
+HASHTAG_PARAMS = {"model": "gpt-4o-mini", "temperature": 0.7, "max_tokens": HASHTAG_BUDGET.reply_tokens}
+FUSED_PARAMS = {"model": "gpt-4o-mini", "temperature": 0, "max_tokens": FUSED_BUDGET.reply_tokens}
+
+# Structured outputs: replies are validated straight into the Tools.Models reply types
+SENTIMENT_RESPONSE_FORMAT = response_format(SentimentAnalysis)
+HASHTAG_RESPONSE_FORMAT = response_format(HashtagReply)
+FUSED_RESPONSE_FORMAT = response_format(FusedAnalysis)
+
+def _llm_span(request_params: Dict[str, Any]):
+    schema = request_params.get("response_format", {}).get("json_schema", {}).get("name")
+    return span("llm.chat", model=request_params.get("model"), schema=schema)
+
+def _record_usage(stage: Span, request_params: Dict[str, Any], usage: Any) -> None:
+    if usage is not None:
+        stage.add_usage(request_params.get("model", ""), usage.prompt_tokens, usage.completion_tokens)
+
+def _complete(key: str, request_params: Dict[str, Any], stage: Span) -> str:
+    response = client.chat.completions.create(**request_params)
+    _record_usage(stage, request_params, response.usage)
+    content = response.choices[0].message.content
+    llm_cache.put(key, content)
+    return content
+
+async def _complete_async(key: str, request_params: Dict[str, Any], stage: Span) -> str:
+    response = await async_openai_client().chat.completions.create(**request_params)
+    _record_usage(stage, request_params, response.usage)
+    content = response.choices[0].message.content
+    llm_cache.put(key, content)
+    return content
+
+def _chat_completion(**request_params) -> str:
+    """`client.chat.completions.create` memoized through the local LLM cache. Returns the reply text.
+
+    Identical requests already in flight (same prompt hash) are coalesced into one call.
+    """
+    key = llm_cache.make_key(request_params)
+    with _llm_span(request_params) as stage:
+        content = llm_cache.get(key)
+        stage.set(cache_hit=content is not None)
+        if content is None:
+            content = llm_flight.do(key, _complete, key, request_params, stage)
+    return content
+
+async def _chat_completion_async(**request_params) -> str:
+    """Async twin of `_chat_completion`; shares the same cache entries and in-flight calls."""
+    key = llm_cache.make_key(request_params)
+    with _llm_span(request_params) as stage:
+        content = llm_cache.get(key)
+        stage.set(cache_hit=content is not None)
+        if content is None:
+            content = await llm_flight.do_async(key, _complete_async, key, request_params, stage)
+    return content
+
+async def _chat_completion_stream(**request_params) -> AsyncIterator[str]:
+    """Streaming `_chat_completion_async`: yields reply text as it arrives.
+
+    A cache hit, or joining an identical call already in flight, yields the reply whole.
+    """
+    key = llm_cache.make_key(request_params)
+    # Not a `with` block: the span stays open across yields to the consumer
+    stage = start_span("llm.chat", model=request_params.get("model"), streamed=True)
+    content = llm_cache.get(key)
+    stage.set(cache_hit=content is not None)
+    if content is not None:
+        stage.end()
+        yield content
+        return
+    
+    future, leader = llm_flight.claim(key)
+    if not leader:
+        stage.set(coalesced=True)
+        try:
+            content = await asyncio.wrap_future(future)
+        finally:
+            stage.end()
+        yield content
+        return
+    try:
+        parts = []
+        stream = await async_openai_client().chat.completions.create(
+            stream=True, stream_options={"include_usage": True}, **request_params
+        )
+        async for chunk in stream:
+            if getattr(chunk, "usage", None) is not None:
+                _record_usage(stage, request_params, chunk.usage)
+            if chunk.choices and chunk.choices[0].delta.content:
+                if not parts:
+                    stage.set(first_token_ms=stage.duration_ms)
+                parts.append(chunk.choices[0].delta.content)
+                yield parts[-1]
+    except BaseException as e:
+        llm_flight.reject(key, future, e)
+        stage.end(e)
+        raise
+    # Only a complete reply is cached, under the same key as the non-streaming call
+    content = "".join(parts)
+    llm_cache.put(key, content)
+    llm_flight.resolve(key, future, content)
+    stage.end()
 
 # ===== HELPER FUNCTIONS =====
 
@@ -28,7 +158,10 @@ def _convert_timestamp_to_readable(timestamp: int) -> dict:
     if not timestamp:
         return {"error": "No timestamp"}
     
-    dt = datetime.fromtimestamp(timestamp)
+    return _describe_posting_time(datetime.fromtimestamp(timestamp))
+
+def _describe_posting_time(dt: datetime) -> dict:
+    """Posting time insights for a local datetime (the `posting_time` block of the metrics dict)."""
     hour = dt.hour
     day_of_week = dt.strftime('%A')
     
@@ -52,26 +185,44 @@ def _convert_timestamp_to_readable(timestamp: int) -> dict:
         "is_weekend": day_of_week in ['Saturday', 'Sunday']
     }
 
-def _extract_key_metrics(api_response: Dict[str, Any]) -> Dict[str, Any]:
-    """Extract essential metrics including new features."""
+def _extract_key_metrics(
+    api_response: Dict[str, Any],
+    comments: Optional[Iterable[Dict[str, Any]]] = None,
+    top_k: int = TOP_COMMENTS_KEPT
+) -> Dict[str, Any]:
+    """Extract essential metrics including new features.
+
+    `comments` is an optional comment stream (see Tools.Comments.iter_comments);
+    without it only the first page embedded in the payload is used.
+    """
     data = api_response
     
-    # Get random 3 comments
-    top_comments = []
-    edges = data.get("edge_media_to_parent_comment", {}).get("edges", [])
-    num_to_sample = min(3, len(edges))
+    with span("extract_metrics", shortcode=data.get("shortcode"), comment_selection=COMMENT_SELECTION) as stage:
+        return _extract(data, comments, top_k, stage)
+
+def _extract(
+    data: Dict[str, Any],
+    comments: Optional[Iterable[Dict[str, Any]]],
+    top_k: int,
+    stage: Span
+) -> Dict[str, Any]:
+    # Keep the most liked comments (deterministic, so repeated runs hit the LLM cache)
+    if comments is None:
+        comments = iter_comments(data, max_comments=None, fetch_page=None)
+    prescorer = SentimentPrescorer()
+    stages = [prescorer]
+    if COMMENT_SELECTION == "clusters":
+        cluster_stage = CommentClusterStage(default_embedder(client))
+        stages.append(cluster_stage)
+    digest = digest_comments(comments, top_k=top_k, stages=stages)
+    top_comments = digest.top_comments
+    stage.set(comments=digest.total_seen)
     
-    if num_to_sample > 0:
-        sampled_edges = rd.sample(edges, num_to_sample)
-        for edge in sampled_edges:
-            try:
-                top_comments.append({
-                    "text": edge["node"]["text"],
-                    "likes": edge["node"]["edge_liked_by"]["count"],
-                    "username": edge["node"]["owner"]["username"]
-                })
-            except (KeyError, TypeError):
-                continue
+    # Comments that stand in for the whole thread in the LLM prompt
+    if COMMENT_SELECTION == "clusters":
+        representative_comments = cluster_stage.representatives()
+    else:
+        representative_comments = prescorer.stratified_sample()
     
     caption_text = data.get("edge_media_to_caption", {}).get("edges", [{}])[0].get("node", {}).get("text", "")
     timestamp = data.get("taken_at_timestamp")
@@ -91,7 +242,10 @@ def _extract_key_metrics(api_response: Dict[str, Any]) -> Dict[str, Any]:
         "username": data.get("owner", {}).get("username"),
         "followers": data.get("owner", {}).get("edge_followed_by", {}).get("count", 0),
         "top_comments": top_comments,
-        "total_comments_available": len(edges)
+        "total_comments_available": digest.total_seen,
+        "comment_sentiment": prescorer.distribution(),
+        "representative_comments": representative_comments,
+        "fetched_at": data.get("_fetched_at") or time.time()
     }
 
 def _calculate_engagement_rate(metrics: Dict[str, Any]) -> float:
@@ -101,160 +255,258 @@ def _calculate_engagement_rate(metrics: Dict[str, Any]) -> float:
     return round((total_engagement / followers) * 100, 4) if followers > 0 else 0.0
 
 
-# ===== TOOL 1: MAIN SCRAPING =====
-@function_tool
-def analyze_post_metrics(post_shortcode_or_url: str) -> str:
-    """Fetches and processes Instagram data with enhanced metrics. Returns JSON string."""
+def _normalize_shortcode(post_shortcode_or_url: str) -> str:
+    """Reduce a post URL or raw shortcode to the bare shortcode."""
+    shortcode = post_shortcode_or_url
+    if "instagram.com" in post_shortcode_or_url:
+        shortcode = post_shortcode_or_url.split("/p/")[-1].split("/")[0].split("?")[0]
+    return shortcode.strip().rstrip('/')
+
+def _fetch_media_payload(shortcode: str, force_refresh: bool = False) -> Dict[str, Any]:
+    """Fetch the raw get_media_data_v2.php payload for a shortcode. Returns an error dict on failure.
+
+    Served from the on-disk media cache while its metrics are fresh, unless `force_refresh` is set.
+    Concurrent fetches of the same shortcode share one RapidAPI request.
+    """
     try:
-        shortcode = post_shortcode_or_url
-        if "instagram.com" in post_shortcode_or_url:
-            shortcode = post_shortcode_or_url.split("/p/")[-1].split("/")[0].split("?")[0]
-        
-        shortcode = shortcode.strip().rstrip('/')
+        with span("media.fetch", shortcode=shortcode, force_refresh=force_refresh) as stage:
+            if not force_refresh:
+                cached = media_cache.get_payload(shortcode)
+                stage.set(cache_hit=cached is not None)
+                if cached is not None:
+                    return cached
+            
+            return media_flight.do(("payload", shortcode), _download_media_payload, shortcode)
         
-        url = "https://instagram-scraper-stable-api.p.rapidapi.com/get_media_data_v2.php"
+    except Exception as e:
+        return {"error": f"UNEXPECTED_ERROR: {str(e)}"}
+
+def _download_media_payload(shortcode: str) -> Dict[str, Any]:
+    try:
         querystring = {"media_code": shortcode}
-        headers = {
-            "x-rapidapi-key": "53363c208fmsh04bf6e9af78d74cp106543jsna6dd2f3a72fe",
-            "x-rapidapi-host": "instagram-scraper-stable-api.p.rapidapi.com"
-        }
 
-        print(f"[DEBUG] Fetching data for shortcode: {shortcode}")
-        
-        response = requests.get(url, headers=headers, params=querystring, timeout=15)
-        
-        if response.status_code == 403:
-            return json.dumps({"error": "API_FORBIDDEN: RapidAPI key invalid or rate limited."})
-        elif response.status_code == 404:
-            return json.dumps({"error": "POST_NOT_FOUND: Post does not exist or is private."})
-        elif response.status_code == 429:
-            return json.dumps({"error": "RATE_LIMIT: Too many requests. Wait and try again."})
-        
-        response.raise_for_status()
-        api_response = response.json()
+        # Streamed so only the projected fields are ever built (see Tools/Payload_Projection.py);
+        # the with-block hands the connection back to the pool on every exit path
+        with rapidapi.get("get_media_data_v2.php", params=querystring, stream=True) as response:
+            if response.status_code == 403:
+                return {"error": "API_FORBIDDEN: RapidAPI key invalid or rate limited."}
+            elif response.status_code == 404:
+                return {"error": "POST_NOT_FOUND: Post does not exist or is private."}
+            elif response.status_code == 429:
+                return {"error": "RATE_LIMIT: Too many requests. Wait and try again."}
+
+            response.raise_for_status()
+            api_response = project_response(response, MEDIA_FIELDS)
         
         if "error" in api_response:
-            return json.dumps({"error": f"API_ERROR: {api_response['error']}"})
+            return {"error": f"API_ERROR: {api_response['error']}"}
         
         if "shortcode" not in api_response:
-            return json.dumps({"error": "INVALID_RESPONSE: Missing shortcode field."})
-        
-        metrics = _extract_key_metrics(api_response)
+            return {"error": "INVALID_RESPONSE: Missing shortcode field."}
         
-        print(f"[DEBUG] ✅ Successfully extracted metrics for {shortcode}")
-        
-        return json.dumps(metrics)
+        # Remember when this payload was fetched; cached copies keep the original time
+        api_response["_fetched_at"] = time.time()
+        media_cache.put(shortcode, api_response)
+        return api_response
         
     except Exception as e:
-        return json.dumps({"error": f"UNEXPECTED_ERROR: {str(e)}"})
+        return {"error": f"UNEXPECTED_ERROR: {str(e)}"}
 
+def _fetch_post_metrics(
+    post_shortcode_or_url: str,
+    force_refresh: bool = False,
+    max_comments: int = DEFAULT_MAX_COMMENTS,
+    top_k: int = TOP_COMMENTS_KEPT
+) -> Dict[str, Any]:
+    """Fetch a post from RapidAPI and extract its metrics. Returns an error dict on failure.
 
-# ===== TOOL 2: ENGAGEMENT RATE =====
-@function_tool
-def calculate_post_engagement(post_metrics_json: str) -> float:
-    """Calculates Engagement Rate from metrics JSON."""
-    try:
-        metrics_dict = json.loads(post_metrics_json)
-        if 'error' in metrics_dict:
-            return 0.0
-        return _calculate_engagement_rate(metrics_dict) 
-    except Exception:
-        return 0.0
-
-
-# ===== TOOL 3: ADVANCED NLP SENTIMENT ANALYSIS =====
-@function_tool
-def analyze_content_sentiment_nlp(post_metrics_json: str) -> str:
-    """Advanced NLP analysis of caption and comments using AI."""
+    Comment pages beyond the first are streamed up to `max_comments`. Concurrent
+    identical calls share one fetch + extraction, and so the same (read-only) dict.
+    """
+    shortcode = _normalize_shortcode(post_shortcode_or_url)
+    return media_flight.do(
+        ("metrics", shortcode, force_refresh, max_comments, top_k),
+        _scrape_post_metrics, shortcode, force_refresh, max_comments, top_k
+    )
+
+def _scrape_post_metrics(shortcode: str, force_refresh: bool, max_comments: int, top_k: int) -> Dict[str, Any]:
     try:
-        metrics = json.loads(post_metrics_json)
-        if 'error' in metrics:
-            return json.dumps({"error": metrics['error']})
+        api_response = _fetch_media_payload(shortcode, force_refresh=force_refresh)
+        if "error" in api_response:
+            return api_response
         
-        caption = metrics.get("full_caption", metrics.get("caption", ""))
-        comments = metrics.get("top_comments", [])
+        comments = iter_comments(api_response, max_comments=max_comments, fetch_page=cached_page_fetcher(force_refresh))
+        metrics = _extract_key_metrics(api_response, comments=comments, top_k=top_k)
         
-        # Sample up to 5 comments for analysis
-        num_to_analyze = min(len(comments), 5)
-        sampled_comments = rd.sample(comments, num_to_analyze) if num_to_analyze > 0 else []
-        comment_texts = [c["text"] for c in sampled_comments]
+        return metrics
         
-        # Use AI for deep sentiment analysis
-        analysis_prompt = f"""Analyze this Instagram post content:
+    except Exception as e:
+        return {"error": f"UNEXPECTED_ERROR: {str(e)}"}
+
 
-CAPTION: {caption[:400]}
+SENTIMENT_TEMPLATE = """Analyze this Instagram post content:
 
-COMMENTS ({len(comment_texts)} samples):
-{chr(10).join(f"- {c}" for c in comment_texts[:5])}
+CAPTION: {caption}
+{distribution_line}
+COMMENTS ({comment_count} representative samples):
+{comments}
 
-Provide a JSON response with:
+Provide:
 1. overall_sentiment: "positive", "negative", or "neutral"
 2. key_themes: list of 3-5 main topics/themes mentioned
 3. user_frustrations: list of complaints or issues (empty if none)
 4. user_desires: list of requests or wishes (empty if none)
 5. common_emotions: list of emotions detected (e.g., excitement, curiosity, frustration)
-6. engagement_indicators: list of reasons why people are engaging
+6. engagement_indicators: list of reasons why people are engaging"""
 
-Return ONLY valid JSON, no markdown."""
+def _build_sentiment_prompt(metrics: Dict[str, Any], budget: int = SENTIMENT_BUDGET.prompt_tokens) -> Tuple[str, str, List[str]]:
+    """Build the sentiment prompt within `budget` tokens. Returns (prompt, caption, comment_texts).
 
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
+    The caption comes first but leaves room for comments; comments are then
+    packed in rank order until the budget is spent.
+    """
+    caption = metrics.get("full_caption", metrics.get("caption", ""))
+    local_sentiment = metrics.get("comment_sentiment", {})
+    
+    # Cluster medoids or a stratified sample when available, else the most liked comments
+    if metrics.get("representative_comments"):
+        candidates = [
+            f"[{c['cluster_size']} similar] {c['text']}" if c.get("cluster_size") else c["text"]
+            for c in metrics["representative_comments"]
+        ]
+    else:
+        ranked_comments = sorted(metrics.get("top_comments", []), key=lambda c: (-c.get("likes", 0), c["text"]))
+        candidates = [c["text"] for c in ranked_comments]
+    
+    distribution_line = ""
+    if local_sentiment.get("comments_scored"):
+        distribution_line = (
+            f"\nLOCAL SENTIMENT OVER ALL {local_sentiment['comments_scored']} COMMENTS: "
+            f"{local_sentiment['positive_share']:.0%} positive, {local_sentiment['neutral_share']:.0%} neutral, "
+            f"{local_sentiment['negative_share']:.0%} negative\n"
+        )
+    
+    builder = PromptBuilder(budget)
+    builder.reserve_template(SENTIMENT_TEMPLATE.format(
+        caption="", distribution_line=distribution_line, comment_count=len(candidates), comments=""
+    ))
+    comment_reserve = min(PromptBuilder.demand(candidates, MAX_COMMENT_TOKENS), int(builder.remaining * COMMENT_SHARE))
+    caption_text = builder.text(caption, reserve=comment_reserve)
+    comment_texts = builder.items(candidates, max_item_tokens=MAX_COMMENT_TOKENS)
+    
+    analysis_prompt = SENTIMENT_TEMPLATE.format(
+        caption=caption_text,
+        distribution_line=distribution_line,
+        comment_count=len(comment_texts),
+        comments="\n".join(f"- {c}" for c in comment_texts)
+    )
+    
+    return analysis_prompt, caption, comment_texts
+
+def _sentiment_result(
+    caption: str,
+    comment_texts: List[str],
+    sentiment_data: Optional[SentimentAnalysis],
+    local_sentiment: Optional[Dict[str, Any]] = None,
+    error: Optional[str] = None
+) -> SentimentResult:
+    """Combine the AI sentiment block with the basic caption analysis and local comment scores."""
+    return SentimentResult(
+        caption_length=len(caption),
+        caption_has_hashtags="#" in caption,
+        caption_has_emoji=any(ord(c) > 127 for c in caption),
+        caption_has_cta=any(word in caption.lower() for word in ["link", "bio", "shop", "buy", "click", "swipe", "visit", "check", "dm", "follow"]),
+        num_comments_analyzed=len(comment_texts),
+        local_sentiment=local_sentiment or {},
+        ai_sentiment_analysis=sentiment_data,
+        error=error
+    )
+
+def _parse_sentiment_reply(
+    ai_analysis: str,
+    caption: str,
+    comment_texts: List[str],
+    local_sentiment: Optional[Dict[str, Any]]
+) -> SentimentResult:
+    try:
+        sentiment_data = SentimentAnalysis.model_validate_json(ai_analysis)
+    except ValidationError as e:
+        return _sentiment_result(caption, comment_texts, None, local_sentiment, f"AI reply did not match the schema: {e.error_count()} errors")
+    return _sentiment_result(caption, comment_texts, sentiment_data, local_sentiment)
+
+def _analyze_sentiment(metrics: Dict[str, Any]) -> SentimentResult:
+    """Run the AI sentiment analysis on a metrics dict. Failures are reported in `error`."""
+    try:
+        if 'error' in metrics:
+            return SentimentResult(error=metrics['error'])
+        
+        analysis_prompt, caption, comment_texts = _build_sentiment_prompt(metrics)
+        
+        ai_analysis = _chat_completion(
             messages=[{"role": "user", "content": analysis_prompt}],
-            temperature=0,
-            max_tokens=600
+            response_format=SENTIMENT_RESPONSE_FORMAT,
+            **SENTIMENT_PARAMS
         )
         
-        ai_analysis = response.choices[0].message.content.strip()
+        return _parse_sentiment_reply(ai_analysis, caption, comment_texts, metrics.get("comment_sentiment"))
         
-        # Remove markdown code blocks if present
-        ai_analysis = re.sub(r'^```json\s*|\s*```$', '', ai_analysis, flags=re.MULTILINE)
+    except Exception as e:
+        return SentimentResult(error=f"NLP Analysis failed: {str(e)}")
+
+async def _analyze_sentiment_async(metrics: Dict[str, Any]) -> SentimentResult:
+    """Async twin of `_analyze_sentiment`."""
+    try:
+        if 'error' in metrics:
+            return SentimentResult(error=metrics['error'])
         
-        # Parse AI response
-        try:
-            sentiment_data = json.loads(ai_analysis)
-        except json.JSONDecodeError:
-            sentiment_data = {"error": "AI returned invalid JSON"}
+        analysis_prompt, caption, comment_texts = _build_sentiment_prompt(metrics)
         
-        # Combine with basic analysis
-        result = {
-            "caption_length": len(caption),
-            "caption_has_hashtags": "#" in caption,
-            "caption_has_emoji": any(ord(c) > 127 for c in caption),
-            "caption_has_cta": any(word in caption.lower() for word in ["link", "bio", "shop", "buy", "click", "swipe", "visit", "check", "dm", "follow"]),
-            "num_comments_analyzed": len(comment_texts),
-            "ai_sentiment_analysis": sentiment_data
-        }
+        ai_analysis = await _chat_completion_async(
+            messages=[{"role": "user", "content": analysis_prompt}],
+            response_format=SENTIMENT_RESPONSE_FORMAT,
+            **SENTIMENT_PARAMS
+        )
         
-        return json.dumps(result)
+        return _parse_sentiment_reply(ai_analysis, caption, comment_texts, metrics.get("comment_sentiment"))
         
     except Exception as e:
-        return json.dumps({"error": f"NLP Analysis failed: {str(e)}"})
+        return SentimentResult(error=f"NLP Analysis failed: {str(e)}")
 
-
-# ===== TOOL 4: HASHTAG GENERATOR =====
-@function_tool
-def generate_hashtag_suggestions(post_metrics_json: str, sentiment_json: str) -> str:
-    """Generates niche-specific hashtag recommendations using AI."""
+async def _analyze_sentiment_stream(metrics: Dict[str, Any]) -> AsyncIterator[Union[str, SentimentResult]]:
+    """Streaming `_analyze_sentiment_async`: yields reply text chunks, then the final SentimentResult."""
     try:
-        metrics = json.loads(post_metrics_json)
-        sentiment = json.loads(sentiment_json)
-        
         if 'error' in metrics:
-            return json.dumps({"error": metrics['error']})
+            yield SentimentResult(error=metrics['error'])
+            return
         
-        caption = metrics.get("full_caption", metrics.get("caption", ""))
-        existing_hashtags = metrics.get("hashtags_used", [])
-        username = metrics.get("username", "")
+        analysis_prompt, caption, comment_texts = _build_sentiment_prompt(metrics)
         
-        # Get themes from sentiment analysis
-        themes = sentiment.get("ai_sentiment_analysis", {}).get("key_themes", [])
+        parts = []
+        async for delta in _chat_completion_stream(
+            messages=[{"role": "user", "content": analysis_prompt}],
+            response_format=SENTIMENT_RESPONSE_FORMAT,
+            **SENTIMENT_PARAMS
+        ):
+            parts.append(delta)
+            yield delta
         
-        hashtag_prompt = f"""Generate Instagram hashtags for this post:
+        result = _parse_sentiment_reply("".join(parts), caption, comment_texts, metrics.get("comment_sentiment"))
+        
+    except Exception as e:
+        result = SentimentResult(error=f"NLP Analysis failed: {str(e)}")
+    yield result
+
+def _local_sentiment_result(metrics: Dict[str, Any]) -> SentimentResult:
+    """The parts of SentimentResult that need no LLM: caption checks and local comment scores."""
+    _, caption, comment_texts = _build_sentiment_prompt(metrics)
+    return _sentiment_result(caption, comment_texts, None, metrics.get("comment_sentiment"))
+
+
+HASHTAG_TEMPLATE = """Generate Instagram hashtags for this post:
 
 USERNAME: @{username}
-CAPTION: {caption[:300]}
-EXISTING HASHTAGS: {', '.join(f'#{h}' for h in existing_hashtags[:5])}
-CONTENT THEMES: {', '.join(themes[:3])}
+CAPTION: {caption}
+EXISTING HASHTAGS: {existing_hashtags}{themes_line}
 
 Generate 10-15 relevant, high-engagement hashtags:
 - Mix of popular (100k-1M posts) and niche (10k-100k posts)
@@ -262,142 +514,286 @@ Generate 10-15 relevant, high-engagement hashtags:
 - Do NOT repeat existing hashtags
 - Include trending hashtags if relevant
 
-Return JSON with:
+Provide:
 - suggested_hashtags: list of hashtag strings (without #)
-- hashtag_strategy: brief explanation of why these hashtags
+- hashtag_strategy: brief explanation of why these hashtags"""
 
-Return ONLY valid JSON."""
+def _build_hashtag_prompt(metrics: Dict[str, Any], themes: List[str], budget: int = HASHTAG_BUDGET.prompt_tokens) -> str:
+    """Build the hashtag prompt within `budget` tokens. With no themes the caption alone drives the suggestions."""
+    caption = metrics.get("full_caption", metrics.get("caption", ""))
+    existing_hashtags = [f"#{h}" for h in metrics.get("hashtags_used", [])]
+    themes = themes[:3]
+    
+    builder = PromptBuilder(budget)
+    builder.reserve_template(HASHTAG_TEMPLATE.format(
+        username=metrics.get("username", ""),
+        caption="",
+        existing_hashtags="",
+        themes_line="\nCONTENT THEMES: " if themes else ""
+    ))
+    tag_reserve = min(PromptBuilder.demand(existing_hashtags + themes), int(builder.remaining * COMMENT_SHARE))
+    caption_text = builder.text(caption, reserve=tag_reserve)
+    existing_hashtags = builder.items(existing_hashtags)
+    themes = builder.items(themes)
+    
+    return HASHTAG_TEMPLATE.format(
+        username=metrics.get("username", ""),
+        caption=caption_text,
+        existing_hashtags=", ".join(existing_hashtags),
+        themes_line=f"\nCONTENT THEMES: {', '.join(themes)}" if themes else ""
+    )
 
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
+def _parse_hashtag_reply(ai_response: str) -> HashtagSuggestions:
+    try:
+        reply = HashtagReply.model_validate_json(ai_response)
+    except ValidationError as e:
+        return HashtagSuggestions(hashtag_strategy="AI generation failed", error=f"AI reply did not match the schema: {e.error_count()} errors")
+    return HashtagSuggestions(**reply.model_dump())
+
+def _generate_hashtags(metrics: Dict[str, Any], sentiment: SentimentResult) -> HashtagSuggestions:
+    """Generate AI hashtag suggestions for a metrics dict. Failures are reported in `error`."""
+    try:
+        if 'error' in metrics:
+            return HashtagSuggestions(error=metrics['error'])
+        
+        # Get themes from sentiment analysis
+        hashtag_prompt = _build_hashtag_prompt(metrics, sentiment.key_themes)
+
+        ai_response = _chat_completion(
             messages=[{"role": "user", "content": hashtag_prompt}],
-            temperature=0.7,
-            max_tokens=500
+            response_format=HASHTAG_RESPONSE_FORMAT,
+            **HASHTAG_PARAMS
         )
         
-        ai_response = response.choices[0].message.content.strip()
-        ai_response = re.sub(r'^```json\s*|\s*```$', '', ai_response, flags=re.MULTILINE)
-        
-        try:
-            hashtag_data = json.loads(ai_response)
-        except json.JSONDecodeError:
-            hashtag_data = {
-                "suggested_hashtags": [],
-                "hashtag_strategy": "AI generation failed",
-                "error": "Invalid JSON from AI"
-            }
-        
-        return json.dumps(hashtag_data)
+        return _parse_hashtag_reply(ai_response)
         
     except Exception as e:
-        return json.dumps({"error": f"Hashtag generation failed: {str(e)}"})
-
-
-# ===== TOOL 5: ENHANCED RECOMMENDATIONS =====
-@function_tool
-def generate_content_recommendations(
-    post_metrics_json: str, 
-    sentiment_json: str, 
-    hashtag_json: str,
-    engagement_rate: float
-) -> str:
-    """Generates comprehensive content strategy report with all insights."""
+        return HashtagSuggestions(error=f"Hashtag generation failed: {str(e)}")
+
+async def _generate_hashtags_async(metrics: Dict[str, Any], themes: Optional[List[str]] = None) -> HashtagSuggestions:
+    """Async hashtag generation. Themes are optional so it can run alongside sentiment."""
     try:
-        metrics = json.loads(post_metrics_json)
-        sentiment = json.loads(sentiment_json)
-        hashtags = json.loads(hashtag_json)
-        
         if 'error' in metrics:
-            return json.dumps({"error": metrics['error']})
+            return HashtagSuggestions(error=metrics['error'])
         
-        posting_time = metrics.get("posting_time", {})
-        ai_sentiment = sentiment.get("ai_sentiment_analysis", {})
-        
-        # Build comprehensive report
-        report = {
-            "post_performance": {
-                "likes": metrics.get("likes", 0),
-                "comments": metrics.get("comments", 0),
-                "video_views": metrics.get("video_views", 0),
-                "engagement_rate": engagement_rate,
-                "performance_level": "high" if engagement_rate > 5 else "medium" if engagement_rate > 2 else "low"
-            },
-            "posting_insights": {
-                "posted_at": posting_time.get("full_datetime", "Unknown"),
-                "posted_time_period": posting_time.get("time_period", "Unknown"),
-                "posted_day": posting_time.get("day_of_week", "Unknown"),
-                "is_weekend": posting_time.get("is_weekend", False),
-                "optimal_posting_recommendation": ""
-            },
-            "content_analysis": {
-                "media_type": metrics.get("media_type"),
-                "caption_quality": "good" if sentiment.get("caption_has_emoji") and sentiment.get("caption_length", 0) > 50 else "needs_improvement",
-                "has_call_to_action": sentiment.get("caption_has_cta", False),
-                "hashtags_used_count": len(metrics.get("hashtags_used", [])),
-                "hashtags_used": metrics.get("hashtags_used", [])
-            },
-            "sentiment_insights": {
-                "overall_sentiment": ai_sentiment.get("overall_sentiment", "neutral"),
-                "key_themes": ai_sentiment.get("key_themes", []),
-                "user_emotions": ai_sentiment.get("common_emotions", []),
-                "user_frustrations": ai_sentiment.get("user_frustrations", []),
-                "user_desires": ai_sentiment.get("user_desires", []),
-                "engagement_reasons": ai_sentiment.get("engagement_indicators", [])
-            },
-            "hashtag_recommendations": {
-                "suggested_hashtags": hashtags.get("suggested_hashtags", [])[:10],
-                "strategy": hashtags.get("hashtag_strategy", "")
-            },
-            "recommendations": []
-        }
-        
-        # Generate specific recommendations
-        recs = report["recommendations"]
-        
-        # Posting time recommendations
-        hour = posting_time.get("hour", 12)
-        if hour < 6 or hour > 21:
-            recs.append(f"⏰ Post was shared during {posting_time.get('time_period')}. Try posting during peak hours (12-3pm or 7-9pm) for better reach")
-            report["posting_insights"]["optimal_posting_recommendation"] = "Post during afternoon or evening hours"
-        else:
-            recs.append(f"✅ Good posting time ({posting_time.get('time_period')}). Continue posting during this period")
-            report["posting_insights"]["optimal_posting_recommendation"] = f"Continue posting during {posting_time.get('time_period')}"
-        
-        # Engagement recommendations
-        if engagement_rate < 3:
-            recs.append("📊 Engagement rate is low. Increase audience interaction with questions and polls")
-        
-        # Hashtag recommendations
-        if len(metrics.get("hashtags_used", [])) < 5:
-            recs.append(f"#️⃣ Use more hashtags - currently using {len(metrics.get('hashtags_used', []))}. Add 10-15 relevant hashtags")
-        
-        # Content type recommendations
-        if metrics.get("is_video"):
-            views_to_likes_ratio = metrics.get("video_views", 0) / max(metrics.get("likes", 1), 1)
-            if views_to_likes_ratio > 10:
-                recs.append("🎥 Video content has high views but low likes. Add stronger CTA to convert viewers to engagers")
-            else:
-                recs.append("🎥 Video performs well! Create more Reels and video content")
-        
-        # CTA recommendations
-        if not sentiment.get("caption_has_cta"):
-            recs.append("📢 Add clear call-to-action (save this post, share with friends, comment below, link in bio)")
+        hashtag_prompt = _build_hashtag_prompt(metrics, themes or [])
+
+        ai_response = await _chat_completion_async(
+            messages=[{"role": "user", "content": hashtag_prompt}],
+            response_format=HASHTAG_RESPONSE_FORMAT,
+            **HASHTAG_PARAMS
+        )
         
-        # Sentiment-based recommendations
-        if ai_sentiment.get("user_frustrations"):
-            recs.append(f"⚠️ Users mentioned frustrations: {', '.join(ai_sentiment.get('user_frustrations', [])[:2])}. Address these in future content")
+        return _parse_hashtag_reply(ai_response)
         
-        if ai_sentiment.get("user_desires"):
-            recs.append(f"💡 Users want: {', '.join(ai_sentiment.get('user_desires', [])[:2])}. Create content around these topics")
+    except Exception as e:
+        return HashtagSuggestions(error=f"Hashtag generation failed: {str(e)}")
+
+
+# ===== FUSED SENTIMENT + HASHTAGS (SINGLE LLM CALL) =====
+
+FUSED_HASHTAG_TEMPLATE = """
+
+Then, for the "hashtags" block, generate 10-15 relevant, high-engagement hashtags for @{username}:
+- Build them around the key_themes you identified
+- Mix of popular (100k-1M posts) and niche (10k-100k posts)
+- Do NOT repeat existing hashtags: {existing_hashtags}
+- suggested_hashtags without #, plus a brief hashtag_strategy
+
+Put the sentiment fields under "sentiment" and the hashtag fields under "hashtags"."""
+
+def _build_fused_prompt(metrics: Dict[str, Any], budget: int = FUSED_BUDGET.prompt_tokens) -> Tuple[str, str, List[str]]:
+    """One prompt covering both the sentiment block and the hashtag block, within `budget` tokens.
+
+    Existing hashtags are capped at a third of the budget; the sentiment part gets the rest.
+    """
+    builder = PromptBuilder(budget // 3)
+    username = metrics.get("username", "")
+    builder.reserve_template(FUSED_HASHTAG_TEMPLATE.format(username=username, existing_hashtags=""))
+    existing_hashtags = builder.items(f"#{h}" for h in metrics.get("hashtags_used", []))
+    hashtag_part = FUSED_HASHTAG_TEMPLATE.format(username=username, existing_hashtags=", ".join(existing_hashtags))
+    
+    analysis_prompt, caption, comment_texts = _build_sentiment_prompt(metrics, budget - count_tokens(hashtag_part))
+    
+    return analysis_prompt + hashtag_part, caption, comment_texts
+
+async def _analyze_fused_async(metrics: Dict[str, Any]) -> Tuple[SentimentResult, HashtagSuggestions]:
+    """Sentiment and hashtags from a single structured-output request. Returns (sentiment, hashtags)."""
+    try:
+        if 'error' in metrics:
+            return SentimentResult(error=metrics['error']), HashtagSuggestions(error=metrics['error'])
         
-        # Caption recommendations
-        if sentiment.get("caption_length", 0) < 50:
-            recs.append("📝 Write longer, story-driven captions (100-150 words) to increase engagement")
+        fused_prompt, caption, comment_texts = _build_fused_prompt(metrics)
         
-        if len(recs) == 0:
-            recs.append("🎉 Excellent post performance! Maintain this content quality and strategy")
+        ai_response = await _chat_completion_async(
+            messages=[{"role": "user", "content": fused_prompt}],
+            response_format=FUSED_RESPONSE_FORMAT,
+            **FUSED_PARAMS
+        )
         
-        return json.dumps(report, indent=2)
+        fused = FusedAnalysis.model_validate_json(ai_response)
+        sentiment = _sentiment_result(caption, comment_texts, fused.sentiment, metrics.get("comment_sentiment"))
+        return sentiment, HashtagSuggestions(**fused.hashtags.model_dump())
         
     except Exception as e:
-        return json.dumps({"error": f"Report generation failed: {str(e)}"})
\ No newline at end of file
+        error = f"Fused analysis failed: {str(e)}"
+        return SentimentResult(error=error), HashtagSuggestions(error=error)
+
+
+def _build_report(
+    metrics: Dict[str, Any],
+    sentiment: SentimentResult,
+    hashtags: HashtagSuggestions,
+    engagement_rate: float,
+    posting_recommendation: Optional[Dict[str, Any]] = None,
+    benchmark: Optional[Dict[str, Any]] = None
+) -> ContentReport:
+    """Assemble the content strategy report from the pipeline outputs. Raises ValueError for error metrics.
+
+    `posting_recommendation` comes from the account's posting time model
+    (Tools.Posting_Time); without it the fixed hour rules are used.
+    `benchmark` ranks the post within its account (Tools.Comparison); without
+    it the performance level uses fixed engagement thresholds.
+    """
+    if 'error' in metrics:
+        raise ValueError(metrics['error'])
+    
+    with span("report.build", shortcode=metrics.get("shortcode")):
+        return _assemble_report(metrics, sentiment, hashtags, engagement_rate, posting_recommendation, benchmark)
+
+def _sentiment_insights(sentiment: SentimentResult) -> SentimentInsights:
+    ai_sentiment = sentiment.ai_sentiment_analysis or SentimentAnalysis(
+        overall_sentiment="neutral", key_themes=[], user_frustrations=[],
+        user_desires=[], common_emotions=[], engagement_indicators=[]
+    )
+    return SentimentInsights(
+        overall_sentiment=ai_sentiment.overall_sentiment,
+        key_themes=ai_sentiment.key_themes,
+        user_emotions=ai_sentiment.common_emotions,
+        user_frustrations=ai_sentiment.user_frustrations,
+        user_desires=ai_sentiment.user_desires,
+        engagement_reasons=ai_sentiment.engagement_indicators,
+        comment_distribution=sentiment.local_sentiment
+    )
+
+def _hashtag_recommendations(hashtags: HashtagSuggestions) -> HashtagRecommendations:
+    return HashtagRecommendations(
+        suggested_hashtags=hashtags.suggested_hashtags[:10],
+        strategy=hashtags.hashtag_strategy
+    )
+
+def _assemble_report(
+    metrics: Dict[str, Any],
+    sentiment: SentimentResult,
+    hashtags: HashtagSuggestions,
+    engagement_rate: float,
+    posting_recommendation: Optional[Dict[str, Any]],
+    benchmark: Optional[Dict[str, Any]] = None
+) -> ContentReport:
+    posting_time = metrics.get("posting_time", {})
+    
+    # Build comprehensive report
+    report = ContentReport(
+        post_performance=PostPerformance(
+            likes=metrics.get("likes", 0),
+            comments=metrics.get("comments", 0),
+            video_views=metrics.get("video_views", 0),
+            engagement_rate=engagement_rate,
+            performance_level="high" if engagement_rate > 5 else "medium" if engagement_rate > 2 else "low"
+        ),
+        posting_insights=PostingInsights(
+            posted_at=posting_time.get("full_datetime", "Unknown"),
+            posted_time_period=posting_time.get("time_period", "Unknown"),
+            posted_day=posting_time.get("day_of_week", "Unknown"),
+            is_weekend=posting_time.get("is_weekend", False)
+        ),
+        content_analysis=ContentAnalysis(
+            media_type=metrics.get("media_type"),
+            caption_quality="good" if sentiment.caption_has_emoji and sentiment.caption_length > 50 else "needs_improvement",
+            has_call_to_action=sentiment.caption_has_cta,
+            hashtags_used_count=len(metrics.get("hashtags_used", [])),
+            hashtags_used=metrics.get("hashtags_used", [])
+        ),
+        sentiment_insights=_sentiment_insights(sentiment),
+        hashtag_recommendations=_hashtag_recommendations(hashtags)
+    )
+    
+    # Generate specific recommendations
+    recs = report.recommendations
+    insights = report.posting_insights
+    
+    # Performance relative to the account's own posts
+    if benchmark:
+        performance = report.post_performance
+        performance.performance_level = benchmark["performance_level"]
+        performance.performance_basis = "account"
+        performance.engagement_percentile = benchmark["engagement_percentile"]
+        performance.engagement_zscore = benchmark["engagement_zscore"]
+        performance.benchmark_posts = benchmark["based_on_posts"]
+        performance.media_type_benchmarks = benchmark["media_types"]
+    
+    # Posting time recommendations
+    hour = posting_time.get("hour", 12)
+    if posting_recommendation:
+        insights.optimal_posting_recommendation = posting_recommendation["recommendation"]
+        insights.best_slots = posting_recommendation["best_slots"]
+        percentile = posting_recommendation.get("posted_slot_percentile")
+        if percentile is not None and percentile >= 75:
+            recs.append(f"✅ Good posting time ({posting_time.get('time_period')}) - this slot beats {percentile:.0f}% of your audience's hours")
+        else:
+            slots = ", ".join(f"{slot['day']} {slot['hour']:02d}:00" for slot in posting_recommendation["best_slots"])
+            recs.append(f"⏰ Your audience engages most on {slots}. Schedule upcoming posts in these windows")
+    elif hour < 6 or hour > 21:
+        recs.append(f"⏰ Post was shared during {posting_time.get('time_period')}. Try posting during peak hours (12-3pm or 7-9pm) for better reach")
+        insights.optimal_posting_recommendation = "Post during afternoon or evening hours"
+    else:
+        recs.append(f"✅ Good posting time ({posting_time.get('time_period')}). Continue posting during this period")
+        insights.optimal_posting_recommendation = f"Continue posting during {posting_time.get('time_period')}"
+    
+    # Engagement recommendations
+    if benchmark:
+        percentile = benchmark["engagement_percentile"]
+        if benchmark["performance_level"] == "low":
+            recs.append(f"📊 Engagement is in the bottom {percentile:.0f}% of your last {benchmark['based_on_posts']} posts. Increase audience interaction with questions and polls")
+        elif benchmark["performance_level"] == "high":
+            recs.append(f"🚀 This post beats {percentile:.0f}% of your last {benchmark['based_on_posts']} posts. Reuse its format and topic")
+        best_media = benchmark["media_types"][0] if benchmark["media_types"] else None
+        if best_media and len(benchmark["media_types"]) > 1 and best_media["media_type"] != metrics.get("media_type"):
+            recs.append(f"🎬 Your {best_media['media_type']} posts average {best_media['mean_engagement_rate']}% engagement, your best format. Post more of them")
+    elif engagement_rate < 3:
+        recs.append("📊 Engagement rate is low. Increase audience interaction with questions and polls")
+    
+    # Hashtag recommendations
+    if len(metrics.get("hashtags_used", [])) < 5:
+        recs.append(f"#️⃣ Use more hashtags - currently using {len(metrics.get('hashtags_used', []))}. Add 10-15 relevant hashtags")
+    
+    # Content type recommendations
+    if metrics.get("is_video"):
+        views_to_likes_ratio = (metrics.get("video_views") or 0) / max(metrics.get("likes", 1), 1)
+        # Against the account's typical video when known, otherwise a fixed 10 views per like
+        typical_ratio = (benchmark or {}).get("account_median_views_to_likes")
+        if views_to_likes_ratio > (2 * typical_ratio if typical_ratio else 10):
+            recs.append("🎥 Video content has high views but low likes. Add stronger CTA to convert viewers to engagers")
+        else:
+            recs.append("🎥 Video performs well! Create more Reels and video content")
+    
+    # CTA recommendations
+    if not sentiment.caption_has_cta:
+        recs.append("📢 Add clear call-to-action (save this post, share with friends, comment below, link in bio)")
+    
+    # Sentiment-based recommendations
+    sentiment_insights = report.sentiment_insights
+    if sentiment_insights.user_frustrations:
+        recs.append(f"⚠️ Users mentioned frustrations: {', '.join(sentiment_insights.user_frustrations[:2])}. Address these in future content")
+    
+    if sentiment_insights.user_desires:
+        recs.append(f"💡 Users want: {', '.join(sentiment_insights.user_desires[:2])}. Create content around these topics")
+    
+    # Caption recommendations
+    if sentiment.caption_length < 50:
+        recs.append("📝 Write longer, story-driven captions (100-150 words) to increase engagement")
+    
+    if len(recs) == 0:
+        recs.append("🎉 Excellent post performance! Maintain this content quality and strategy")
+    
+    return report
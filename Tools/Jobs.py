@@ -0,0 +1,216 @@
+# Tools/Jobs.py (ANALYSIS JOB QUEUE)
+#
+# Asynchronous job queue behind the headless API (api.py). Submitted posts
+# become jobs on a bounded queue, drained by a fixed pool of workers that share
+# the batch engine's RapidAPI / OpenAI concurrency limits.
+#
+# - Backpressure: `submit` raises QueueFull instead of queueing past `max_queued`.
+# - De-duplication: a post that is already queued or running for the same
+#   options returns the existing job, so concurrent callers share one run.
+
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from Tools.Batch import _process_one, DEFAULT_RAPIDAPI_CONCURRENCY, DEFAULT_OPENAI_CONCURRENCY
+from Tools.Comments import DEFAULT_MAX_COMMENTS
+from Tools.Instagram_Tools import _normalize_shortcode
+from Tools.Pipeline import PostReport, LLM_MODES
+
+DEFAULT_JOB_WORKERS = 8
+DEFAULT_MAX_QUEUED = 200
+DEFAULT_KEEP_FINISHED = 1000
+
+
+class QueueFull(Exception):
+    """Raised when a submission would push the queue past its limit."""
+
+
+@dataclass
+class Job:
+    id: str
+    shortcode: str
+    mode: str = "parallel"
+    analyze: bool = True
+    force_refresh: bool = False
+    status: str = "queued"                    # queued | running | done | failed
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[PostReport] = None
+    _finished: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    @property
+    def key(self) -> Tuple[str, str, bool, bool]:
+        return self.shortcode, self.mode, self.analyze, self.force_refresh
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        data = {
+            "job_id": self.id,
+            "shortcode": self.shortcode,
+            "mode": self.mode,
+            "analyze": self.analyze,
+            "force_refresh": self.force_refresh,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+        if include_result and self.result is not None:
+            data["error"] = self.result.error
+            data["result"] = self.result.to_dict()
+        return data
+
+
+class JobQueue:
+    """Bounded, de-duplicating job queue drained by `workers` async workers."""
+
+    def __init__(
+        self,
+        workers: int = DEFAULT_JOB_WORKERS,
+        max_queued: int = DEFAULT_MAX_QUEUED,
+        rapidapi_concurrency: int = DEFAULT_RAPIDAPI_CONCURRENCY,
+        openai_concurrency: int = DEFAULT_OPENAI_CONCURRENCY,
+        max_comments: int = DEFAULT_MAX_COMMENTS,
+        keep_finished: int = DEFAULT_KEEP_FINISHED
+    ):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.rapidapi_concurrency = rapidapi_concurrency
+        self.openai_concurrency = openai_concurrency
+        self.max_comments = max_comments
+        self.keep_finished = keep_finished
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._in_flight: Dict[Tuple[str, str, bool, bool], Job] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    # ----- lifecycle (call from the serving event loop) -----
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._rapidapi_limit = asyncio.Semaphore(self.rapidapi_concurrency)
+        self._openai_limit = asyncio.Semaphore(self.openai_concurrency)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    # ----- submitting -----
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def submit_many(
+        self,
+        posts: List[str],
+        mode: str = "parallel",
+        analyze: bool = True,
+        force_refresh: bool = False
+    ) -> List[Tuple[Job, bool]]:
+        """Queue one job per post. Returns (job, deduplicated) pairs.
+
+        All-or-nothing: raises QueueFull, queueing nothing, when the new
+        (non-duplicate) jobs do not fit.
+        """
+        if mode not in LLM_MODES:
+            raise ValueError(f"Unknown LLM mode '{mode}', expected one of {LLM_MODES}")
+        if self._queue is None:
+            raise RuntimeError("JobQueue.start() has not been called")
+
+        shortcodes = list(dict.fromkeys(sc for sc in map(_normalize_shortcode, posts) if sc))
+        existing = {sc: self._in_flight.get((sc, mode, analyze, force_refresh)) for sc in shortcodes}
+        new = [sc for sc in shortcodes if existing[sc] is None]
+        if self.queued + len(new) > self.max_queued:
+            raise QueueFull(f"Queue is full ({self.queued}/{self.max_queued} queued, {len(new)} requested)")
+
+        submitted = []
+        for shortcode in shortcodes:
+            if existing[shortcode] is not None:
+                submitted.append((existing[shortcode], True))
+                continue
+            job = Job(id=uuid.uuid4().hex, shortcode=shortcode, mode=mode, analyze=analyze, force_refresh=force_refresh)
+            self._jobs[job.id] = job
+            self._in_flight[job.key] = job
+            self._queue.put_nowait(job)
+            submitted.append((job, False))
+        self._trim()
+        return submitted
+
+    def _trim(self) -> None:
+        """Forget the oldest finished jobs beyond `keep_finished`."""
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[: max(len(finished) - self.keep_finished, 0)]:
+            del self._jobs[job_id]
+
+    # ----- reading results -----
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    async def wait(self, job: Job, timeout: Optional[float] = None) -> Job:
+        """Wait until the job finishes or `timeout` passes; returns the job either way."""
+        try:
+            await asyncio.wait_for(job._finished.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return job
+
+    async def as_completed(self, jobs: List[Job], timeout: Optional[float] = None) -> AsyncIterator[Job]:
+        """Yield jobs as they finish (already finished ones first)."""
+        waiters = {asyncio.ensure_future(job._finished.wait()): job for job in jobs}
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            while waiters:
+                remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+                done, _ = await asyncio.wait(waiters, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    return
+                for waiter in done:
+                    yield waiters.pop(waiter)
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        statuses = [job.status for job in self._jobs.values()]
+        return {
+            "workers": self.workers,
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "running": statuses.count("running"),
+            "done": statuses.count("done"),
+            "failed": statuses.count("failed")
+        }
+
+    # ----- workers -----
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            job.status = "running"
+            job.started_at = time.time()
+            try:
+                job.result = await _process_one(
+                    job.shortcode, self._rapidapi_limit, self._openai_limit,
+                    job.analyze, job.mode, job.force_refresh, self.max_comments
+                )
+            except Exception as e:
+                job.result = PostReport(shortcode=job.shortcode, error=f"UNEXPECTED_ERROR: {str(e)}")
+            finally:
+                job.status = "done" if job.result is not None and job.result.ok else "failed"
+                job.finished_at = time.time()
+                self._in_flight.pop(job.key, None)
+                job._finished.set()
+                self._queue.task_done()
@@ -0,0 +1,188 @@
+# Tools/Metrics_History.py (ACCOUNT-LEVEL METRICS HISTORY)
+#
+# Every successful scrape is kept as a per-post snapshot in SQLite, keyed by
+# shortcode and fetch time. Dashboards read trends from here instead of
+# re-hitting RapidAPI, and `refresh_stale` only re-fetches posts whose latest
+# snapshot is older than the allowed age.
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from Tools.Cache_Store import CACHE_DIR
+from Tools.Instagram_Tools import _fetch_post_metrics, _calculate_engagement_rate
+
+HISTORY_PATH = os.getenv("METRICS_HISTORY_PATH", os.path.join(CACHE_DIR, "metrics_history.sqlite3"))
+DEFAULT_MAX_AGE = int(os.getenv("METRICS_MAX_AGE", 6 * 3600))
+
+SNAPSHOT_COLUMNS = (
+    "shortcode", "fetched_at", "username", "post_id", "likes", "comments", "video_views",
+    "followers", "engagement_rate", "posted_at", "posted_hour", "posted_day", "time_period",
+    "is_weekend", "media_type", "is_video", "hashtags"
+)
+
+
+class MetricsHistory:
+    """Append-only store of per-post metric snapshots."""
+
+    def __init__(self, path: str = HISTORY_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[Dict[str, Any], float], None]] = []
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS snapshots (
+                shortcode TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                username TEXT,
+                post_id TEXT,
+                likes INTEGER,
+                comments INTEGER,
+                video_views INTEGER,
+                followers INTEGER,
+                engagement_rate REAL,
+                posted_at TEXT,
+                posted_hour INTEGER,
+                posted_day TEXT,
+                time_period TEXT,
+                is_weekend INTEGER,
+                media_type TEXT,
+                is_video INTEGER,
+                hashtags TEXT,
+                PRIMARY KEY (shortcode, fetched_at)
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS snapshots_username ON snapshots (username, shortcode)")
+
+    def record_snapshot(self, metrics: Dict[str, Any], engagement_rate: float) -> None:
+        """Store one snapshot. Re-recording the same fetch (e.g. a media cache hit) is a no-op."""
+        posting_time = metrics.get("posting_time", {})
+        row = (
+            metrics.get("shortcode"),
+            metrics.get("fetched_at") or time.time(),
+            metrics.get("username"),
+            metrics.get("post_id"),
+            metrics.get("likes", 0),
+            metrics.get("comments", 0),
+            metrics.get("video_views", 0),
+            metrics.get("followers", 0),
+            engagement_rate,
+            posting_time.get("full_datetime"),
+            posting_time.get("hour"),
+            posting_time.get("day_of_week"),
+            posting_time.get("time_period"),
+            int(bool(posting_time.get("is_weekend", False))),
+            metrics.get("media_type"),
+            int(bool(metrics.get("is_video", False))),
+            json.dumps(metrics.get("hashtags_used", []))
+        )
+        placeholders = ", ".join("?" for _ in SNAPSHOT_COLUMNS)
+        with self._lock:
+            cursor = self._conn.execute(
+                f"INSERT OR IGNORE INTO snapshots ({', '.join(SNAPSHOT_COLUMNS)}) VALUES ({placeholders})",
+                row
+            )
+        if cursor.rowcount:
+            for listener in self._listeners:
+                listener(metrics, engagement_rate)
+
+    def add_listener(self, listener: Callable[[Dict[str, Any], float], None]) -> None:
+        """Call `listener(metrics, engagement_rate)` after every newly stored snapshot."""
+        self._listeners.append(listener)
+
+    def _query(self, sql: str, params: tuple = ()) -> pd.DataFrame:
+        with self._lock:
+            frame = pd.read_sql_query(sql, self._conn, params=params)
+        if "hashtags" in frame:
+            frame["hashtags"] = frame["hashtags"].map(lambda value: json.loads(value) if value else [])
+        return frame
+
+    def timeseries(self, shortcode: str) -> pd.DataFrame:
+        """All snapshots of one post, oldest first, with a datetime `fetched` column for charting."""
+        frame = self._query("SELECT * FROM snapshots WHERE shortcode = ? ORDER BY fetched_at", (shortcode,))
+        frame["fetched"] = pd.to_datetime(frame["fetched_at"], unit="s")
+        return frame
+
+    def account_history(self, username: str) -> pd.DataFrame:
+        """Every snapshot of every stored post for an account."""
+        return self._query("SELECT * FROM snapshots WHERE username = ? ORDER BY fetched_at", (username,))
+
+    def latest_snapshots(self, username: Optional[str] = None, columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """Latest snapshot per post, optionally limited to one account and to some `columns`."""
+        selected = ", ".join(f"s.{column}" for column in columns if column in SNAPSHOT_COLUMNS) if columns else "s.*"
+        if username is None:
+            return self._query(
+                f"SELECT {selected} FROM snapshots s JOIN ("
+                "  SELECT shortcode, MAX(fetched_at) AS fetched_at FROM snapshots GROUP BY shortcode"
+                ") latest USING (shortcode, fetched_at)"
+            )
+        # Filtering inside the subquery lets it use the (username, shortcode) index
+        return self._query(
+            f"SELECT {selected} FROM snapshots s JOIN ("
+            "  SELECT shortcode, MAX(fetched_at) AS fetched_at FROM snapshots WHERE username = ? GROUP BY shortcode"
+            ") latest USING (shortcode, fetched_at)",
+            (username,)
+        )
+
+    def last_fetched(self, shortcodes: Iterable[str]) -> Dict[str, float]:
+        shortcodes = list(shortcodes)
+        if not shortcodes:
+            return {}
+        placeholders = ", ".join("?" for _ in shortcodes)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT shortcode, MAX(fetched_at) FROM snapshots WHERE shortcode IN ({placeholders}) GROUP BY shortcode",
+                tuple(shortcodes)
+            ).fetchall()
+        return dict(rows)
+
+    def stale_shortcodes(self, shortcodes: Iterable[str], max_age: float = DEFAULT_MAX_AGE) -> List[str]:
+        """Shortcodes with no snapshot, or whose latest snapshot is older than `max_age` seconds."""
+        shortcodes = list(shortcodes)
+        last = self.last_fetched(shortcodes)
+        cutoff = time.time() - max_age
+        return [sc for sc in shortcodes if last.get(sc, 0) < cutoff]
+
+    def account_shortcodes(self, username: str) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT shortcode FROM snapshots WHERE username = ?", (username,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def refresh_stale(
+        self,
+        shortcodes: Iterable[str],
+        max_age: float = DEFAULT_MAX_AGE,
+        fetch: Optional[Callable[[str], Dict[str, Any]]] = None
+    ) -> Dict[str, str]:
+        """Re-fetch only the stale posts. Returns {shortcode: "fresh" | "refreshed" | error}.
+
+        `fetch` defaults to a cache-bypassing `_fetch_post_metrics` that skips comment pages.
+        """
+        fetch = fetch or (lambda shortcode: _fetch_post_metrics(shortcode, force_refresh=True, max_comments=0))
+        shortcodes = list(shortcodes)
+        stale = set(self.stale_shortcodes(shortcodes, max_age))
+        status = {}
+        for shortcode in shortcodes:
+            if shortcode not in stale:
+                status[shortcode] = "fresh"
+                continue
+            metrics = fetch(shortcode)
+            if "error" in metrics:
+                status[shortcode] = metrics["error"]
+                continue
+            self.record_snapshot(metrics, _calculate_engagement_rate(metrics))
+            status[shortcode] = "refreshed"
+        return status
+
+
+metrics_history = MetricsHistory()
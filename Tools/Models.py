@@ -0,0 +1,186 @@
+# Tools/Models.py (TYPED PIPELINE OBJECTS)
+#
+# Pydantic models for everything that moves between pipeline stages. The LLM
+# reply models double as structured-output schemas (`response_format`), so the
+# model's answer is validated straight into an object - no code-fence stripping
+# and no "invalid JSON" fallbacks. Stages pass the objects themselves and only
+# serialize at the edges (API responses, stored report artifacts).
+#
+# Metrics keep their dict shape in-process (the history store, listeners and
+# the hashtag index all consume it); PostMetrics describes and validates it.
+
+from typing import Any, Dict, List, Literal, Optional, Type
+
+from pydantic import BaseModel, ConfigDict, Field
+
+SentimentLabel = Literal["positive", "negative", "neutral"]
+
+
+def response_format(model: Type[BaseModel]) -> Dict[str, Any]:
+    """Strict json_schema `response_format` for a chat completion, derived from a reply model."""
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": model.__name__, "strict": True, "schema": model.model_json_schema()}
+    }
+
+
+# ===== LLM REPLIES (strict: every field required, nothing extra) =====
+
+class _Reply(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+
+class SentimentAnalysis(_Reply):
+    overall_sentiment: SentimentLabel
+    key_themes: List[str]
+    user_frustrations: List[str]
+    user_desires: List[str]
+    common_emotions: List[str]
+    engagement_indicators: List[str]
+
+
+class HashtagReply(_Reply):
+    suggested_hashtags: List[str]
+    hashtag_strategy: str
+
+
+class FusedAnalysis(_Reply):
+    sentiment: SentimentAnalysis
+    hashtags: HashtagReply
+
+
+# ===== METRICS =====
+
+class PostingTime(BaseModel):
+    full_datetime: Optional[str] = None
+    date: Optional[str] = None
+    time: Optional[str] = None
+    hour: Optional[int] = None
+    day_of_week: Optional[str] = None
+    time_period: Optional[str] = None
+    is_weekend: bool = False
+
+
+class Comment(BaseModel):
+    """A streamed comment. Selection stages add fields such as cluster_size or sentiment_score."""
+    model_config = ConfigDict(extra="allow")
+
+    id: Optional[str] = None
+    text: str
+    likes: int = 0
+    username: Optional[str] = None
+    created_at: Optional[int] = None
+
+
+class CommentSentiment(BaseModel):
+    comments_scored: int = 0
+    mean_score: float = 0.0
+    positive_share: float = 0.0
+    neutral_share: float = 0.0
+    negative_share: float = 0.0
+
+
+class PostMetrics(BaseModel):
+    """Shape of the metrics dict produced by `_extract_key_metrics` (an error dict also validates)."""
+    model_config = ConfigDict(extra="allow")
+
+    post_id: Optional[str] = None
+    shortcode: Optional[str] = None
+    caption: str = ""
+    full_caption: str = ""
+    hashtags_used: List[str] = Field(default_factory=list)
+    posting_time: PostingTime = Field(default_factory=PostingTime)
+    media_type: Optional[str] = None
+    is_video: bool = False
+    likes: int = 0
+    comments: int = 0
+    video_views: Optional[int] = 0
+    username: Optional[str] = None
+    followers: int = 0
+    top_comments: List[Comment] = Field(default_factory=list)
+    total_comments_available: int = 0
+    comment_sentiment: CommentSentiment = Field(default_factory=CommentSentiment)
+    representative_comments: List[Comment] = Field(default_factory=list)
+    fetched_at: Optional[float] = None
+
+
+# ===== STAGE RESULTS =====
+
+class SentimentResult(BaseModel):
+    caption_length: int = 0
+    caption_has_hashtags: bool = False
+    caption_has_emoji: bool = False
+    caption_has_cta: bool = False
+    num_comments_analyzed: int = 0
+    local_sentiment: CommentSentiment = Field(default_factory=CommentSentiment)
+    ai_sentiment_analysis: Optional[SentimentAnalysis] = None
+    error: Optional[str] = None
+
+    @property
+    def key_themes(self) -> List[str]:
+        return self.ai_sentiment_analysis.key_themes if self.ai_sentiment_analysis else []
+
+
+class HashtagSuggestions(BaseModel):
+    suggested_hashtags: List[str] = Field(default_factory=list)
+    hashtag_strategy: str = ""
+    source: Literal["llm", "local_index"] = "llm"
+    details: List[Dict[str, Any]] = Field(default_factory=list)
+    error: Optional[str] = None
+
+
+# ===== REPORT =====
+
+class PostPerformance(BaseModel):
+    likes: int = 0
+    comments: int = 0
+    video_views: Optional[int] = 0
+    engagement_rate: float = 0.0
+    performance_level: Literal["high", "medium", "low"] = "low"
+    # Set when the level is relative to the account's own posts (Tools.Comparison)
+    performance_basis: Literal["account", "absolute"] = "absolute"
+    engagement_percentile: Optional[float] = None
+    engagement_zscore: Optional[float] = None
+    benchmark_posts: Optional[int] = None
+    media_type_benchmarks: Optional[List[Dict[str, Any]]] = None
+
+
+class PostingInsights(BaseModel):
+    posted_at: str = "Unknown"
+    posted_time_period: str = "Unknown"
+    posted_day: str = "Unknown"
+    is_weekend: bool = False
+    optimal_posting_recommendation: str = ""
+    best_slots: Optional[List[Dict[str, Any]]] = None
+
+
+class ContentAnalysis(BaseModel):
+    media_type: Optional[str] = None
+    caption_quality: Literal["good", "needs_improvement"] = "needs_improvement"
+    has_call_to_action: bool = False
+    hashtags_used_count: int = 0
+    hashtags_used: List[str] = Field(default_factory=list)
+
+
+class SentimentInsights(BaseModel):
+    overall_sentiment: SentimentLabel = "neutral"
+    key_themes: List[str] = Field(default_factory=list)
+    user_emotions: List[str] = Field(default_factory=list)
+    user_frustrations: List[str] = Field(default_factory=list)
+    user_desires: List[str] = Field(default_factory=list)
+    engagement_reasons: List[str] = Field(default_factory=list)
+    comment_distribution: CommentSentiment = Field(default_factory=CommentSentiment)
+
+
+class HashtagRecommendations(BaseModel):
+    suggested_hashtags: List[str] = Field(default_factory=list)
+    strategy: str = ""
+
+
+class ContentReport(BaseModel):
+    post_performance: PostPerformance = Field(default_factory=PostPerformance)
+    posting_insights: PostingInsights = Field(default_factory=PostingInsights)
+    content_analysis: ContentAnalysis = Field(default_factory=ContentAnalysis)
+    sentiment_insights: SentimentInsights = Field(default_factory=SentimentInsights)
+    hashtag_recommendations: HashtagRecommendations = Field(default_factory=HashtagRecommendations)
+    recommendations: List[str] = Field(default_factory=list)
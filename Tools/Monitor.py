@@ -0,0 +1,311 @@
+# Tools/Monitor.py (TRACKED POST MONITORING)
+#
+# Watches a set of posts through their first WATCH_HOURS hours. Each post is
+# re-fetched on its own schedule: the poll interval doubles every
+# DOUBLING_HOURS of post age, and backs off further while the numbers have
+# plateaued, so a fresh post is polled every few minutes and a settled one a
+# few times a day.
+#
+# A routine poll is one media request (no comment pages). Every poll is stored
+# as a metrics history snapshot plus its delta against the previous poll. The
+# comment threads and the LLM sentiment analysis are only fetched again once
+# enough new comments have arrived since the last analysis, so RapidAPI and
+# OpenAI usage follows actual change rather than the number of tracked posts.
+#
+# Usage:
+#   python -m Tools.Monitor track DQbefDfDGiU https://instagram.com/p/ABC123/
+#   python -m Tools.Monitor run
+#   python -m Tools.Monitor status
+#   python -m Tools.Monitor deltas DQbefDfDGiU
+
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from Tools.Instagram_Tools import _fetch_post_metrics, _calculate_engagement_rate, _analyze_sentiment, _normalize_shortcode
+from Tools.Metrics_History import HISTORY_PATH, metrics_history, MetricsHistory
+from Tools.Models import SentimentResult
+from Tools.Telemetry import span
+
+WATCH_HOURS = float(os.getenv("MONITOR_WATCH_HOURS", 72))
+MIN_INTERVAL = float(os.getenv("MONITOR_MIN_INTERVAL", 5 * 60))
+MAX_INTERVAL = float(os.getenv("MONITOR_MAX_INTERVAL", 6 * 3600))
+DOUBLING_HOURS = 12.0          # age-based interval doubles every 12 hours of post age
+PLATEAU_GROWTH = 0.01          # likes + comments growing less than 1% per hour
+MIN_NEW_COMMENTS = int(os.getenv("MONITOR_MIN_NEW_COMMENTS", 25))
+NEW_COMMENT_SHARE = 0.2        # ...or 20% more comments than at the last analysis, whichever is larger
+MAX_IDLE_SECONDS = 60
+
+
+def next_interval(age_hours: float, previous_interval: Optional[float], growth: Optional[float]) -> float:
+    """Seconds until the next poll of a post `age_hours` old whose likes + comments grow by `growth` per hour."""
+    interval = MIN_INTERVAL * 2 ** (max(age_hours, 0.0) / DOUBLING_HOURS)
+    if previous_interval and growth is not None and growth < PLATEAU_GROWTH:
+        interval = max(interval, previous_interval * 2)
+    return min(interval, MAX_INTERVAL)
+
+
+def needs_reanalysis(comments: int, analyzed_comments: Optional[int]) -> bool:
+    """True once enough comments arrived since the last sentiment analysis (or there never was one)."""
+    if analyzed_comments is None:
+        return comments > 0
+    return comments - analyzed_comments >= max(MIN_NEW_COMMENTS, NEW_COMMENT_SHARE * analyzed_comments)
+
+
+def _posted_timestamp(metrics: Dict[str, Any]) -> Optional[float]:
+    posted = metrics.get("posting_time", {}).get("full_datetime")
+    if not posted:
+        return None
+    return datetime.strptime(posted, "%Y-%m-%d %H:%M:%S").timestamp()
+
+
+class PostMonitor:
+    """Tracked posts, their poll schedule and the deltas between polls."""
+
+    def __init__(
+        self,
+        history: MetricsHistory = metrics_history,
+        path: str = HISTORY_PATH,
+        fetch: Optional[Callable[[str], Dict[str, Any]]] = None,
+        fetch_comments: Optional[Callable[[str], Dict[str, Any]]] = None,
+        analyze: Callable[[Dict[str, Any]], SentimentResult] = _analyze_sentiment
+    ):
+        self.history = history
+        # A routine poll skips comment pages; re-analysis reads them from the payload the poll just cached
+        self.fetch = fetch or (lambda shortcode: _fetch_post_metrics(shortcode, force_refresh=True, max_comments=0))
+        self.fetch_comments = fetch_comments or (lambda shortcode: _fetch_post_metrics(shortcode))
+        self.analyze = analyze
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS monitored_posts (
+                shortcode TEXT PRIMARY KEY,
+                added_at REAL NOT NULL,
+                status TEXT NOT NULL,
+                posted_at REAL,
+                polls INTEGER NOT NULL DEFAULT 0,
+                next_poll_at REAL NOT NULL,
+                interval_seconds REAL,
+                last_polled_at REAL,
+                likes INTEGER,
+                comments INTEGER,
+                video_views INTEGER,
+                engagement_rate REAL,
+                analyzed_comments INTEGER,
+                analyzed_at REAL,
+                sentiment TEXT,
+                error TEXT
+            )"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS metric_deltas (
+                shortcode TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                age_hours REAL,
+                elapsed_seconds REAL,
+                likes INTEGER,
+                comments INTEGER,
+                video_views INTEGER,
+                engagement_rate REAL,
+                likes_per_hour REAL,
+                comments_per_hour REAL,
+                reanalyzed INTEGER,
+                PRIMARY KEY (shortcode, fetched_at)
+            )"""
+        )
+
+    def track(self, posts: Iterable[str], now: Optional[float] = None) -> List[str]:
+        """Start watching posts (shortcodes or URLs); each is polled right away. Returns the newly added shortcodes."""
+        now = now or time.time()
+        added = []
+        with self._lock:
+            for post in posts:
+                shortcode = _normalize_shortcode(post)
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO monitored_posts (shortcode, added_at, status, next_poll_at) VALUES (?, ?, 'active', ?)",
+                    (shortcode, now, now)
+                )
+                if cursor.rowcount:
+                    added.append(shortcode)
+        return added
+
+    def untrack(self, shortcode: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM monitored_posts WHERE shortcode = ?", (shortcode,))
+
+    def tracked(self) -> pd.DataFrame:
+        """Every tracked post with its schedule and last seen metrics."""
+        with self._lock:
+            return pd.read_sql_query(
+                "SELECT * FROM monitored_posts ORDER BY status, next_poll_at", self._conn
+            ).drop(columns="sentiment")
+
+    def sentiment(self, shortcode: str) -> Optional[SentimentResult]:
+        """The latest sentiment analysis of a tracked post."""
+        with self._lock:
+            row = self._conn.execute("SELECT sentiment FROM monitored_posts WHERE shortcode = ?", (shortcode,)).fetchone()
+        return SentimentResult.model_validate_json(row[0]) if row and row[0] else None
+
+    def deltas(self, shortcode: str) -> pd.DataFrame:
+        """Change between consecutive polls of a post, oldest first."""
+        with self._lock:
+            frame = pd.read_sql_query(
+                "SELECT * FROM metric_deltas WHERE shortcode = ? ORDER BY fetched_at", self._conn, params=(shortcode,)
+            )
+        frame["fetched"] = pd.to_datetime(frame["fetched_at"], unit="s")
+        return frame
+
+    def due(self, now: Optional[float] = None) -> List[str]:
+        now = now or time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT shortcode FROM monitored_posts WHERE status = 'active' AND next_poll_at <= ? ORDER BY next_poll_at",
+                (now,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def next_due(self) -> Optional[float]:
+        with self._lock:
+            row = self._conn.execute("SELECT MIN(next_poll_at) FROM monitored_posts WHERE status = 'active'").fetchone()
+        return row[0]
+
+    def _state(self, shortcode: str) -> Dict[str, Any]:
+        with self._lock:
+            cursor = self._conn.execute("SELECT * FROM monitored_posts WHERE shortcode = ?", (shortcode,))
+            row = cursor.fetchone()
+            return dict(zip([column[0] for column in cursor.description], row)) if row else {}
+
+    def _update(self, shortcode: str, **values) -> None:
+        assignments = ", ".join(f"{column} = ?" for column in values)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE monitored_posts SET {assignments} WHERE shortcode = ?", (*values.values(), shortcode)
+            )
+
+    def poll(self, shortcode: str, now: Optional[float] = None) -> Dict[str, Any]:
+        """Re-fetch one tracked post, store its delta, and re-analyze sentiment if enough comments arrived."""
+        now = now or time.time()
+        state = self._state(shortcode)
+        with span("monitor.poll", shortcode=shortcode, poll=state.get("polls", 0)) as stage:
+            metrics = self.fetch(shortcode)
+            if "error" in metrics:
+                # Keep the schedule; a failing post is retried at its current interval
+                interval = state.get("interval_seconds") or MIN_INTERVAL
+                self._update(shortcode, error=metrics["error"], last_polled_at=now, next_poll_at=now + interval)
+                stage.set(error=metrics["error"])
+                return {"shortcode": shortcode, "error": metrics["error"]}
+
+            engagement_rate = _calculate_engagement_rate(metrics)
+            self.history.record_snapshot(metrics, engagement_rate)
+            fetched_at = metrics.get("fetched_at") or now
+            posted_at = _posted_timestamp(metrics) or state["added_at"]
+            age_hours = (fetched_at - posted_at) / 3600
+            likes, comments, video_views = metrics.get("likes", 0), metrics.get("comments", 0), metrics.get("video_views") or 0
+
+            growth = None
+            if state.get("last_polled_at") is not None and state.get("likes") is not None:
+                elapsed = max(fetched_at - state["last_polled_at"], 1.0)
+                delta_likes, delta_comments = likes - state["likes"], comments - state["comments"]
+                growth = (delta_likes + delta_comments) / max(state["likes"] + state["comments"], 1) * 3600 / elapsed
+
+            reanalyzed = False
+            sentiment_values: Dict[str, Any] = {}
+            if needs_reanalysis(comments, state.get("analyzed_comments")):
+                sentiment = self.analyze(self.fetch_comments(shortcode))
+                if sentiment.error:
+                    stage.set(sentiment_error=sentiment.error)
+                else:
+                    reanalyzed = True
+                    sentiment_values = {
+                        "analyzed_comments": comments,
+                        "analyzed_at": now,
+                        "sentiment": sentiment.model_dump_json(exclude_none=True)
+                    }
+
+            if growth is not None:
+                with self._lock:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO metric_deltas VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (
+                            shortcode, fetched_at, round(age_hours, 3), round(elapsed, 1), delta_likes, delta_comments,
+                            video_views - (state["video_views"] or 0),
+                            round(engagement_rate - (state["engagement_rate"] or 0), 4),
+                            round(delta_likes * 3600 / elapsed, 2), round(delta_comments * 3600 / elapsed, 2),
+                            int(reanalyzed)
+                        )
+                    )
+
+            interval = next_interval(age_hours, state.get("interval_seconds"), growth)
+            # The last poll lands on the watch boundary instead of stopping up to an interval short of it
+            status = "done" if age_hours >= WATCH_HOURS else "active"
+            next_poll_at = max(min(now + interval, posted_at + WATCH_HOURS * 3600), now)
+            self._update(
+                shortcode,
+                status=status, posted_at=posted_at, polls=state.get("polls", 0) + 1,
+                next_poll_at=next_poll_at, interval_seconds=interval, last_polled_at=fetched_at,
+                likes=likes, comments=comments, video_views=video_views, engagement_rate=engagement_rate,
+                error=None, **sentiment_values
+            )
+            stage.set(age_hours=round(age_hours, 2), interval=round(interval), reanalyzed=reanalyzed, status=status)
+            return {
+                "shortcode": shortcode, "status": status, "age_hours": round(age_hours, 2), "growth": growth,
+                "next_poll_in": round(next_poll_at - now), "reanalyzed": reanalyzed
+            }
+
+    def run_once(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Poll every post that is due."""
+        return [self.poll(shortcode, now) for shortcode in self.due(now)]
+
+    def run(self, stop: Optional[threading.Event] = None, exit_when_done: bool = False) -> None:
+        """Poll due posts until `stop` is set, sleeping until the next post is due."""
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            for result in self.run_once():
+                print(f"[MONITOR] {result}", flush=True)
+            next_due = self.next_due()
+            if next_due is None and exit_when_done:
+                return
+            wait = MAX_IDLE_SECONDS if next_due is None else next_due - time.time()
+            stop.wait(min(max(wait, 0.0), MAX_IDLE_SECONDS))
+
+
+post_monitor = PostMonitor()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch posts through their first hours and track engagement changes.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    track = commands.add_parser("track", help="start watching posts")
+    track.add_argument("posts", nargs="+", help="shortcodes or post URLs")
+    untrack = commands.add_parser("untrack", help="stop watching a post")
+    untrack.add_argument("shortcode")
+    run = commands.add_parser("run", help="poll tracked posts until interrupted")
+    run.add_argument("--exit-when-done", action="store_true", help="stop once no post is still being watched")
+    commands.add_parser("status", help="list tracked posts")
+    deltas = commands.add_parser("deltas", help="show the changes between polls of a post")
+    deltas.add_argument("shortcode")
+    args = parser.parse_args()
+
+    if args.command == "track":
+        print(f"Tracking {len(post_monitor.track(args.posts))} new posts")
+    elif args.command == "untrack":
+        post_monitor.untrack(_normalize_shortcode(args.shortcode))
+    elif args.command == "run":
+        try:
+            post_monitor.run(exit_when_done=args.exit_when_done)
+        except KeyboardInterrupt:
+            pass
+    elif args.command == "status":
+        print(post_monitor.tracked().to_string(index=False))
+    else:
+        print(post_monitor.deltas(_normalize_shortcode(args.shortcode)).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+# Tools/Payload_Projection.py (RAPIDAPI PAYLOAD PROJECTION)
+#
+# get_media_data_v2.php returns far more than the pipeline reads: image
+# variants, related media, and per-comment profile data. Instead of decoding
+# the whole body and carrying it around (and into the media cache), responses
+# are projected onto a fixed field tree as they are parsed. Only the fields
+# below survive, in the payload's original nesting, so downstream code
+# (Tools.Comments, _extract_key_metrics, MediaCache) is unchanged.
+#
+# With ijson's yajl2_c backend (shipped in its binary wheels, listed in
+# requirements.txt) the body is parsed incrementally from the socket and
+# anything outside the tree is skipped without being built. That lowers the
+# peak but does not make it flat: ijson still buffers and yields every event,
+# so peak memory keeps growing with the payload (3.1 MiB body: 11.3 MB vs
+# 15.4 MB for a full decode). It also costs CPU (185 ms vs 111 ms for json's C
+# decoder on the same body). What it buys is a much smaller object to keep and
+# cache: every later media cache read decodes the projection only. Without
+# ijson the body is decoded with json and projected afterwards.
+
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import requests
+
+try:
+    import ijson
+    if ijson.backend != "yajl2_c":
+        # The pure-Python backends are several times slower than json + projection
+        ijson = None
+except ImportError:
+    ijson = None
+
+# Leaf = None (copy the value as-is); "item" = every element of a list
+_COMMENT_NODE = {
+    "id": None,
+    "text": None,
+    "created_at": None,
+    "edge_liked_by": {"count": None},
+    "owner": {"username": None}
+}
+_COMMENT_CONNECTION = {
+    "count": None,
+    "page_info": {"has_next_page": None, "end_cursor": None},
+    "edges": {"item": {"node": _COMMENT_NODE}}
+}
+
+MEDIA_FIELDS: Dict[str, Any] = {
+    "error": None,
+    "id": None,
+    "shortcode": None,
+    "taken_at_timestamp": None,
+    "product_type": None,
+    "is_video": None,
+    "video_view_count": None,
+    "edge_media_preview_like": {"count": None},
+    "edge_media_to_caption": {"edges": {"item": {"node": {"text": None}}}},
+    "owner": {"username": None, "edge_followed_by": {"count": None}},
+    "edge_media_to_parent_comment": _COMMENT_CONNECTION
+}
+
+# get_post_comments.php pages: the connection at the top level or under "data" (see Tools.Comments)
+_CONNECTIONS = {"edge_media_to_parent_comment": _COMMENT_CONNECTION, "edge_media_to_comment": _COMMENT_CONNECTION}
+COMMENT_PAGE_FIELDS: Dict[str, Any] = {"error": None, **_CONNECTIONS, "data": _CONNECTIONS}
+
+_SCALAR_EVENTS = {"null", "boolean", "integer", "double", "number", "string"}
+
+
+def project(value: Any, fields: Optional[Dict[str, Any]]) -> Any:
+    """Project an already-decoded payload onto `fields`."""
+    if fields is None:
+        return value
+    if isinstance(value, list) and "item" in fields:
+        return [project(item, fields["item"]) for item in value]
+    if isinstance(value, dict):
+        return {key: project(value[key], sub) for key, sub in fields.items() if key in value}
+    return value
+
+
+def _prefixes(fields: Dict[str, Any], parent: str = "") -> Dict[str, bool]:
+    """ijson prefix -> is_leaf for every node of the field tree (ijson also names list elements "item")."""
+    paths: Dict[str, bool] = {}
+    for key, sub in fields.items():
+        path = f"{parent}.{key}" if parent else key
+        paths[path] = sub is None
+        if sub is not None:
+            paths.update(_prefixes(sub, path))
+    return paths
+
+
+def _build(events: Iterator[Tuple[str, str, Any]], event: str, value: Any) -> Any:
+    """The whole container that starts with `event`, consumed from `events`."""
+    builder = ijson.ObjectBuilder()
+    builder.event(event, value)
+    depth = 1
+    for _, event, value in events:
+        builder.event(event, value)
+        if event == "start_map" or event == "start_array":
+            depth += 1
+        elif event == "end_map" or event == "end_array":
+            depth -= 1
+            if depth == 0:
+                break
+    return builder.value
+
+
+def _attach(parent: Any, prefix: str, value: Any) -> None:
+    if type(parent) is list:
+        parent.append(value)
+    else:
+        parent[prefix.rpartition(".")[2]] = value
+
+
+def project_events(events: Iterable[Tuple[str, str, Any]], fields: Dict[str, Any]) -> Any:
+    """Build the projection of `fields` from an ijson.parse event stream, skipping everything else."""
+    is_leaf = _prefixes(fields)
+    is_leaf[""] = False
+    lookup = is_leaf.get
+    events = iter(events)
+    root: Any = None
+    stack: List[Any] = []
+
+    for prefix, event, value in events:
+        leaf = lookup(prefix)
+        if leaf is None or event == "map_key":
+            continue
+        if event == "end_map" or event == "end_array":
+            stack.pop()
+            continue
+        if event == "start_map" or event == "start_array":
+            if leaf:
+                # A leaf whose value is a container: keep all of it
+                value = _build(events, event, value)
+            else:
+                container: Any = {} if event == "start_map" else []
+                if stack:
+                    _attach(stack[-1], prefix, container)
+                else:
+                    root = container
+                stack.append(container)
+                continue
+        if stack:
+            _attach(stack[-1], prefix, value)
+        else:
+            root = value
+    return root
+
+
+def project_response(response: requests.Response, fields: Dict[str, Any] = MEDIA_FIELDS) -> Dict[str, Any]:
+    """Parse a JSON response body straight into its projection.
+
+    Pass `stream=True` to the request so the body is still unread; with ijson
+    it is then parsed incrementally from the connection.
+    """
+    if ijson is None or getattr(response, "_content_consumed", True):
+        return project(response.json(), fields)
+    response.raw.decode_content = True
+    try:
+        return project_events(ijson.parse(response.raw, use_float=True), fields)
+    finally:
+        response.close()
+
+
+def project_bytes(body: bytes, fields: Dict[str, Any] = MEDIA_FIELDS) -> Dict[str, Any]:
+    """Projection of an in-memory body (recorded fixtures, cache imports, benchmarks)."""
+    if ijson is None:
+        return project(json.loads(body), fields)
+    return project_events(ijson.parse(body, use_float=True), fields)
@@ -0,0 +1,275 @@
+# Tools/Pipeline.py (DIRECT-CALL PIPELINE)
+#
+# Runs the steps the former Web Scraper + Content Analyzer agents ran, in the
+# same order, but calls the helper logic directly instead of letting a model
+# decide which tool to call next. Only sentiment and hashtags touch the LLM.
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Dict, Any, AsyncIterator, Iterable, Optional, Tuple
+
+from Tools.Instagram_Tools import (
+    _fetch_post_metrics,
+    _calculate_engagement_rate,
+    _analyze_sentiment,
+    _analyze_sentiment_async,
+    _analyze_sentiment_stream,
+    _local_sentiment_result,
+    _generate_hashtags,
+    _generate_hashtags_async,
+    _analyze_fused_async,
+    _build_report,
+    _sentiment_insights,
+    _hashtag_recommendations,
+    _normalize_shortcode
+)
+from Tools.Comments import DEFAULT_MAX_COMMENTS
+from Tools.Models import SentimentResult, HashtagSuggestions, ContentReport
+from Tools.Metrics_History import metrics_history
+from Tools.Posting_Time import posting_time_model
+from Tools.Comparison import benchmark_post
+from Tools.Hashtag_Index import hashtag_index
+from Tools.Report_Artifacts import report_artifacts, ReportArtifact
+from Tools.Telemetry import span, start_span
+
+# Async LLM execution modes:
+#   "sequential" - sentiment, then hashtags seeded with its key_themes (the former agents' order)
+#   "parallel"   - sentiment and a theme-independent hashtag call run concurrently
+#   "fused"      - one structured-output request returns both blocks
+LLM_MODES = ("sequential", "parallel", "fused")
+
+
+@dataclass
+class PostReport:
+    """Typed result of one pipeline run. `error` is set when any step failed.
+
+    Metrics stay in their dict shape (see Tools.Models.PostMetrics); the LLM
+    stages and the report are model objects.
+    """
+    shortcode: str
+    metrics: Dict[str, Any] = field(default_factory=dict)
+    engagement_rate: float = 0.0
+    sentiment: Optional[SentimentResult] = None
+    hashtags: Optional[HashtagSuggestions] = None
+    report: Optional[ContentReport] = None
+    error: Optional[str] = None
+    # Set by _finish_report when the run was stored (see Tools.Report_Artifacts)
+    artifact: Optional[ReportArtifact] = field(default=None, repr=False)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain JSON-ready dict (models dumped) for printing or storage."""
+        return {
+            "shortcode": self.shortcode,
+            "metrics": self.metrics,
+            "engagement_rate": self.engagement_rate,
+            "sentiment": self.sentiment.model_dump(exclude_none=True) if self.sentiment else None,
+            "hashtags": self.hashtags.model_dump(exclude_none=True) if self.hashtags else None,
+            "report": self.report.model_dump(exclude_none=True) if self.report else None,
+            "error": self.error
+        }
+
+
+def scrape_post(
+    post_shortcode_or_url: str,
+    force_refresh: bool = False,
+    max_comments: int = DEFAULT_MAX_COMMENTS
+) -> PostReport:
+    """Step 1: fetch metrics and compute the engagement rate (no LLM).
+
+    Up to `max_comments` comments are streamed across pages; only the most liked are kept.
+    """
+    with span("pipeline.scrape", post=post_shortcode_or_url) as stage:
+        metrics = _fetch_post_metrics(post_shortcode_or_url, force_refresh=force_refresh, max_comments=max_comments)
+        if "error" in metrics:
+            stage.set(error=metrics["error"])
+            return PostReport(shortcode=post_shortcode_or_url, metrics=metrics, error=metrics["error"])
+
+        result = PostReport(
+            shortcode=metrics.get("shortcode") or post_shortcode_or_url,
+            metrics=metrics,
+            engagement_rate=_calculate_engagement_rate(metrics)
+        )
+        metrics_history.record_snapshot(result.metrics, result.engagement_rate)
+        return result
+
+
+def _posting_recommendation(result: PostReport) -> Optional[Dict[str, Any]]:
+    return posting_time_model.recommend(result.metrics.get("username"), result.metrics.get("posting_time", {}))
+
+
+def _account_benchmark(result: PostReport) -> Optional[Dict[str, Any]]:
+    with span("report.benchmark", shortcode=result.shortcode) as stage:
+        benchmark = benchmark_post(result.metrics, result.engagement_rate)
+        stage.set(posts=benchmark["based_on_posts"] if benchmark else 0)
+        return benchmark
+
+
+def preview_report(result: PostReport) -> ContentReport:
+    """Report from whatever stages have finished so far.
+
+    Performance, posting time and content analysis need no LLM, so they are
+    final right after scraping; sentiment and hashtag sections fill in later.
+    """
+    return _build_report(
+        result.metrics,
+        result.sentiment or _local_sentiment_result(result.metrics),
+        result.hashtags or HashtagSuggestions(),
+        result.engagement_rate,
+        _posting_recommendation(result),
+        _account_benchmark(result)
+    )
+
+
+def preview_section(result: PostReport, stage: str) -> Dict[str, Any]:
+    """Just the report section a finished stream stage ("sentiment" or "hashtags") fills in.
+
+    Returned in report-dict shape ({"sentiment_insights": {...}}), so the UI can
+    redraw that section without rebuilding the rest of the preview.
+    """
+    if stage == "sentiment":
+        section = _sentiment_insights(result.sentiment or _local_sentiment_result(result.metrics))
+        return {"sentiment_insights": section.model_dump(exclude_none=True)}
+    if stage == "hashtags":
+        section = _hashtag_recommendations(result.hashtags or HashtagSuggestions())
+        return {"hashtag_recommendations": section.model_dump(exclude_none=True)}
+    raise ValueError(f"No report section for stage '{stage}'")
+
+
+def _finish_report(result: PostReport) -> PostReport:
+    try:
+        result.report = _build_report(
+            result.metrics, result.sentiment, result.hashtags, result.engagement_rate,
+            _posting_recommendation(result), _account_benchmark(result)
+        )
+    except Exception as e:
+        result.error = f"Report generation failed: {str(e)}"
+        return result
+    result.artifact = report_artifacts.put(result.to_dict())
+    return result
+
+
+def load_report(post_shortcode_or_url: str) -> Optional[ReportArtifact]:
+    """The stored report of a previously analyzed post for the current pipeline version and model, if any."""
+    shortcode = _normalize_shortcode(post_shortcode_or_url)
+    with span("report.artifact", shortcode=shortcode) as stage:
+        artifact = report_artifacts.get(shortcode)
+        stage.set(cache_hit=artifact is not None)
+        return artifact
+
+
+def _local_hashtags(metrics: Dict[str, Any], themes: Iterable[str] = ()) -> Optional[HashtagSuggestions]:
+    """Hashtags from the local index, or None when it has too little data (use the LLM)."""
+    existing = metrics.get("hashtags_used", [])
+    seeds = list(existing) + [theme.replace(" ", "") for theme in themes]
+    suggestions = hashtag_index.suggest(seeds, k=15, exclude=existing)
+    support = hashtag_index.support(seeds, exclude_shortcode=metrics.get("shortcode"))
+    if not hashtag_index.has_enough_data(support, suggestions):
+        return None
+    return HashtagSuggestions(
+        suggested_hashtags=[s["tag"] for s in suggestions],
+        hashtag_strategy=(
+            f"Ranked from {support} analyzed posts sharing your tags: tags that appear alongside "
+            f"your current hashtags, weighted by their average engagement rate"
+        ),
+        source="local_index",
+        details=suggestions
+    )
+
+
+def analyze_post(result: PostReport) -> PostReport:
+    """Step 2: sentiment + hashtags (LLM, or the local hashtag index when it has enough data), then the report."""
+    if not result.ok:
+        return result
+
+    with span("pipeline.analyze", shortcode=result.shortcode, mode="sync"):
+        result.sentiment = _analyze_sentiment(result.metrics)
+        result.hashtags = (
+            _local_hashtags(result.metrics, result.sentiment.key_themes)
+            or _generate_hashtags(result.metrics, result.sentiment)
+        )
+        return _finish_report(result)
+
+
+async def analyze_post_async(result: PostReport, mode: str = "parallel") -> PostReport:
+    """Async step 2. See LLM_MODES for how the two LLM steps are scheduled."""
+    if mode not in LLM_MODES:
+        raise ValueError(f"Unknown LLM mode '{mode}', expected one of {LLM_MODES}")
+    if not result.ok:
+        return result
+
+    with span("pipeline.analyze", shortcode=result.shortcode, mode=mode):
+        return await _analyze_post_async(result, mode)
+
+
+async def _analyze_post_async(result: PostReport, mode: str) -> PostReport:
+    local = _local_hashtags(result.metrics) if mode != "sequential" else None
+    if local is not None:
+        # The index covers hashtags, so only sentiment needs the LLM
+        result.sentiment = await _analyze_sentiment_async(result.metrics)
+        result.hashtags = local
+    elif mode == "fused":
+        result.sentiment, result.hashtags = await _analyze_fused_async(result.metrics)
+    elif mode == "parallel":
+        result.sentiment, result.hashtags = await asyncio.gather(
+            _analyze_sentiment_async(result.metrics),
+            _generate_hashtags_async(result.metrics)
+        )
+    else:
+        result.sentiment = await _analyze_sentiment_async(result.metrics)
+        themes = result.sentiment.key_themes
+        result.hashtags = _local_hashtags(result.metrics, themes) or await _generate_hashtags_async(result.metrics, themes)
+    # Benchmark (pandas) and artifact/history writes (SQLite) stay off the shared event loop
+    return await asyncio.to_thread(_finish_report, result)
+
+
+async def analyze_post_stream(result: PostReport) -> AsyncIterator[Tuple[str, Any]]:
+    """Parallel-mode step 2 as a stream of (event, payload) pairs for progressive UIs.
+
+    Events, in order: "sentiment_delta" (reply text chunk, repeated), "sentiment"
+    (SentimentResult), "hashtags" (HashtagSuggestions) and "done" (the PostReport).
+    Hashtags are generated concurrently while the sentiment reply streams.
+    """
+    if not result.ok:
+        yield "done", result
+        return
+
+    # Not a `with` block: the span stays open across yields to the consumer
+    stage = start_span("pipeline.analyze", shortcode=result.shortcode, mode="stream")
+    local = _local_hashtags(result.metrics)
+    hashtag_task = None if local is not None else asyncio.create_task(_generate_hashtags_async(result.metrics))
+    try:
+        async for event in _analyze_sentiment_stream(result.metrics):
+            if isinstance(event, str):
+                yield "sentiment_delta", event
+            else:
+                result.sentiment = event
+        yield "sentiment", result.sentiment
+
+        result.hashtags = local if local is not None else await hashtag_task
+        yield "hashtags", result.hashtags
+    finally:
+        if hashtag_task is not None and not hashtag_task.done():
+            hashtag_task.cancel()
+        stage.end()
+    yield "done", await asyncio.to_thread(_finish_report, result)
+
+
+def run_pipeline(post_shortcode_or_url: str, force_refresh: bool = False) -> PostReport:
+    """Run the full analysis for one post without any agent round-trips."""
+    with span("pipeline.run", post=post_shortcode_or_url):
+        return analyze_post(scrape_post(post_shortcode_or_url, force_refresh=force_refresh))
+
+
+async def run_pipeline_async(
+    post_shortcode_or_url: str,
+    mode: str = "parallel",
+    force_refresh: bool = False
+) -> PostReport:
+    """Async variant of `run_pipeline`; the RapidAPI fetch runs in a worker thread."""
+    with span("pipeline.run", post=post_shortcode_or_url, mode=mode):
+        result = await asyncio.to_thread(scrape_post, post_shortcode_or_url, force_refresh)
+        return await analyze_post_async(result, mode=mode)
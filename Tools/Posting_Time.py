@@ -0,0 +1,168 @@
+# Tools/Posting_Time.py (DATA-DRIVEN OPTIMAL POSTING TIME)
+#
+# Learns when an account's audience engages, from its own post history.
+# Engagement rate is summed per (day_of_week, hour) cell in 7x24 arrays; the
+# table is smoothed across neighbouring hours and shrunk toward the account
+# mean so sparse cells don't produce wild recommendations.
+#
+# The raw sums/counts are cached per account and updated incrementally as new
+# snapshots arrive (a re-scraped post replaces its previous contribution), so
+# nothing is ever recomputed from the full history after the first build.
+
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from Tools.Metrics_History import HISTORY_PATH, metrics_history, MetricsHistory
+
+DAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+MIN_POSTS = int(os.getenv("POSTING_TIME_MIN_POSTS", 8))
+PRIOR_WEIGHT = 2.0                             # pseudo-posts pulling each cell toward the account mean
+HOUR_KERNEL = np.array([0.25, 0.5, 0.25])      # spread each post over hour-1, hour, hour+1
+TOP_SLOTS = 3
+
+
+def _smooth(sums: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Expected engagement rate per (day, hour) cell."""
+    total = counts.sum()
+    mean = sums.sum() / total if total else 0.0
+    # Circular convolution along the hour axis (23:00 neighbours 00:00)
+    smoothed_sums = sum(w * np.roll(sums, shift, axis=1) for w, shift in zip(HOUR_KERNEL, (1, 0, -1)))
+    smoothed_counts = sum(w * np.roll(counts, shift, axis=1) for w, shift in zip(HOUR_KERNEL, (1, 0, -1)))
+    return (smoothed_sums + PRIOR_WEIGHT * mean) / (smoothed_counts + PRIOR_WEIGHT)
+
+
+class PostingTimeModel:
+    """Per-account engagement-by-slot table with incremental updates."""
+
+    def __init__(self, history: MetricsHistory = metrics_history, path: str = HISTORY_PATH):
+        self.history = history
+        self._lock = threading.Lock()
+        self._tables: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        # Each post's current contribution, so a re-scrape can replace it
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS posting_time_posts (
+                username TEXT NOT NULL,
+                shortcode TEXT NOT NULL,
+                day INTEGER NOT NULL,
+                hour INTEGER NOT NULL,
+                engagement_rate REAL NOT NULL,
+                PRIMARY KEY (username, shortcode)
+            )"""
+        )
+
+    def _load(self, username: str) -> Tuple[np.ndarray, np.ndarray]:
+        # Caller holds the lock
+        if username in self._tables:
+            return self._tables[username]
+
+        posts = pd.read_sql_query(
+            "SELECT day, hour, engagement_rate FROM posting_time_posts WHERE username = ?",
+            self._conn, params=(username,)
+        )
+        if posts.empty:
+            posts = self._bootstrap(username)
+
+        sums = np.zeros((7, 24))
+        counts = np.zeros((7, 24))
+        if not posts.empty:
+            grouped = posts.groupby(["day", "hour"])["engagement_rate"].agg(["sum", "count"])
+            days = grouped.index.get_level_values(0).to_numpy()
+            hours = grouped.index.get_level_values(1).to_numpy()
+            sums[days, hours] = grouped["sum"].to_numpy()
+            counts[days, hours] = grouped["count"].to_numpy()
+        self._tables[username] = (sums, counts)
+        return sums, counts
+
+    def _bootstrap(self, username: str) -> pd.DataFrame:
+        """First build for an account: latest snapshot per post from the metrics history."""
+        latest = self.history.latest_snapshots(username)
+        latest = latest.dropna(subset=["posted_day", "posted_hour"])
+        if latest.empty:
+            return pd.DataFrame(columns=["day", "hour", "engagement_rate"])
+
+        posts = pd.DataFrame({
+            "username": username,
+            "shortcode": latest["shortcode"],
+            "day": latest["posted_day"].map({day: i for i, day in enumerate(DAYS)}),
+            "hour": latest["posted_hour"].astype(int),
+            "engagement_rate": latest["engagement_rate"].astype(float)
+        }).dropna(subset=["day"])
+        posts["day"] = posts["day"].astype(int)
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO posting_time_posts VALUES (?, ?, ?, ?, ?)",
+            posts.itertuples(index=False, name=None)
+        )
+        return posts[["day", "hour", "engagement_rate"]]
+
+    def ingest(self, metrics: Dict[str, Any], engagement_rate: float) -> None:
+        """Add (or replace) one post's contribution. Registered as a metrics history listener."""
+        username = metrics.get("username")
+        posting_time = metrics.get("posting_time", {})
+        if not username or posting_time.get("day_of_week") not in DAYS or posting_time.get("hour") is None:
+            return
+        shortcode = metrics.get("shortcode")
+        day, hour = DAYS.index(posting_time["day_of_week"]), int(posting_time["hour"])
+
+        with self._lock:
+            sums, counts = self._load(username)
+            previous = self._conn.execute(
+                "SELECT day, hour, engagement_rate FROM posting_time_posts WHERE username = ? AND shortcode = ?",
+                (username, shortcode)
+            ).fetchone()
+            if previous is not None:
+                sums[previous[0], previous[1]] -= previous[2]
+                counts[previous[0], previous[1]] -= 1
+            sums[day, hour] += engagement_rate
+            counts[day, hour] += 1
+            self._conn.execute(
+                "INSERT OR REPLACE INTO posting_time_posts VALUES (?, ?, ?, ?, ?)",
+                (username, shortcode, day, hour, engagement_rate)
+            )
+
+    def table(self, username: str) -> pd.DataFrame:
+        """Smoothed expected engagement rate, days as rows and hours as columns."""
+        with self._lock:
+            sums, counts = self._load(username)
+            expected = _smooth(sums, counts)
+        return pd.DataFrame(expected, index=list(DAYS), columns=range(24))
+
+    def recommend(self, username: str, posting_time: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Best slots for the account and how the post's own slot ranks. None until MIN_POSTS posts exist."""
+        if not username:
+            return None
+        with self._lock:
+            sums, counts = self._load(username)
+            post_count = int(counts.sum())
+            if post_count < MIN_POSTS:
+                return None
+            expected = _smooth(sums, counts)
+
+        flat = expected.ravel()
+        best = np.argsort(-flat, kind="stable")[:TOP_SLOTS]
+        best_slots = [
+            {"day": DAYS[i // 24], "hour": int(i % 24), "expected_engagement_rate": round(float(flat[i]), 4)}
+            for i in best
+        ]
+
+        posted_percentile = None
+        if posting_time.get("day_of_week") in DAYS and posting_time.get("hour") is not None:
+            posted = expected[DAYS.index(posting_time["day_of_week"]), int(posting_time["hour"])]
+            posted_percentile = round(float((flat < posted).mean() * 100), 1)
+
+        slots_text = ", ".join(f"{slot['day'][:3]} {slot['hour']:02d}:00" for slot in best_slots)
+        return {
+            "based_on_posts": post_count,
+            "best_slots": best_slots,
+            "posted_slot_percentile": posted_percentile,
+            "recommendation": f"Best windows for @{username} (from {post_count} posts): {slots_text}"
+        }
+
+
+posting_time_model = PostingTimeModel()
+metrics_history.add_listener(posting_time_model.ingest)
@@ -0,0 +1,141 @@
+# Tools/Prompt_Budget.py (TOKEN-BUDGETED PROMPT ASSEMBLY)
+#
+# Prompts are packed to a token budget instead of fixed character slices:
+# the fixed instructions are counted first, then caption, comments and
+# hashtags are added in priority order until the budget is spent. Short,
+# emoji-heavy posts no longer waste their slice and long captions are cut at
+# a token boundary, so every call has a predictable input size; the reply
+# side gets a matching max_tokens.
+#
+# Tokens are counted with tiktoken when it is installed, otherwise with a
+# conservative local estimate (it over-counts rather than under-counts).
+
+import math
+import os
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable, List, Optional
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+PROMPT_ENCODING = os.getenv("PROMPT_ENCODING", "o200k_base")
+ELLIPSIS = "…"
+
+_PIECE_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+
+@dataclass(frozen=True)
+class TokenBudget:
+    """Input budget for the assembled prompt and the matching max_tokens for the reply."""
+    prompt_tokens: int
+    reply_tokens: int
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding(PROMPT_ENCODING)
+    except Exception:
+        # Unknown encoding or no way to fetch its ranks: fall back to the estimate
+        return None
+
+
+def _piece_tokens(piece: str) -> int:
+    if piece.isascii():
+        return math.ceil(len(piece) / 4) if piece[0].isalnum() or piece[0] == "_" else 1
+    # Non-Latin letters are about a token each; emoji and other astral symbols take two or more
+    return sum(2 if ord(ch) > 0xFFFF else 1 for ch in piece)
+
+
+def count_tokens(text: str) -> int:
+    """Tokens in `text` for the prompt encoding."""
+    if not text:
+        return 0
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return sum(_piece_tokens(match.group()) for match in _PIECE_RE.finditer(text))
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """`text` cut to at most `max_tokens` tokens (an ellipsis marks the cut)."""
+    if max_tokens <= 0 or not text:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    limit = max_tokens - 1
+    encoding = _encoding()
+    if encoding is not None:
+        return encoding.decode(encoding.encode(text)[:limit]).rstrip() + ELLIPSIS
+
+    used = 0
+    end = 0
+    for match in _PIECE_RE.finditer(text):
+        used += _piece_tokens(match.group())
+        if used > limit:
+            break
+        end = match.end()
+    return text[:end].rstrip() + ELLIPSIS
+
+
+class PromptBuilder:
+    """Packs prompt sections into a token budget, highest priority first.
+
+    Count the fixed template with `reserve_template`, then take sections in
+    priority order with `text` and `items`; each call only uses what is left.
+    """
+
+    # "\n- " (or ", ") between packed items
+    SEPARATOR_TOKENS = 2
+
+    def __init__(self, budget: int):
+        self.budget = budget
+        self.used = 0
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.budget - self.used)
+
+    def reserve_template(self, template: str) -> None:
+        self.used += count_tokens(template)
+
+    def text(self, text: str, max_tokens: Optional[int] = None, reserve: int = 0) -> str:
+        """As much of `text` as fits, leaving `reserve` tokens for lower-priority sections."""
+        limit = self.remaining - reserve
+        if max_tokens is not None:
+            limit = min(limit, max_tokens)
+        fitted = truncate_tokens(text, limit)
+        self.used += count_tokens(fitted)
+        return fitted
+
+    def items(self, items: Iterable[str], max_item_tokens: Optional[int] = None, max_items: Optional[int] = None) -> List[str]:
+        """Items in the given order until the budget runs out; long items are shortened to `max_item_tokens`."""
+        taken = []
+        for item in items:
+            if max_items is not None and len(taken) >= max_items:
+                break
+            if max_item_tokens is not None:
+                item = truncate_tokens(item, max_item_tokens)
+            if not item:
+                continue
+            cost = count_tokens(item) + self.SEPARATOR_TOKENS
+            if cost > self.remaining:
+                break
+            taken.append(item)
+            self.used += cost
+        return taken
+
+    @classmethod
+    def demand(cls, items: Iterable[str], max_item_tokens: Optional[int] = None) -> int:
+        """Tokens `items` would take if all of them fit; used to size reserves."""
+        return sum(
+            count_tokens(truncate_tokens(item, max_item_tokens) if max_item_tokens is not None else item) + cls.SEPARATOR_TOKENS
+            for item in items
+        )
@@ -0,0 +1,174 @@
+# Tools/Report_Artifacts.py (VERSIONED REPORT ARTIFACTS)
+#
+# Finished reports are stored as artifacts keyed by shortcode, pipeline
+# version and LLM model, so a report is computed once and then reused: the UI
+# keeps them in session state across reruns, a previously analyzed post loads
+# straight from disk, and JSON / HTML / CSV exports are rendered from the
+# stored artifact without touching RapidAPI or OpenAI.
+#
+# Bump PIPELINE_VERSION whenever prompts or report logic change; older
+# artifacts then simply stop matching and age out of the cache.
+
+import html
+import io
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+from Tools.Cache_Store import CACHE_DIR, SqliteCache
+from Tools.Instagram_Tools import SENTIMENT_PARAMS
+
+PIPELINE_VERSION = os.getenv("PIPELINE_VERSION", "2026.10")
+REPORT_MODEL = SENTIMENT_PARAMS["model"]
+
+ARTIFACT_CACHE_PATH = os.path.join(CACHE_DIR, "report_artifacts.sqlite3")
+ARTIFACT_TTL = int(os.getenv("REPORT_ARTIFACT_TTL", 24 * 3600))
+ARTIFACT_MAX_BYTES = int(os.getenv("REPORT_ARTIFACT_MAX_BYTES", 64 * 1024 * 1024))
+
+EXPORT_FORMATS = ("json", "html", "csv")
+EXPORT_MIME_TYPES = {"json": "application/json", "html": "text/html", "csv": "text/csv"}
+
+
+def artifact_key(shortcode: str, pipeline_version: str = PIPELINE_VERSION, model: str = REPORT_MODEL) -> str:
+    return f"{shortcode}:{pipeline_version}:{model}"
+
+
+@dataclass
+class ReportArtifact:
+    """One finished pipeline run (PostReport.to_dict()) plus the version it was produced with."""
+    shortcode: str
+    result: Dict[str, Any]
+    pipeline_version: str = PIPELINE_VERSION
+    model: str = REPORT_MODEL
+    created_at: float = 0.0
+
+    @property
+    def key(self) -> str:
+        return artifact_key(self.shortcode, self.pipeline_version, self.model)
+
+    @property
+    def report(self) -> Dict[str, Any]:
+        return self.result.get("report") or {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "shortcode": self.shortcode,
+            "pipeline_version": self.pipeline_version,
+            "model": self.model,
+            "created_at": self.created_at,
+            "result": self.result
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ReportArtifact":
+        return cls(**data)
+
+    def export(self, fmt: str) -> str:
+        """The artifact rendered as one of EXPORT_FORMATS."""
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format '{fmt}', expected one of {EXPORT_FORMATS}")
+        return getattr(self, f"to_{fmt}")()
+
+    def to_json(self) -> str:
+        meta = {key: value for key, value in self.to_dict().items() if key != "result"}
+        return json.dumps({**meta, "report": self.report}, indent=2, ensure_ascii=False)
+
+    def to_csv(self) -> str:
+        """One row: artifact fields, then every report field flattened to section.field (lists joined with '; ')."""
+        fields = {key: value for key, value in self.to_dict().items() if key != "result"}
+        if self.report:
+            flattened = pd.json_normalize(self.report, sep=".").iloc[0]
+            fields.update({name: _csv_value(value) for name, value in flattened.items()})
+        buffer = io.StringIO()
+        pd.DataFrame([fields]).to_csv(buffer, index=False)
+        return buffer.getvalue()
+
+    def to_html(self) -> str:
+        """Standalone HTML page with every report section."""
+        report = self.report
+        sections = []
+        for section, title in _HTML_SECTIONS:
+            fields = report.get(section)
+            if fields:
+                rows = "".join(
+                    f"<tr><th>{html.escape(name.replace('_', ' '))}</th><td>{_html_value(value)}</td></tr>"
+                    for name, value in fields.items()
+                )
+                sections.append(f"<h2>{title}</h2><table>{rows}</table>")
+        if report.get("recommendations"):
+            items = "".join(f"<li>{html.escape(rec)}</li>" for rec in report["recommendations"])
+            sections.append(f"<h2>Recommendations</h2><ol>{items}</ol>")
+
+        created = time.strftime("%Y-%m-%d %H:%M", time.localtime(self.created_at))
+        return (
+            "<!DOCTYPE html><html><head><meta charset=\"utf-8\">"
+            f"<title>Instagram post report: {html.escape(self.shortcode)}</title>"
+            f"<style>{_HTML_STYLE}</style></head><body>"
+            f"<h1>Instagram post report: {html.escape(self.shortcode)}</h1>"
+            f"<p class=\"meta\">Generated {created} &middot; pipeline {html.escape(self.pipeline_version)} "
+            f"&middot; {html.escape(self.model)}</p>"
+            + "".join(sections)
+            + "</body></html>"
+        )
+
+
+_HTML_SECTIONS = (
+    ("post_performance", "Performance"),
+    ("posting_insights", "Posting Time"),
+    ("content_analysis", "Content"),
+    ("sentiment_insights", "Sentiment"),
+    ("hashtag_recommendations", "Hashtags")
+)
+_HTML_STYLE = (
+    "body{font-family:sans-serif;max-width:860px;margin:2em auto;color:#222}"
+    "table{border-collapse:collapse;width:100%}th,td{border-bottom:1px solid #ddd;padding:6px;text-align:left;vertical-align:top}"
+    "th{width:30%;text-transform:capitalize}.meta{color:#777}"
+)
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, list):
+        return "; ".join(json.dumps(item, ensure_ascii=False) if isinstance(item, dict) else str(item) for item in value)
+    return value
+
+
+def _html_value(value: Any) -> str:
+    if isinstance(value, dict):
+        return ", ".join(f"{html.escape(str(k))}: {html.escape(str(v))}" for k, v in value.items())
+    if isinstance(value, list):
+        return "<br>".join(_html_value(item) for item in value)
+    return html.escape(str(value))
+
+
+class ReportArtifactStore:
+    """Report artifacts on disk, keyed by shortcode, pipeline version and model."""
+
+    def __init__(self, path: str = ARTIFACT_CACHE_PATH, ttl: float = ARTIFACT_TTL, max_bytes: int = ARTIFACT_MAX_BYTES):
+        self.ttl = ttl
+        self.store = SqliteCache(path, table="reports", max_bytes=max_bytes)
+
+    def get(
+        self,
+        shortcode: str,
+        pipeline_version: str = PIPELINE_VERSION,
+        model: str = REPORT_MODEL
+    ) -> Optional[ReportArtifact]:
+        data = self.store.get(artifact_key(shortcode, pipeline_version, model), max_age=self.ttl)
+        return ReportArtifact.from_dict(data) if data is not None else None
+
+    def put(self, result: Dict[str, Any]) -> Optional[ReportArtifact]:
+        """Store a finished run (PostReport.to_dict()). Runs without a report, or with failed LLM stages, are not kept."""
+        if result.get("error") or not result.get("report"):
+            return None
+        if any((result.get(stage) or {}).get("error") for stage in ("sentiment", "hashtags")):
+            return None
+        artifact = ReportArtifact(shortcode=result["shortcode"], result=result, created_at=time.time())
+        self.store.set(artifact.key, artifact.to_dict())
+        return artifact
+
+
+report_artifacts = ReportArtifactStore()
@@ -0,0 +1,130 @@
+# Tools/Sentiment_Prescorer.py (LOCAL VECTORIZED SENTIMENT PRE-SCORING)
+#
+# Scores every streamed comment on the CPU with a small lexicon, in batched
+# pandas/NumPy operations, and aggregates the sentiment distribution. Only a
+# small stratified subset (most liked per sentiment class) goes on to the LLM,
+# so the prompt size stays flat no matter how many comments a post has.
+
+import heapq
+import re
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+LABELS = ("positive", "neutral", "negative")
+DEFAULT_SAMPLE_SIZE = 8
+
+# Compound score thresholds (same convention as VADER)
+POSITIVE_THRESHOLD = 0.05
+NEGATIVE_THRESHOLD = -0.05
+
+TOKEN_PATTERN = r"[a-z']+|[\U0001F300-\U0001FAFF☀-➿]"
+
+LEXICON = {
+    # positive
+    "love": 3.0, "loved": 3.0, "loving": 2.5, "amazing": 3.0, "awesome": 3.0, "great": 2.5,
+    "good": 1.5, "nice": 1.5, "beautiful": 2.5, "gorgeous": 2.5, "perfect": 3.0, "best": 2.5,
+    "excellent": 3.0, "fantastic": 3.0, "wonderful": 3.0, "cool": 1.5, "cute": 2.0, "fun": 2.0,
+    "happy": 2.5, "thanks": 1.5, "thank": 1.5, "wow": 2.0, "yes": 1.0, "incredible": 3.0,
+    "brilliant": 3.0, "stunning": 3.0, "lovely": 2.5, "favorite": 2.0, "favourite": 2.0,
+    "inspiring": 2.5, "helpful": 2.0, "useful": 1.5, "recommend": 1.5, "congrats": 2.5,
+    "congratulations": 2.5, "fire": 1.5, "goals": 1.5, "obsessed": 2.0, "need": 0.5,
+    # negative
+    "hate": -3.0, "hated": -3.0, "bad": -2.0, "terrible": -3.0, "awful": -3.0, "worst": -3.0,
+    "ugly": -2.5, "boring": -2.0, "disappointed": -2.5, "disappointing": -2.5, "fake": -2.0,
+    "scam": -3.0, "broken": -2.0, "sad": -2.0, "angry": -2.5, "annoying": -2.0, "poor": -2.0,
+    "expensive": -1.5, "overpriced": -2.0, "waste": -2.5, "never": -1.0, "no": -0.5,
+    "wrong": -2.0, "problem": -1.5, "issue": -1.5, "refund": -2.0, "slow": -1.5, "stop": -1.0,
+    "unfollow": -2.5, "cringe": -2.0, "trash": -3.0, "sucks": -2.5, "fail": -2.0,
+    # emoji
+    "❤": 3.0, "😍": 3.0, "🥰": 3.0, "😊": 2.0, "😁": 2.0, "😂": 1.5, "🤣": 1.5, "🔥": 2.0,
+    "👏": 2.0, "🙌": 2.0, "💯": 2.0, "👍": 1.5, "✨": 1.0, "💕": 2.5, "💖": 2.5, "😀": 2.0,
+    "😢": -2.0, "😭": -1.0, "😡": -3.0, "😠": -2.5, "👎": -2.0, "🤮": -3.0, "😒": -2.0,
+    "🙄": -1.5, "💔": -2.0, "😞": -2.0
+}
+
+_LEXICON_SERIES = pd.Series(LEXICON, dtype="float64")
+
+
+def score_texts(texts: List[str]) -> np.ndarray:
+    """Compound sentiment score in [-1, 1] for each text, computed in one vectorized pass."""
+    if not texts:
+        return np.zeros(0)
+    tokens = pd.Series(texts, dtype="object").str.lower().str.findall(TOKEN_PATTERN).explode()
+    token_scores = tokens.map(_LEXICON_SERIES).fillna(0.0).astype("float64")
+    raw = token_scores.groupby(level=0).sum().reindex(range(len(texts)), fill_value=0.0).to_numpy()
+    return raw / np.sqrt(raw * raw + 15.0)
+
+
+def label_scores(scores: np.ndarray) -> np.ndarray:
+    return np.where(
+        scores >= POSITIVE_THRESHOLD, "positive",
+        np.where(scores <= NEGATIVE_THRESHOLD, "negative", "neutral")
+    )
+
+
+class SentimentPrescorer:
+    """Streaming comment stage (`feed(batch)`): scores every comment and keeps per-class samples.
+
+    Memory is bounded by `keep_per_label` comments per class plus a few counters.
+    """
+
+    def __init__(self, keep_per_label: int = DEFAULT_SAMPLE_SIZE):
+        self.keep_per_label = keep_per_label
+        self.counts = {label: 0 for label in LABELS}
+        self.score_sum = 0.0
+        self.scored = 0
+        self._strata: Dict[str, List] = {label: [] for label in LABELS}
+        self._seq = 0
+
+    def feed(self, batch: List[Dict[str, Any]]) -> None:
+        scores = score_texts([comment["text"] for comment in batch])
+        labels = label_scores(scores)
+        self.scored += len(batch)
+        self.score_sum += float(scores.sum())
+        for label, count in zip(*np.unique(labels, return_counts=True)):
+            self.counts[str(label)] += int(count)
+
+        for comment, score, label in zip(batch, scores, labels):
+            self._seq += 1
+            item = ((comment.get("likes", 0), abs(float(score))), self._seq, {**comment, "sentiment_score": round(float(score), 4)})
+            heap = self._strata[str(label)]
+            if len(heap) < self.keep_per_label:
+                heapq.heappush(heap, item)
+            elif item[0] > heap[0][0]:
+                heapq.heapreplace(heap, item)
+
+    def distribution(self) -> Dict[str, Any]:
+        """Share of comments per class plus the mean compound score."""
+        total = self.scored
+        return {
+            "comments_scored": total,
+            "mean_score": round(self.score_sum / total, 4) if total else 0.0,
+            **{f"{label}_share": round(self.counts[label] / total, 4) if total else 0.0 for label in LABELS}
+        }
+
+    def stratified_sample(self, size: int = DEFAULT_SAMPLE_SIZE) -> List[Dict[str, Any]]:
+        """Pick `size` comments, allocated to classes by their share (each non-empty class gets one)."""
+        present = [label for label in LABELS if self.counts[label] > 0]
+        if not present or size <= 0:
+            return []
+
+        quotas = {label: 1 for label in present}
+        remaining = size - len(quotas)
+        if remaining > 0:
+            shares = np.array([self.counts[label] for label in present], dtype="float64")
+            extra = np.floor(shares / shares.sum() * remaining).astype(int)
+            # Hand out rounding leftovers to the largest classes
+            for i in np.argsort(-shares)[: remaining - int(extra.sum())]:
+                extra[i] += 1
+            for label, n in zip(present, extra):
+                quotas[label] += int(n)
+
+        sample = []
+        for label in present:
+            ranked = sorted(self._strata[label], key=lambda item: (-item[0][0], -item[0][1], item[1]))
+            sample.extend(
+                {**comment, "sentiment_label": label} for _, _, comment in ranked[: quotas[label]]
+            )
+        return sample[:size]
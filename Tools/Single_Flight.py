@@ -0,0 +1,89 @@
+# Tools/Single_Flight.py (IN-FLIGHT REQUEST COALESCING)
+#
+# Concurrent calls with the same key share one execution: the first caller
+# (the leader) does the work, everyone who arrives while it runs waits for the
+# same result. A burst of N identical requests costs one upstream call.
+#
+# Futures are concurrent.futures.Future, so sync callers (threads) and async
+# callers (any event loop) can join the same flight. The leader's work is
+# shielded: if the leader is cancelled, followers still get the result.
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    """Per-key call coalescing for sync and async callers."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, Future] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def claim(self, key: Hashable) -> Tuple[Future, bool]:
+        """Join the flight for `key`, or start one. Returns (future, is_leader).
+
+        A leader must finish the flight with `resolve` or `reject`.
+        """
+        with self._lock:
+            future = self._flights.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = Future()
+            self._flights[key] = future
+            self.leaders += 1
+            return future, True
+
+    def resolve(self, key: Hashable, future: Future, result: Any) -> None:
+        with self._lock:
+            self._flights.pop(key, None)
+        future.set_result(result)
+
+    def reject(self, key: Hashable, future: Future, error: BaseException) -> None:
+        with self._lock:
+            self._flights.pop(key, None)
+        future.set_exception(error)
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Call `fn(*args, **kwargs)` unless a call for `key` is already running; then wait for its result."""
+        future, leader = self.claim(key)
+        if not leader:
+            return future.result()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self.reject(key, future, e)
+            raise
+        self.resolve(key, future, result)
+        return result
+
+    async def do_async(self, key: Hashable, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """Async twin of `do`. Joins flights started by sync callers too."""
+        future, leader = self.claim(key)
+        if leader:
+            task = asyncio.ensure_future(fn(*args, **kwargs))
+
+            def settle(task: asyncio.Task) -> None:
+                if task.cancelled():
+                    self.reject(key, future, asyncio.CancelledError())
+                elif task.exception() is not None:
+                    self.reject(key, future, task.exception())
+                else:
+                    self.resolve(key, future, task.result())
+
+            task.add_done_callback(settle)
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            in_flight = len(self._flights)
+        return {"leaders": self.leaders, "coalesced": self.coalesced, "in_flight": in_flight}
+
+
+media_flight = SingleFlight("media")
+llm_flight = SingleFlight("llm")
@@ -0,0 +1,213 @@
+# Tools/Telemetry.py (STAGE TIMING, TOKENS AND COST)
+#
+# Lightweight tracing for the pipeline: every stage (RapidAPI fetch, metric
+# extraction, each LLM call, report assembly) records a span
+# with its duration plus whatever the stage knows - token usage, estimated
+# cost, cache hits, retries.
+#
+# Spans nest through contextvars (so they follow asyncio tasks and
+# asyncio.to_thread), are kept in a small in-memory ring for the Streamlit
+# debug panel and are appended to a JSONL file whose records use the
+# OpenTelemetry span field names (traceId, spanId, parentSpanId, ...). The
+# file is opened once and line-buffered, so concurrent stages only contend
+# for a single write. Past TELEMETRY_MAX_BYTES it is rotated to traces.jsonl.1
+# (up to TELEMETRY_BACKUPS old files), so long-running processes stay bounded.
+#
+# TELEMETRY_EXPORT=off disables the file; TELEMETRY_PATH moves it.
+
+import atexit
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+
+from Tools.Cache_Store import CACHE_DIR
+
+TELEMETRY_EXPORT = os.getenv("TELEMETRY_EXPORT", "jsonl")
+TELEMETRY_PATH = os.getenv("TELEMETRY_PATH", os.path.join(CACHE_DIR, "traces.jsonl"))
+TELEMETRY_MAX_BYTES = int(os.getenv("TELEMETRY_MAX_BYTES", 32 * 1024 * 1024))
+TELEMETRY_BACKUPS = int(os.getenv("TELEMETRY_BACKUPS", 2))
+RECENT_SPANS = 2000
+
+# USD per 1M tokens (input, output)
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "text-embedding-3-small": (0.02, 0.0),
+    "text-embedding-3-large": (0.13, 0.0)
+}
+
+_current: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("telemetry_span", default=None)
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int = 0) -> float:
+    """Estimated USD cost of one call; 0.0 for models without a known price."""
+    price = next((p for name, p in sorted(MODEL_PRICES.items(), key=lambda kv: -len(kv[0])) if model.startswith(name)), None)
+    if price is None:
+        return 0.0
+    return round((input_tokens * price[0] + output_tokens * price[1]) / 1_000_000, 8)
+
+
+class Span:
+    """One timed stage. Use `set` to attach attributes and `end` (or the `span` context manager) to close it."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start", "end_time", "attributes", "status")
+
+    def __init__(self, name: str, parent: Optional["Span"] = None, **attributes):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.start = time.time()
+        self.end_time: Optional[float] = None
+        self.attributes: Dict[str, Any] = dict(attributes)
+        self.status = "OK"
+
+    def set(self, **attributes) -> "Span":
+        self.attributes.update(attributes)
+        return self
+
+    def add_usage(self, model: str, input_tokens: int, output_tokens: int) -> "Span":
+        """Record token usage and the estimated cost derived from it."""
+        return self.set(
+            model=model,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            cost_usd=estimate_cost(model, input_tokens, output_tokens)
+        )
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        if self.end_time is not None:
+            return
+        self.end_time = time.time()
+        if error is not None:
+            self.status = "ERROR"
+            self.attributes["error"] = f"{type(error).__name__}: {error}"
+        tracer.export(self)
+
+    @property
+    def duration_ms(self) -> float:
+        return round(((self.end_time or time.time()) - self.start) * 1000, 2)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """OpenTelemetry-style record."""
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "startTimeUnixNano": int(self.start * 1e9),
+            "endTimeUnixNano": int((self.end_time or self.start) * 1e9),
+            "durationMs": self.duration_ms,
+            "status": self.status,
+            "attributes": self.attributes
+        }
+
+
+class Tracer:
+    """Keeps recent finished spans in memory and appends them to the rotating JSONL export."""
+
+    def __init__(
+        self,
+        path: str = TELEMETRY_PATH,
+        export: str = TELEMETRY_EXPORT,
+        max_bytes: int = TELEMETRY_MAX_BYTES,
+        backups: int = TELEMETRY_BACKUPS
+    ):
+        self.path = path
+        self.export_enabled = export != "off"
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._lock = threading.Lock()
+        self._file_lock = threading.Lock()
+        self._file: Optional[TextIO] = None
+        self._size = 0
+        self._recent: deque = deque(maxlen=RECENT_SPANS)
+
+    def export(self, span: Span) -> None:
+        record = span.to_dict()
+        with self._lock:
+            self._recent.append(record)
+        if self.export_enabled:
+            line = json.dumps(record, default=str) + "\n"
+            with self._file_lock:
+                if self._file is not None and self._size + len(line) > self.max_bytes:
+                    self._rotate()
+                if self._file is None:
+                    if os.path.dirname(self.path):
+                        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                    self._file = open(self.path, "a", encoding="utf-8", buffering=1)
+                    self._size = self._file.tell()
+                self._file.write(line)
+                self._size += len(line)
+
+    def _rotate(self) -> None:
+        """Shift traces.jsonl -> .1 -> .2 ..., dropping the oldest. Caller holds the file lock."""
+        self._file.close()
+        self._file = None
+        for index in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{index}"):
+                os.replace(f"{self.path}.{index}", f"{self.path}.{index + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    def close(self) -> None:
+        with self._file_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def trace(self, trace_id: str) -> List[Dict[str, Any]]:
+        """Finished spans of one trace, in start order."""
+        with self._lock:
+            spans = [record for record in self._recent if record["traceId"] == trace_id]
+        return sorted(spans, key=lambda record: record["startTimeUnixNano"])
+
+
+tracer = Tracer()
+atexit.register(tracer.close)
+
+
+def start_span(name: str, **attributes) -> Span:
+    """Open a span under the current one without making it current (for spans that stay open across yields)."""
+    return Span(name, _current.get(), **attributes)
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Span]:
+    """Time a block as a child of the current span; nested spans inside it become its children."""
+    current = Span(name, _current.get(), **attributes)
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.end(e)
+        raise
+    finally:
+        _current.reset(token)
+        current.end()
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def summarize(spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Totals over a trace's spans: LLM tokens, cost, cache hits and retries."""
+    attributes = [record["attributes"] for record in spans]
+    return {
+        "spans": len(spans),
+        "input_tokens": sum(a.get("input_tokens", 0) for a in attributes),
+        "output_tokens": sum(a.get("output_tokens", 0) for a in attributes),
+        "cost_usd": round(sum(a.get("cost_usd", 0.0) for a in attributes), 6),
+        "cache_hits": sum(1 for a in attributes if a.get("cache_hit")),
+        "retries": sum(a.get("retries", 0) for a in attributes)
+    }
+
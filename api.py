@@ -0,0 +1,115 @@
+# api.py (HEADLESS HTTP API)
+#
+# The analysis pipeline as an async HTTP service, for tooling that can't use
+# the Streamlit page. Requests become jobs on a bounded queue (Tools/Jobs.py);
+# clients poll a job, long-poll it with ?wait=, or stream results as NDJSON.
+#
+# Usage:
+#   uvicorn api:app --host 0.0.0.0 --port 8000
+#
+#   POST /analyze        {"posts": ["DQbefDfDGiU", ...], "mode": "parallel"}  -> 202 + job ids
+#   GET  /jobs/{job_id}  ?wait=30 to block until the job finishes
+#   GET  /jobs?ids=a,b   NDJSON stream, one line per job as it finishes
+#   GET  /reports/{shortcode}?format=html   stored report as json, html or csv
+#   GET  /health         queue depth and worker counts
+
+import json
+import os
+from contextlib import asynccontextmanager
+from typing import List, Literal
+
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
+
+from Tools.Jobs import JobQueue, QueueFull, DEFAULT_JOB_WORKERS, DEFAULT_MAX_QUEUED
+from Tools.Single_Flight import media_flight, llm_flight
+from Tools.Pipeline import load_report
+from Tools.Report_Artifacts import EXPORT_MIME_TYPES
+
+MAX_WAIT_SECONDS = 120
+STREAM_TIMEOUT_SECONDS = 600
+RETRY_AFTER_SECONDS = 10
+
+jobs = JobQueue(
+    workers=int(os.getenv("API_WORKERS", DEFAULT_JOB_WORKERS)),
+    max_queued=int(os.getenv("API_MAX_QUEUED", DEFAULT_MAX_QUEUED))
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await jobs.start()
+    yield
+    await jobs.stop()
+
+
+app = FastAPI(title="Instagram Post Analyzer API", lifespan=lifespan)
+
+
+class AnalyzeRequest(BaseModel):
+    posts: List[str] = Field(min_length=1, description="Shortcodes or post URLs")
+    mode: Literal["sequential", "parallel", "fused"] = "parallel"
+    analyze: bool = Field(True, description="False skips the LLM stages (metrics only)")
+    force_refresh: bool = False
+
+
+@app.post("/analyze", status_code=202)
+async def analyze(request: AnalyzeRequest):
+    try:
+        submitted = jobs.submit_many(request.posts, request.mode, request.analyze, request.force_refresh)
+    except QueueFull as e:
+        return JSONResponse(
+            {"error": str(e)}, status_code=429, headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+        )
+    return {
+        "jobs": [
+            {**job.to_dict(include_result=False), "deduplicated": deduplicated}
+            for job, deduplicated in submitted
+        ]
+    }
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, wait: float = Query(0, ge=0, le=MAX_WAIT_SECONDS)):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job id")
+    if wait and not job.finished:
+        await jobs.wait(job, timeout=wait)
+    return job.to_dict()
+
+
+@app.get("/jobs")
+async def stream_jobs(ids: str = Query(..., description="Comma-separated job ids")):
+    selected = [jobs.get(job_id) for job_id in ids.split(",") if job_id]
+    if not selected or any(job is None for job in selected):
+        raise HTTPException(status_code=404, detail="Unknown job id")
+
+    async def lines():
+        async for job in jobs.as_completed(selected, timeout=STREAM_TIMEOUT_SECONDS):
+            yield json.dumps(job.to_dict()) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@app.get("/reports/{shortcode}")
+async def get_report(shortcode: str, format: Literal["json", "html", "csv"] = "json"):
+    artifact = load_report(shortcode)
+    if artifact is None:
+        raise HTTPException(status_code=404, detail="No stored report for this post; analyze it first")
+    return Response(artifact.export(format), media_type=EXPORT_MIME_TYPES[format])
+
+
+@app.get("/health")
+async def health():
+    return {
+        "status": "ok",
+        **jobs.stats(),
+        "coalescing": {"media": media_flight.stats(), "llm": llm_flight.stats()}
+    }
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("API_PORT", 8000)))
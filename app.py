@@ -1,259 +1,382 @@
 # app.py (ENHANCED VERSION WITH ALL FEATURES)
 
+import time
+
 import streamlit as st
-import os
-from dotenv import load_dotenv 
-import asyncio
-from agents import Runner
-import json 
 
-from Agents.SentimentAnalisys import final_report_agent
-from Agents.WebScraper import web_scraper 
+from Tools.Clients import background_loop
+from Tools.Pipeline import scrape_post, analyze_post_stream, preview_report, preview_section, load_report
+from Tools.Batch import iter_batch, load_post_inputs
+from Tools.Comparison import compare_posts, media_breakdown
+from Tools.Report_Artifacts import ReportArtifact, EXPORT_FORMATS, EXPORT_MIME_TYPES
+from Tools.Cache_Store import llm_cache
+from Tools.Metrics_History import metrics_history
+from Tools.Telemetry import span, tracer, summarize
 
-load_dotenv()
-os.environ["OPENAI_API_KEY"] = os.getenv("OPENAI_API_KEY")
 
 st.set_page_config(page_title="Instagram Post Analyzer", layout="wide")
 st.title("💡 AI Instagram Content Strategy Analyzer")
-st.write("Advanced Multi-Agent Pipeline: Scraping, NLP Analysis, Hashtag Generation & Strategy Recommendations")
+st.write("Advanced Analysis Pipeline: Scraping, NLP Analysis, Hashtag Generation & Strategy Recommendations")
 st.markdown("---")
 
-post_input = st.text_input(
-    "Instagram Post URL or Shortcode", 
-    key="post_input",
-    placeholder="DQbefDfDGiU or https://instagram.com/p/DQbefDfDGiU/"
-)
+TIME_OUT_SECONDS = 550
+MAX_COMPARE_POSTS = 50
+
+
+# ===== REPORT SECTIONS =====
+# Each renderer takes the report dict, so a section can be drawn from the
+# preview report (right after scraping) and redrawn once the LLM stages finish.
+
+def render_performance(report_data, shortcode):
+    st.subheader("📈 Performance Metrics")
+    col1, col2, col3, col4 = st.columns(4)
+    
+    perf = report_data.get('post_performance', {})
+    with col1:
+        st.metric("❤️ Likes", f"{perf.get('likes', 0):,}")
+    with col2:
+        st.metric("💬 Comments", f"{perf.get('comments', 0):,}")
+    with col3:
+        st.metric("📊 Engagement Rate", f"{perf.get('engagement_rate', 0)}%")
+    with col4:
+        level = perf.get('performance_level', 'unknown').upper()
+        color = "🟢" if level == "HIGH" else "🟡" if level == "MEDIUM" else "🔴"
+        st.metric("🎯 Performance", f"{color} {level}")
+    
+    if perf.get('performance_basis') == "account":
+        st.caption(
+            f"Relative to the account's last {perf['benchmark_posts']} posts: "
+            f"{perf['engagement_percentile']:.0f}th percentile, z-score {perf['engagement_zscore']:+.2f}"
+        )
+
+    if (perf.get('video_views') or 0) > 0:
+        st.metric("👁️ Video Views", f"{perf.get('video_views', 0):,}")
+    
+    # Trend from stored snapshots (no extra API calls)
+    history = metrics_history.timeseries(shortcode)
+    if len(history) > 1:
+        with st.expander(f"📈 Metric History ({len(history)} snapshots)"):
+            st.line_chart(history.set_index("fetched")[["likes", "comments"]])
+            st.line_chart(history.set_index("fetched")[["engagement_rate"]])
+
+
+def render_posting(report_data):
+    st.subheader("⏰ Posting Time Analysis")
+    posting = report_data.get('posting_insights', {})
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.info(f"📅 **Posted:** {posting.get('posted_at', 'Unknown')}")
+    with col2:
+        st.info(f"🕐 **Time Period:** {posting.get('posted_time_period', 'Unknown')}")
+    with col3:
+        weekend = "🎉 Yes" if posting.get('is_weekend') else "📅 No"
+        st.info(f"**Weekend Post:** {weekend}")
+    
+    st.success(f"💡 **Recommendation:** {posting.get('optimal_posting_recommendation', 'N/A')}")
+
+
+def render_content(report_data):
+    st.subheader("📝 Content Analysis")
+    content = report_data.get('content_analysis', {})
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.write(f"**Media Type:** {content.get('media_type', 'Unknown')}")
+        st.write(f"**Caption Quality:** {content.get('caption_quality', 'Unknown')}")
+        st.write(f"**Has CTA:** {'✅ Yes' if content.get('has_call_to_action') else '❌ No'}")
+    
+    with col2:
+        st.write(f"**Hashtags Used:** {content.get('hashtags_used_count', 0)}")
+        if content.get('hashtags_used'):
+            st.write("**Current Hashtags:**")
+            st.code(' '.join(f'#{h}' for h in content.get('hashtags_used', [])[:10]))
+
+
+def render_sentiment(report_data):
+    sentiment = report_data.get('sentiment_insights', {})
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        sent_emoji = {"positive": "😊", "negative": "😟", "neutral": "😐"}
+        overall = sentiment.get('overall_sentiment', 'neutral')
+        st.metric("Overall Sentiment", f"{sent_emoji.get(overall, '😐')} {overall.upper()}")
+        
+        dist = sentiment.get('comment_distribution', {})
+        if dist.get('comments_scored'):
+            st.caption(
+                f"Across {dist['comments_scored']:,} comments: "
+                f"{dist['positive_share']:.0%} positive · {dist['neutral_share']:.0%} neutral · "
+                f"{dist['negative_share']:.0%} negative"
+            )
+        
+        if sentiment.get('key_themes'):
+            st.write("**📌 Key Themes:**")
+            for theme in sentiment.get('key_themes', [])[:5]:
+                st.write(f"• {theme}")
+        
+        if sentiment.get('user_emotions'):
+            st.write("**🎭 Common Emotions:**")
+            st.write(", ".join(sentiment.get('user_emotions', [])[:5]))
+    
+    with col2:
+        if sentiment.get('user_frustrations'):
+            st.warning("**⚠️ User Frustrations:**")
+            for frust in sentiment.get('user_frustrations', [])[:3]:
+                st.write(f"• {frust}")
+        
+        if sentiment.get('user_desires'):
+            st.info("**💭 User Desires:**")
+            for desire in sentiment.get('user_desires', [])[:3]:
+                st.write(f"• {desire}")
+        
+        if sentiment.get('engagement_reasons'):
+            st.success("**🎯 Why People Engage:**")
+            for reason in sentiment.get('engagement_reasons', [])[:3]:
+                st.write(f"• {reason}")
+
+
+def render_hashtags(report_data):
+    hashtag_rec = report_data.get('hashtag_recommendations', {})
+    
+    if hashtag_rec.get('suggested_hashtags'):
+        st.write("**Suggested Hashtags:**")
+        hashtag_string = ' '.join(f'#{h}' for h in hashtag_rec.get('suggested_hashtags', []))
+        st.code(hashtag_string, language="text")
+        
+        # Copy button
+        if st.button("📋 Copy Hashtags"):
+            st.write("*Copied to clipboard!* (Use Ctrl+C manually from code block)")
+    
+    if hashtag_rec.get('strategy'):
+        st.info(f"**Strategy:** {hashtag_rec.get('strategy')}")
+
+
+def render_recommendations(report_data):
+    st.subheader("💡 Action Plan & Recommendations")
+    recommendations = report_data.get('recommendations', [])
+    
+    for i, rec in enumerate(recommendations, 1):
+        st.success(f"**{i}.** {rec}")
+    
+    # Full JSON
+    with st.expander("🔍 View Complete Report JSON"):
+        st.json(report_data)
+
+
+def render_exports(artifact):
+    st.write("**📤 Export Report**")
+    for column, fmt in zip(st.columns(len(EXPORT_FORMATS)), EXPORT_FORMATS):
+        with column:
+            st.download_button(
+                f"⬇️ {fmt.upper()}",
+                artifact.export(fmt),
+                file_name=f"{artifact.shortcode}_report.{fmt}",
+                mime=EXPORT_MIME_TYPES[fmt],
+                key=f"export_{fmt}",
+                use_container_width=True
+            )
+
 
-if st.button("🚀 Analyze Post", type="primary", use_container_width=True):
+def render_report(artifact):
+    """A finished report from its artifact: no pipeline work, so reruns are instant."""
+    report_data = artifact.report
+    st.markdown("---")
+    st.header("📊 Complete Analysis Report")
+    st.caption(
+        f"Report from {time.strftime('%Y-%m-%d %H:%M', time.localtime(artifact.created_at))} "
+        f"· pipeline {artifact.pipeline_version} · {artifact.model}"
+    )
+    render_performance(report_data, artifact.shortcode)
+    render_posting(report_data)
+    render_content(report_data)
+    st.subheader("🧠 AI Sentiment Analysis")
+    render_sentiment(report_data)
+    st.subheader("#️⃣ Hashtag Strategy")
+    render_hashtags(report_data)
+    render_recommendations(report_data)
+    render_exports(artifact)
+
+
+def remember_report(artifact):
+    """Keep a report in the session so widget reruns (e.g. Copy Hashtags) redraw it instead of re-running the pipeline."""
+    st.session_state.setdefault("reports", {})[artifact.shortcode] = artifact
+    st.session_state["current_report"] = artifact.shortcode
+
+
+def render_comparison(results, shortcodes):
+    failed = [result for result in results if not result.ok]
+    for result in failed:
+        st.error(f"❌ {result.shortcode}: {result.error}")
+    
+    # Ranked against each account's full stored history, in input order
+    order = {shortcode: i for i, shortcode in enumerate(shortcodes)}
+    posts = sorted((result for result in results if result.ok), key=lambda result: order.get(result.shortcode, len(order)))
+    if not posts:
+        return
+    compared = compare_posts(posts)
+    
+    st.subheader("📊 Post Comparison")
+    st.caption("Percentile and z-score are relative to each account's own posts; level falls back to fixed thresholds for accounts with little history")
+    st.dataframe(
+        compared[[
+            "shortcode", "username", "media_type", "likes", "comments", "video_views", "engagement_rate",
+            "engagement_percentile", "engagement_zscore", "performance_level", "performance_basis", "views_to_likes"
+        ]],
+        hide_index=True,
+        width="stretch"
+    )
+    st.bar_chart(compared.set_index("shortcode")[["engagement_rate"]])
+    
+    st.subheader("🎬 Media Type Breakdown")
+    st.dataframe(media_breakdown(compared), hide_index=True, width="stretch")
+
+
+mode = st.radio("Mode", ["🔎 Single post", "📊 Compare posts"], horizontal=True, key="mode")
+
+if mode == "📊 Compare posts":
+    compare_input = st.text_area(
+        "Instagram Post URLs or Shortcodes (one per line)",
+        key="compare_input",
+        placeholder="DQbefDfDGiU\nhttps://instagram.com/p/DQbefDfDGiU/"
+    )
+    force_refresh = st.checkbox("🔄 Force refresh (ignore cached Instagram data)", key="force_refresh")
+    
+    if st.button("📊 Compare Posts", type="primary", use_container_width=True):
+        shortcodes = load_post_inputs(compare_input.splitlines())[:MAX_COMPARE_POSTS]
+        if len(shortcodes) < 2:
+            st.warning("⚠️ Enter at least two posts to compare")
+        else:
+            with span("ui.compare", posts=len(shortcodes)) as root:
+                st.session_state["last_trace_id"] = root.trace_id
+                with st.spinner(f"📊 Scraping {len(shortcodes)} posts..."):
+                    results = list(background_loop().iterate(
+                        iter_batch(shortcodes, analyze=False, force_refresh=force_refresh), timeout=TIME_OUT_SECONDS
+                    ))
+                render_comparison(results, shortcodes)
+
+else:
+    post_input = st.text_input(
+        "Instagram Post URL or Shortcode", 
+        key="post_input",
+        placeholder="DQbefDfDGiU or https://instagram.com/p/DQbefDfDGiU/"
+    )
+    
+    force_refresh = st.checkbox("🔄 Force refresh (ignore cached Instagram data)", key="force_refresh")
+
+if mode == "🔎 Single post" and st.button("🚀 Analyze Post", type="primary", use_container_width=True):
     if post_input:
         
-        def extract_pure_content(raw_output: str) -> str:
-            """Extract content from RunResult wrapper."""
-            raw_str = str(raw_output)
-            start = raw_str.find('{')
-            end = raw_str.rfind('}')
-            if start != -1 and end != -1:
-                return raw_str[start:end + 1]
-            return raw_str
-
-        async def main():
+        def main():
+            # A post analyzed before (same pipeline version and model) loads from its stored artifact
+            artifact = None if force_refresh else load_report(post_input)
+            if artifact is not None:
+                remember_report(artifact)
+                st.success("⚡ Loaded saved report (tick Force refresh to re-analyze)")
+                render_report(artifact)
+                return
+            
             st.info("🚀 Starting Advanced Analysis Pipeline...")
             
             try:
                 # STEP 1: SCRAPING
                 with st.spinner("📊 Step 1/2: Scraping Instagram data..."):
-                    scraper_result = await Runner.run(
-                        web_scraper, 
-                        f"Please process this Instagram post: {post_input}"
-                    )
+                    result = scrape_post(post_input, force_refresh)
                     
-                    raw_output = extract_pure_content(str(scraper_result))
-                    
-                    if raw_output.startswith('{"error"') or '"error"' in raw_output[:100]:
+                    if not result.ok:
                         st.error("❌ Scraping Failed!")
-                        try:
-                            error_data = json.loads(raw_output)
-                            st.json(error_data)
-                        except:
-                            st.code(raw_output, language="json")
+                        st.json(result.metrics)
                         st.info("💡 Tip: Check if the post is public and the shortcode is correct")
                         return
                     
-                    # Parse output
-                    if '|||' not in raw_output:
-                        start = raw_output.find('{')
-                        end = raw_output.rfind('}') + 1
-                        if start != -1 and end > start:
-                            metrics_json = raw_output[start:end]
-                            metrics_dict = json.loads(metrics_json)
-                            
-                            total_engagement = metrics_dict.get("likes", 0) + metrics_dict.get("comments", 0)
-                            followers = metrics_dict.get("followers", 0)
-                            engagement_rate = round((total_engagement / followers) * 100, 4) if followers > 0 else 0.0
-                        else:
-                            st.error("❌ Could not parse agent output")
-                            st.code(raw_output, language="text")
-                            return
-                    else:
-                        parts = raw_output.split('|||')
-                        if len(parts) != 2:
-                            st.error(f"❌ Format error. Expected 2 parts, got {len(parts)}")
-                            st.code(raw_output, language="text")
-                            return
-                        
-                        metrics_json = parts[0].strip()
-                        engagement_rate = float(parts[1].strip())
-                    
-                    metrics_dict = json.loads(metrics_json)
                     st.success("✅ Scraping Complete!")
                 
-                # STEP 2: ADVANCED ANALYSIS
-                with st.spinner("🤖 Step 2/2: Running NLP Analysis & Generating Strategy..."):
-                    analyzer_input = json.dumps({
-                        "metrics_json": metrics_json,
-                        "engagement_rate": engagement_rate
-                    })
-                    
-                    try:
-                        TIME_OUT_SECONDS=550
-                        report_result = await asyncio.wait_for(
-                            Runner.run(final_report_agent, analyzer_input),
-                            timeout=TIME_OUT_SECONDS
-                        )
-                        final_report_str = extract_pure_content(str(report_result))
-                        
-                    except asyncio.TimeoutError:
-                        st.error(F"❌ Analysis timed out {TIME_OUT_SECONDS} seconds exceeded")
-                        st.warning("💡 Try again - complex NLP analysis may take longer")
-                        return
-                    except Exception as e:
-                        error_msg = str(e)
-                        if "500" in error_msg or "server_error" in error_msg:
-                            st.error("❌ OpenAI API Error (500)")
-                            st.warning("💡 Wait 30 seconds and try again")
-                        elif "429" in error_msg:
-                            st.error("❌ Rate Limit Exceeded")
-                            st.warning("💡 Wait a minute")
+                # Sections that need no LLM are final already - show them right away
+                st.markdown("---")
+                st.header("📊 Complete Analysis Report")
+                preview = preview_report(result).model_dump(exclude_none=True)
+                render_performance(preview, result.shortcode)
+                render_posting(preview)
+                render_content(preview)
+                
+                # STEP 2: ADVANCED ANALYSIS (sections fill in as each stage completes)
+                st.subheader("🧠 AI Sentiment Analysis")
+                sentiment_area = st.empty()
+                st.subheader("#️⃣ Hashtag Strategy")
+                hashtag_area = st.empty()
+                hashtag_area.info("⏳ Generating hashtag suggestions...")
+                final_area = st.container()
+                
+                try:
+                    streamed = ""
+                    events = background_loop().iterate(analyze_post_stream(result), timeout=TIME_OUT_SECONDS)
+                    for event, payload in events:
+                        if event == "sentiment_delta":
+                            streamed += payload
+                            sentiment_area.code(streamed, language="json")
+                        elif event == "sentiment":
+                            with sentiment_area.container():
+                                if payload.error:
+                                    st.warning(f"⚠️ {payload.error}")
+                                render_sentiment(preview_section(result, "sentiment"))
+                        elif event == "hashtags":
+                            with hashtag_area.container():
+                                render_hashtags(preview_section(result, "hashtags"))
                         else:
-                            st.error(f"❌ Error: {error_msg}")
-                        return
+                            result = payload
                     
-                    st.success("✅ Analysis Complete!")
-                    st.markdown("---")
+                except TimeoutError:
+                    st.error(F"❌ Analysis timed out {TIME_OUT_SECONDS} seconds exceeded")
+                    st.warning("💡 Try again - complex NLP analysis may take longer")
+                    return
+                except Exception as e:
+                    error_msg = str(e)
+                    if "500" in error_msg or "server_error" in error_msg:
+                        st.error("❌ OpenAI API Error (500)")
+                        st.warning("💡 Wait 30 seconds and try again")
+                    elif "429" in error_msg:
+                        st.error("❌ Rate Limit Exceeded")
+                        st.warning("💡 Wait a minute")
+                    else:
+                        st.error(f"❌ Error: {error_msg}")
+                    return
+                
+                with final_area:
+                    if not result.ok:
+                        st.error("❌ Could not build report")
+                        st.json({"error": result.error})
+                        return
                     
+                    report_data = result.report.model_dump(exclude_none=True)
+                    # The stored artifact; runs the store declined (a failed LLM stage) stay session-only
+                    artifact = result.artifact or ReportArtifact(
+                        shortcode=result.shortcode, result=result.to_dict(), created_at=time.time()
+                    )
+                    remember_report(artifact)
                     try:
-                        report_data = json.loads(final_report_str)
-                        
-                        # DISPLAY RESULTS
-                        st.header("📊 Complete Analysis Report")
-                        
-                        # Performance Metrics
-                        st.subheader("📈 Performance Metrics")
-                        col1, col2, col3, col4 = st.columns(4)
-                        
-                        perf = report_data.get('post_performance', {})
-                        with col1:
-                            st.metric("❤️ Likes", f"{perf.get('likes', 0):,}")
-                        with col2:
-                            st.metric("💬 Comments", f"{perf.get('comments', 0):,}")
-                        with col3:
-                            st.metric("📊 Engagement Rate", f"{perf.get('engagement_rate', 0)}%")
-                        with col4:
-                            level = perf.get('performance_level', 'unknown').upper()
-                            color = "🟢" if level == "HIGH" else "🟡" if level == "MEDIUM" else "🔴"
-                            st.metric("🎯 Performance", f"{color} {level}")
-                        
-                        if perf.get('video_views', 0) > 0:
-                            st.metric("👁️ Video Views", f"{perf.get('video_views', 0):,}")
-                        
-                        # Posting Insights
-                        st.subheader("⏰ Posting Time Analysis")
-                        posting = report_data.get('posting_insights', {})
-                        col1, col2, col3 = st.columns(3)
-                        
-                        with col1:
-                            st.info(f"📅 **Posted:** {posting.get('posted_at', 'Unknown')}")
-                        with col2:
-                            st.info(f"🕐 **Time Period:** {posting.get('posted_time_period', 'Unknown')}")
-                        with col3:
-                            weekend = "🎉 Yes" if posting.get('is_weekend') else "📅 No"
-                            st.info(f"**Weekend Post:** {weekend}")
-                        
-                        st.success(f"💡 **Recommendation:** {posting.get('optimal_posting_recommendation', 'N/A')}")
-                        
-                        # Content Analysis
-                        st.subheader("📝 Content Analysis")
-                        content = report_data.get('content_analysis', {})
-                        
-                        col1, col2 = st.columns(2)
-                        with col1:
-                            st.write(f"**Media Type:** {content.get('media_type', 'Unknown')}")
-                            st.write(f"**Caption Quality:** {content.get('caption_quality', 'Unknown')}")
-                            st.write(f"**Has CTA:** {'✅ Yes' if content.get('has_call_to_action') else '❌ No'}")
-                        
-                        with col2:
-                            st.write(f"**Hashtags Used:** {content.get('hashtags_used_count', 0)}")
-                            if content.get('hashtags_used'):
-                                st.write("**Current Hashtags:**")
-                                st.code(' '.join(f'#{h}' for h in content.get('hashtags_used', [])[:10]))
-                        
-                        # Sentiment Insights
-                        st.subheader("🧠 AI Sentiment Analysis")
-                        sentiment = report_data.get('sentiment_insights', {})
-                        
-                        col1, col2 = st.columns(2)
-                        
-                        with col1:
-                            sent_emoji = {"positive": "😊", "negative": "😟", "neutral": "😐"}
-                            overall = sentiment.get('overall_sentiment', 'neutral')
-                            st.metric("Overall Sentiment", f"{sent_emoji.get(overall, '😐')} {overall.upper()}")
-                            
-                            if sentiment.get('key_themes'):
-                                st.write("**📌 Key Themes:**")
-                                for theme in sentiment.get('key_themes', [])[:5]:
-                                    st.write(f"• {theme}")
-                            
-                            if sentiment.get('user_emotions'):
-                                st.write("**🎭 Common Emotions:**")
-                                st.write(", ".join(sentiment.get('user_emotions', [])[:5]))
-                        
-                        with col2:
-                            if sentiment.get('user_frustrations'):
-                                st.warning("**⚠️ User Frustrations:**")
-                                for frust in sentiment.get('user_frustrations', [])[:3]:
-                                    st.write(f"• {frust}")
-                            
-                            if sentiment.get('user_desires'):
-                                st.info("**💭 User Desires:**")
-                                for desire in sentiment.get('user_desires', [])[:3]:
-                                    st.write(f"• {desire}")
-                            
-                            if sentiment.get('engagement_reasons'):
-                                st.success("**🎯 Why People Engage:**")
-                                for reason in sentiment.get('engagement_reasons', [])[:3]:
-                                    st.write(f"• {reason}")
-                        
-                        # Hashtag Recommendations
-                        st.subheader("#️⃣ Hashtag Strategy")
-                        hashtag_rec = report_data.get('hashtag_recommendations', {})
-                        
-                        if hashtag_rec.get('suggested_hashtags'):
-                            st.write("**Suggested Hashtags:**")
-                            hashtag_string = ' '.join(f'#{h}' for h in hashtag_rec.get('suggested_hashtags', []))
-                            st.code(hashtag_string, language="text")
-                            
-                            # Copy button
-                            if st.button("📋 Copy Hashtags"):
-                                st.write("*Copied to clipboard!* (Use Ctrl+C manually from code block)")
-                        
-                        if hashtag_rec.get('strategy'):
-                            st.info(f"**Strategy:** {hashtag_rec.get('strategy')}")
-                        
-                        # Recommendations
-                        st.subheader("💡 Action Plan & Recommendations")
-                        recommendations = report_data.get('recommendations', [])
-                        
-                        for i, rec in enumerate(recommendations, 1):
-                            st.success(f"**{i}.** {rec}")
-                        
-                        # Full JSON
-                        with st.expander("🔍 View Complete Report JSON"):
-                            st.json(report_data)
-                    
-                    except json.JSONDecodeError as e:
-                        st.error("❌ Could not parse report JSON")
-                        st.code(final_report_str, language="text")
+                        render_recommendations(report_data)
+                        render_exports(artifact)
+                        st.success("✅ Analysis Complete!")
+                    except Exception as e:
+                        st.error("❌ Could not render report")
+                        st.json(report_data)
                         st.exception(e)
 
             except Exception as e:
                 st.error(f"❌ Error: {type(e).__name__}")
                 st.exception(e)
         
-        asyncio.run(main())
+        with span("ui.analyze", post=post_input) as root:
+            st.session_state["last_trace_id"] = root.trace_id
+            main()
     
     else:
         st.warning("⚠️ Please enter a valid Instagram Post URL or Shortcode")
 
+elif mode == "🔎 Single post" and "current_report" in st.session_state:
+    render_report(st.session_state["reports"][st.session_state["current_report"]])
+
 # Sidebar Info
 with st.sidebar:
     st.header("ℹ️ Features")
@@ -263,7 +386,12 @@ with st.sidebar:
     **📊 Performance Metrics:**
     - Likes, comments, video views
     - Engagement rate calculation
-    - Performance level assessment
+    - Performance level vs. the account's own posts
+    
+    **📊 Multi-Post Comparison:**
+    - Percentile rank & z-score per post
+    - Media type breakdown (Reels, images, carousels)
+    - Views-to-likes ratio for videos
     
     **⏰ Posting Time Analysis:**
     - Exact posting date/time
@@ -293,8 +421,31 @@ with st.sidebar:
     ### ⚠️ Limitations:
     - Only public posts can be analyzed
     - Saves/shares not available (API limitation)
-    - Multi-post comparison: coming soon
     """)
     
     st.markdown("---")
+    if len(st.session_state.get("reports", {})) > 1:
+        st.selectbox("🗂️ Reports this session", list(st.session_state["reports"]), key="current_report")
+    
+    trace = tracer.trace(st.session_state["last_trace_id"]) if "last_trace_id" in st.session_state else []
+    if trace:
+        with st.expander("🐞 Debug: last run trace"):
+            totals = summarize(trace)
+            st.caption(
+                f"{totals['input_tokens'] + totals['output_tokens']:,} tokens · ${totals['cost_usd']:.4f} · "
+                f"{totals['cache_hits']} cache hits · {totals['retries']} retries"
+            )
+            st.dataframe(
+                [
+                    {"stage": record["name"], "ms": record["durationMs"], "status": record["status"], **record["attributes"]}
+                    for record in trace
+                ],
+                width="stretch"
+            )
+    
+    cache_stats = llm_cache.stats()
+    st.caption(
+        f"🗄️ LLM cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+        f"({cache_stats['hit_rate']:.0%} hit rate)"
+    )
     st.caption("Powered by OpenAI GPT-4o-mini & Instagram Scraper API")
\ No newline at end of file
@@ -0,0 +1,12 @@
+# tests/conftest.py
+#
+# Tools modules create their SQLite caches and API clients at import time, so
+# point them at a throwaway directory and dummy keys before anything imports.
+
+import os
+import tempfile
+
+os.environ["CACHE_DIR"] = tempfile.mkdtemp(prefix="tests-cache-")
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("RAPIDAPI_KEY", "test")
+os.environ["TELEMETRY_EXPORT"] = "off"
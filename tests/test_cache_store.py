@@ -0,0 +1,63 @@
+import time
+
+import pytest
+
+from Tools.Cache_Store import MediaCache, SqliteCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SqliteCache(str(tmp_path / "cache.sqlite3"), max_bytes=1024 * 1024)
+
+
+def test_round_trip(cache):
+    cache.set("a", {"x": [1, 2, 3]})
+    assert cache.get("a") == {"x": [1, 2, 3]}
+    assert cache.get("missing") is None
+
+
+def test_max_age(cache, monkeypatch):
+    cache.set("a", 1)
+    later = time.time() + 60
+    monkeypatch.setattr(time, "time", lambda: later)
+    assert cache.get("a", max_age=120) == 1
+    assert cache.get("a", max_age=30) is None
+    assert cache.get_many(["a"], max_age=30) == {}
+    assert cache.purge_older_than(30) == 1
+    assert cache.get("a") is None
+
+
+def test_get_many_and_set_many(cache):
+    cache.set_many({f"k{i}": i for i in range(1200)})
+    found = cache.get_many([f"k{i}" for i in range(0, 1300, 100)])
+    assert found == {f"k{i}": i for i in range(0, 1200, 100)}
+
+
+def test_lru_eviction_keeps_recently_read_entries(tmp_path, monkeypatch):
+    blob = "x" * 2000
+    entry = SqliteCache(str(tmp_path / "probe.sqlite3"))
+    entry.set("probe", blob)
+    # Room for three entries (plus a few bytes of compression jitter), not four
+    cache = SqliteCache(str(tmp_path / "lru.sqlite3"), max_bytes=entry.total_bytes() * 3 + 16)
+
+    clock = iter(range(1_000, 2_000))
+    monkeypatch.setattr(time, "time", lambda: float(next(clock)))
+    for key in ("a", "b", "c"):
+        cache.set(key, blob + key)
+    cache.get("a")
+    cache.set("d", blob + "d")
+
+    assert cache.get("b") is None
+    assert all(cache.get(key) is not None for key in ("a", "c", "d"))
+    assert cache.total_bytes() <= cache.max_bytes
+
+
+def test_media_cache_splits_budget_and_keeps_pages_longer(tmp_path):
+    media = MediaCache(str(tmp_path / "media.sqlite3"), metrics_ttl=0, content_ttl=3600,
+                       max_bytes=1000, pages_share=0.25)
+    assert (media.store.max_bytes, media.pages.max_bytes) == (750, 250)
+
+    media.put_comment_page("ABC", "cursor-1", {"edges": []})
+    time.sleep(0.01)  # past metrics_ttl=0: a page read with the metrics TTL would miss
+    assert media.get_comment_page("ABC", "cursor-1") == {"edges": []}
+    assert media.get_comment_page("ABC", "cursor-2") is None
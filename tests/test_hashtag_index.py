@@ -0,0 +1,39 @@
+import pandas as pd
+
+from Tools.Hashtag_Index import MIN_INDEX_POSTS, MIN_SUGGESTIONS, HashtagIndex
+
+
+class _EmptyHistory:
+    def latest_snapshots(self, username=None):
+        return pd.DataFrame(columns=["shortcode", "hashtags", "engagement_rate"])
+
+
+def _index(posts):
+    index = HashtagIndex(history=_EmptyHistory())
+    for shortcode, tags in posts.items():
+        index.ingest({"shortcode": shortcode, "hashtags_used": tags}, 0.05)
+    return index
+
+
+def test_support_counts_posts_sharing_a_seed_tag():
+    index = _index({"a": ["#Fashion", "style"], "b": ["style"], "c": ["food"]})
+    assert index.support(["style"]) == 2
+    assert index.support(["#FASHION", "food"]) == 2
+    assert index.support(["style"], exclude_shortcode="a") == 1
+    assert index.support(["unknown"]) == 0
+
+
+def test_rescraped_post_replaces_its_tags():
+    index = _index({"a": ["style"]})
+    index.ingest({"shortcode": "a", "hashtags_used": ["food"]}, 0.05)
+    assert index.support(["style"]) == 0
+    assert index.post_count == 1
+
+
+def test_unrelated_posts_do_not_make_the_index_trusted():
+    index = _index({f"food{i}": ["food", f"tag{i % 7}"] for i in range(MIN_INDEX_POSTS * 2)})
+    suggestions = [{"tag": f"t{i}"} for i in range(MIN_SUGGESTIONS)]
+    assert index.post_count >= MIN_INDEX_POSTS
+    assert not index.has_enough_data(index.support(["fashion"]), suggestions)
+    assert index.has_enough_data(index.support(["food"]), suggestions)
+    assert not index.has_enough_data(index.support(["food"]), suggestions[:-1])
@@ -0,0 +1,28 @@
+import time
+from email.utils import formatdate
+
+from Tools.Http_Client import _parse_retry_after
+
+
+def test_delta_seconds():
+    assert _parse_retry_after("7") == 7.0
+    assert _parse_retry_after("1.5") == 1.5
+
+
+def test_negative_delay_is_clamped():
+    assert _parse_retry_after("-3") == 0.0
+
+
+def test_http_date():
+    delay = _parse_retry_after(formatdate(time.time() + 30, usegmt=True))
+    assert 25 <= delay <= 31
+
+
+def test_http_date_in_the_past():
+    assert _parse_retry_after(formatdate(time.time() - 600, usegmt=True)) == 0.0
+
+
+def test_missing_or_garbage():
+    assert _parse_retry_after(None) is None
+    assert _parse_retry_after("") is None
+    assert _parse_retry_after("soon") is None
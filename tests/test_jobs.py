@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+from Tools.Jobs import Job, JobQueue, QueueFull
+
+
+def _submit(queue: JobQueue, *calls):
+    """Start a worker-less queue (nothing runs) and return each submit_many result."""
+    async def run():
+        await queue.start()
+        return [queue.submit_many(*args, **kwargs) for args, kwargs in calls]
+    return asyncio.run(run())
+
+
+def test_job_key_includes_every_option():
+    job = Job(id="1", shortcode="ABC", mode="parallel", analyze=True, force_refresh=True)
+    assert job.key == ("ABC", "parallel", True, True)
+    assert job.to_dict()["force_refresh"] is True
+
+
+def test_same_options_share_one_job():
+    (first,), (second,) = _submit(JobQueue(workers=0), ((["ABC"],), {}), ((["ABC"],), {}))
+    assert first[1] is False
+    assert second == (first[0], True)
+
+
+def test_force_refresh_is_not_deduplicated_onto_a_cached_run():
+    (cached,), (fresh,) = _submit(
+        JobQueue(workers=0), ((["ABC"],), {}), ((["ABC"],), {"force_refresh": True})
+    )
+    assert fresh[1] is False
+    assert fresh[0] is not cached[0]
+
+
+def test_duplicates_within_one_submission_collapse():
+    (submitted,) = _submit(JobQueue(workers=0), ((["ABC", "ABC", "DEF"],), {}))
+    assert [job.shortcode for job, _ in submitted] == ["ABC", "DEF"]
+
+
+def test_queue_full_queues_nothing():
+    queue = JobQueue(workers=0, max_queued=2)
+    with pytest.raises(QueueFull):
+        _submit(queue, ((["A1", "B2", "C3"],), {}))
+    assert queue.queued == 0
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        _submit(JobQueue(workers=0), ((["ABC"],), {"mode": "nope"}))
@@ -0,0 +1,33 @@
+import pytest
+
+from Tools.Monitor import (
+    DOUBLING_HOURS, MAX_INTERVAL, MIN_INTERVAL, MIN_NEW_COMMENTS, next_interval, needs_reanalysis
+)
+
+
+def test_interval_doubles_with_age():
+    assert next_interval(0, None, None) == MIN_INTERVAL
+    assert next_interval(DOUBLING_HOURS, None, None) == pytest.approx(MIN_INTERVAL * 2)
+    assert next_interval(-5, None, None) == MIN_INTERVAL
+
+
+def test_interval_is_capped():
+    assert next_interval(10_000, None, None) == MAX_INTERVAL
+    assert next_interval(1, MAX_INTERVAL, 0.0) == MAX_INTERVAL
+
+
+def test_plateau_backs_off_from_previous_interval():
+    previous = MIN_INTERVAL * 4
+    assert next_interval(0, previous, growth=0.001) == previous * 2
+    assert next_interval(0, previous, growth=0.5) == MIN_INTERVAL
+    assert next_interval(0, previous, growth=None) == MIN_INTERVAL
+
+
+def test_needs_reanalysis():
+    assert needs_reanalysis(3, None)
+    assert not needs_reanalysis(0, None)
+    assert not needs_reanalysis(10 + MIN_NEW_COMMENTS - 1, 10)
+    assert needs_reanalysis(10 + MIN_NEW_COMMENTS, 10)
+    # Large threads need 20% more comments, not just MIN_NEW_COMMENTS
+    assert not needs_reanalysis(1000 + MIN_NEW_COMMENTS, 1000)
+    assert needs_reanalysis(1200, 1000)
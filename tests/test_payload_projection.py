@@ -0,0 +1,38 @@
+import json
+
+import pytest
+
+from Benchmarks.Fixtures import load_recorded, make_payload
+from Tools.Payload_Projection import COMMENT_PAGE_FIELDS, MEDIA_FIELDS, ijson, project, project_bytes, project_events
+
+FIELDS = {"a": None, "b": {"c": None}, "items": {"item": {"id": None}}}
+
+
+def test_project_keeps_only_listed_fields():
+    value = {"a": 1, "x": 2, "b": {"c": 3, "d": 4}, "items": [{"id": 1, "junk": 0}, {"id": 2}]}
+    assert project(value, FIELDS) == {"a": 1, "b": {"c": 3}, "items": [{"id": 1}, {"id": 2}]}
+
+
+def test_project_skips_missing_keys_and_keeps_leaf_subtrees():
+    assert project({"b": None}, FIELDS) == {"b": None}
+    assert project({"a": {"nested": [1]}}, FIELDS) == {"a": {"nested": [1]}}
+
+
+def _bodies():
+    payload, pages = make_payload("bench-small-t0001", 120)
+    yield json.dumps(payload).encode("utf-8"), MEDIA_FIELDS
+    for page in pages.values():
+        yield json.dumps(page).encode("utf-8"), COMMENT_PAGE_FIELDS
+    recorded = load_recorded("anon-carousel-0001")
+    if recorded is not None:
+        yield json.dumps(recorded[0], ensure_ascii=False).encode("utf-8"), MEDIA_FIELDS
+        for page in recorded[1].values():
+            yield json.dumps(page, ensure_ascii=False).encode("utf-8"), COMMENT_PAGE_FIELDS
+
+
+@pytest.mark.skipif(ijson is None, reason="ijson (yajl2_c) not installed")
+@pytest.mark.parametrize("body, fields", list(_bodies()))
+def test_streamed_projection_matches_decoded_projection(body, fields):
+    expected = project(json.loads(body), fields)
+    assert project_events(ijson.parse(body, use_float=True), fields) == expected
+    assert project_bytes(body, fields) == expected
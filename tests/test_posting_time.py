@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from Tools.Posting_Time import DAYS, MIN_POSTS, PRIOR_WEIGHT, PostingTimeModel, _smooth
+
+
+class _EmptyHistory:
+    def latest_snapshots(self, username=None):
+        return pd.DataFrame(columns=["shortcode", "posted_day", "posted_hour", "engagement_rate"])
+
+
+def test_uniform_history_smooths_to_the_mean():
+    counts = np.ones((7, 24))
+    assert np.allclose(_smooth(counts * 0.05, counts), 0.05)
+
+
+def test_empty_history_is_zero():
+    assert np.allclose(_smooth(np.zeros((7, 24)), np.zeros((7, 24))), 0.0)
+
+
+def test_single_post_spreads_to_neighbouring_hours_and_wraps_midnight():
+    sums, counts = np.zeros((7, 24)), np.zeros((7, 24))
+    sums[0, 23], counts[0, 23] = 0.1, 1
+    expected = _smooth(sums, counts)
+    mean = 0.1
+    # hour 23 gets half the post, hours 22 and 0 a quarter each, all shrunk toward the mean
+    assert expected[0, 23] == pytest.approx((0.5 * 0.1 + PRIOR_WEIGHT * mean) / (0.5 + PRIOR_WEIGHT))
+    assert expected[0, 0] == pytest.approx(expected[0, 22])
+    assert expected[1, 0] == pytest.approx(mean)
+
+
+def test_sparse_cells_are_shrunk_toward_the_account_mean():
+    sums, counts = np.full((7, 24), 0.02), np.ones((7, 24))
+    sums[2, 12] = 1.0
+    expected = _smooth(sums, counts)
+    assert expected[2, 12] == expected.max()
+    assert expected[2, 12] < 1.0 / 2
+
+
+def _metrics(shortcode, day, hour):
+    return {"username": "acct", "shortcode": shortcode, "posting_time": {"day_of_week": day, "hour": hour}}
+
+
+def test_recommend_after_min_posts_and_rescrape_replaces(tmp_path):
+    model = PostingTimeModel(history=_EmptyHistory(), path=str(tmp_path / "history.sqlite3"))
+    for i in range(MIN_POSTS - 1):
+        model.ingest(_metrics(f"p{i}", "Monday", 9), 0.01)
+    assert model.recommend("acct", {}) is None
+
+    model.ingest(_metrics("best", "Friday", 18), 0.2)
+    recommendation = model.recommend("acct", {"day_of_week": "Friday", "hour": 18})
+    assert recommendation["based_on_posts"] == MIN_POSTS
+    assert (recommendation["best_slots"][0]["day"], recommendation["best_slots"][0]["hour"]) == ("Friday", 18)
+
+    # A re-scrape moves the post's contribution instead of counting it twice
+    model.ingest(_metrics("best", "Sunday", 7), 0.2)
+    table = model.table("acct")
+    assert table.loc["Sunday", 7] == table.values.max()
+    assert model.recommend("acct", {})["based_on_posts"] == MIN_POSTS
+    assert list(table.index) == list(DAYS)